@@ -0,0 +1,136 @@
+"""Tiempo y memoria máxima de cada etapa de la página Pool KCH sobre flotas sintéticas.
+
+Escalas relativas al volumen actual (flota y slots de pool). El gráfico no se mide sobre la entrada escalada sino sobre
+una muestra fija de filas del primer componente, porque su costo crece de forma cuadrática con las filas (con 438 filas
+toma ~20 s); su fila del reporte queda marcada con fixed_size. La memoria se mide repitiendo cada etapa con
+tracemalloc, lo que duplica el tiempo del benchmark; --no-memory la omite.
+
+Uso: python -m benchmarks.bench_allocation [--scales 1 10 100] [--no-memory]
+"""
+
+# Standard library imports
+import argparse
+import time
+import tracemalloc
+from datetime import date
+from typing import Callable, List, Optional, Tuple
+
+# Third-party imports
+import pandas as pd
+
+from kverse.assets.pool.component_allocation import ComponentAllocation
+from kverse.assets.pool.synthetic import make_scaled_fleet
+from pages.planification.utils.preprocessing import modify_all_components
+from pages.planification.utils.vis_px_timeline import plot_pool_px_timeline
+
+RANGE_X = (date(2024, 4, 1), date(2025, 1, 1))
+# Filas del gráfico medido en cada escala: ~1 s con 100 filas, ~5.6 s con 200
+PLOT_SAMPLE_ROWS = 100
+
+
+def measure(func: Callable, *args, memory: bool = False) -> Tuple[object, float, float]:
+    # Tiempo sin tracemalloc, que agrega sobrecosto a cada asignación; con memory=True se repite para la memoria máxima
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    if not memory:
+        return result, elapsed, float("nan")
+
+    tracemalloc.start()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 2**20
+
+
+def run_allocation(fleet, engine: str) -> ComponentAllocation:
+    allocation = ComponentAllocation(*fleet.to_tuple(), engine=engine)
+    allocation.generate_pool_projection()
+    return allocation
+
+
+def run_modify_dataframe(allocated_df: pd.DataFrame) -> dict:
+    # Mismo preprocesamiento que poolkch: todos los componentes en una pasada, separados para el gráfico
+    df = allocated_df.copy()
+    df = df.assign(pool_slot=lambda x: x["pool_slot"].astype("int"))
+    df = df.dropna(subset=["arrival_date"]).reset_index(drop=True)
+    segments_df = modify_all_components(df)
+    return {component: comp_df for component, comp_df in segments_df.groupby("component", sort=False)}
+
+
+def plot_sample(component_frames: dict, n_rows: int = PLOT_SAMPLE_ROWS) -> pd.DataFrame:
+    # Primeros slots del primer componente, hasta n_rows filas
+    comp_df = next(iter(component_frames.values()))
+    return comp_df.sort_values(["pool_slot", "changeout_date"], kind="stable").head(n_rows)
+
+
+def run_plot(comp_df: pd.DataFrame):
+    return plot_pool_px_timeline(comp_df, by_confirmed=False, range_x=RANGE_X)
+
+
+def main(
+    scales=(1, 10, 100), engine: str = "events", seed: int = 0, memory: bool = True, plot_rows: int = PLOT_SAMPLE_ROWS
+) -> pd.DataFrame:
+    rows = []
+    for scale in scales:
+        fleet = make_scaled_fleet(scale, seed=seed)
+        n_changeouts = fleet.cc_df.shape[0]
+
+        allocation, elapsed, peak = measure(run_allocation, fleet, engine, memory=memory)
+        rows.append(
+            {
+                "scale": scale,
+                "stage": "ComponentAllocation",
+                "rows": n_changeouts,
+                "fixed_size": False,
+                "seconds": elapsed,
+                "peak_mb": peak,
+            }
+        )
+
+        component_frames, elapsed, peak = measure(run_modify_dataframe, allocation.allocated_df, memory=memory)
+        n_rows = allocation.allocated_df.shape[0]
+        rows.append(
+            {
+                "scale": scale,
+                "stage": "modify_dataframe",
+                "rows": n_rows,
+                "fixed_size": False,
+                "seconds": elapsed,
+                "peak_mb": peak,
+            }
+        )
+
+        sample = plot_sample(component_frames, plot_rows)
+        _, elapsed, peak = measure(run_plot, sample, memory=memory)
+        rows.append(
+            {
+                "scale": scale,
+                "stage": "plot_pool_px_timeline",
+                "rows": sample.shape[0],
+                "fixed_size": True,
+                "seconds": elapsed,
+                "peak_mb": peak,
+            }
+        )
+
+    report = pd.DataFrame(rows)
+    print(report.to_string(index=False, float_format="{:.3f}".format))
+    return report
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Tiempo de cada etapa de la página Pool KCH sobre flotas sintéticas")
+    parser.add_argument("--scales", type=float, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--engine", default="events", choices=ComponentAllocation.ENGINES)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--plot-rows", type=int, default=PLOT_SAMPLE_ROWS, help="filas del gráfico medido")
+    parser.add_argument(
+        "--no-memory", dest="memory", action="store_false", help="no repetir cada etapa con tracemalloc para la memoria"
+    )
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    main(args.scales, args.engine, args.seed, args.memory, args.plot_rows)
@@ -0,0 +1,76 @@
+"""Rendimiento de la lectura de la planilla de seguimiento de entregas sobre libros sintéticos.
+
+Separa la lectura de las hojas con openpyxl de la normalización de celdas (fechas, semanas y tipo de entrega).
+
+Informa el tiempo total por celda de cada tamaño relativo al más chico; con --tolerance termina con error si alguno la
+supera.
+
+Uso: python -m benchmarks.bench_arrivals [--sizes 5 10 20 40] [--tolerance 2]
+"""
+
+# Standard library imports
+import argparse
+import sys
+import tempfile
+import time
+import warnings
+from pathlib import Path
+from typing import List, Optional
+
+# Third-party imports
+import pandas as pd
+
+from benchmarks.scaling import add_per_row_ratio, exceeds_tolerance
+from kverse.assets.pool.comp_arrivals import read_arrivals_sheet, read_component_arrivals
+from kverse.assets.pool.synthetic import write_arrivals_workbook
+
+
+def main(sizes=(5, 10, 20, 40), n_weeks: int = 52, repeat: int = 3) -> pd.DataFrame:
+    rows = []
+    with tempfile.TemporaryDirectory() as directory, warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        for n_sheets in sizes:
+            path = write_arrivals_workbook(Path(directory) / f"arrivals_{n_sheets}.xlsx", n_sheets, n_weeks)
+            with pd.ExcelFile(path, engine="openpyxl") as xls:
+                parse, sheets = [], []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    cells = sum(xls.parse(sheet, skiprows=1, dtype="str").size for sheet in xls.sheet_names)
+                    parse.append(time.perf_counter() - start)
+                    start = time.perf_counter()
+                    for sheet in xls.sheet_names:
+                        read_arrivals_sheet(xls, sheet)
+                    sheets.append(time.perf_counter() - start)
+            total = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                read_component_arrivals(path)
+                total.append(time.perf_counter() - start)
+            rows.append(
+                {
+                    "sheets": n_sheets,
+                    "cells": cells,
+                    "parse_seconds": min(parse),
+                    "normalize_seconds": min(sheets) - min(parse),
+                    "total_seconds": min(total),
+                    "cells_per_second": cells / (min(sheets) - min(parse)),
+                }
+            )
+    report = add_per_row_ratio(pd.DataFrame(rows), rows="cells", seconds="total_seconds")
+    print(report.to_string(index=False, float_format="{:.4f}".format))
+    return report
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Lectura de la planilla de entregas sobre libros sintéticos")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 10, 20, 40], help="hojas de cada libro")
+    parser.add_argument("--weeks", type=int, default=52, help="semanas por hoja")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--tolerance", type=float, help="máxima razón de tiempo por celda contra el libro más chico")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = main(args.sizes, args.weeks, args.repeat)
+    sys.exit(int(exceeds_tolerance(report, args.tolerance)))
@@ -0,0 +1,70 @@
+"""Escalamiento de priority_sort sobre historiales de cambios de componente sintéticos.
+
+Informa el tiempo por fila de cada tamaño relativo al más chico; con --tolerance termina con error si alguno la supera.
+
+Uso: python -m benchmarks.bench_priority_sort [--sizes 12500 25000 50000 100000] [--tolerance 2]
+"""
+
+# Standard library imports
+import argparse
+import sys
+import time
+from typing import List, Optional
+
+# Third-party imports
+import numpy as np
+import pandas as pd
+
+from benchmarks.scaling import add_per_row_ratio, exceeds_tolerance
+from kverse.assets.pool.component_allocation import ComponentType, priority_sort
+
+SUBCOMPONENTS = {
+    ComponentType.MT.value.code: ["MOTOR TRACCIÓN", "motor_traccion"],
+    ComponentType.CMS.value.code: ["Suspension Delantera", "conjunto_masa_suspension_delantera"],
+    ComponentType.MP.value.code: ["MOTOR", "Alternador Principal", "Radiador", "alternador_principal"],
+}
+
+
+def make_changeouts(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    components = rng.choice(ComponentType.get_all_codes(), n_rows)
+    subcomponents = [rng.choice(SUBCOMPONENTS.get(component, [component])) for component in components]
+    return pd.DataFrame(
+        {
+            "equipo": rng.integers(1, 120, n_rows).astype(str),
+            "component": components,
+            "subcomponent": subcomponents,
+            "position": rng.integers(1, 3, n_rows).astype(str),
+            "changeout_date": pd.Timestamp(2020, 1, 1) + pd.to_timedelta(rng.integers(0, 365 * 5, n_rows), unit="D"),
+        }
+    )
+
+
+def main(sizes=(12_500, 25_000, 50_000, 100_000), repeat: int = 3) -> pd.DataFrame:
+    rows = []
+    for n_rows in sizes:
+        df = make_changeouts(n_rows)
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            priority_sort(df)
+            timings.append(time.perf_counter() - start)
+        elapsed = min(timings)
+        rows.append({"rows": n_rows, "seconds": elapsed, "us_per_row": 1e6 * elapsed / n_rows})
+    report = add_per_row_ratio(pd.DataFrame(rows))
+    print(report.to_string(index=False, float_format="{:.4f}".format))
+    return report
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Escalamiento de priority_sort sobre historiales sintéticos")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[12_500, 25_000, 50_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--tolerance", type=float, help="máxima razón de tiempo por fila contra el tamaño más chico")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = main(args.sizes, args.repeat)
+    sys.exit(int(exceeds_tolerance(report, args.tolerance)))
@@ -0,0 +1,92 @@
+"""Contrasta la simulación de faltantes con tiempos fijos contra la asignación determinista de ComponentAllocation.
+
+Sobre flotas sintéticas con cada reparación confirmada en su fecha proyectada (confirm_at_projection), la primera
+semana con faltante de simulate_pool_shortage con RepairTimeDistribution("fixed") debe ser la semana en que la
+asignación no encuentra slot (failed_week), y ninguna si la asignación termina.
+
+Cada componente se compara hasta su primera semana con dos cambios en la misma fecha o dos llegadas en la misma fecha:
+la asignación confirma juntos los cambios de una misma fecha, y dos llegadas iguales de una semana apuntan al mismo
+cambio, por lo que desde ahí puede liberar slots antes o nunca.
+
+Uso: python -m benchmarks.check_simulation [--seeds 0 1 2 3 4 5]
+"""
+
+# Standard library imports
+import argparse
+import sys
+from typing import List, Optional
+
+# Third-party imports
+import pandas as pd
+
+from kverse.assets.pool.component_allocation import ComponentAllocation, iso_week
+from kverse.assets.pool.simulation import RepairTimeDistribution, simulate_pool_shortage
+from kverse.assets.pool.synthetic import confirm_at_projection, make_fleet
+
+# Pool chico y más cambios que la flota actual, para que la mayoría de los componentes se quede sin slots
+POOL_SLOTS = 6
+CHANGEOUTS_PER_EQUIPO_YEAR = 0.5
+
+
+def collision_weeks(allocation: ComponentAllocation) -> pd.Series:
+    # Primera semana de cada componente desde la que la asignación puede liberar slots distinto que la simulación
+    changeouts = pd.concat([allocation.pool_slots_df, allocation.missing_cc_df])[["component", "changeout_date"]]
+    arrivals = allocation.arrivals_df[["component", "arrival_date"]]
+    dates = pd.concat(
+        [
+            changeouts.loc[changeouts.duplicated(keep=False)].set_axis(["component", "date"], axis=1),
+            arrivals.loc[arrivals.duplicated(keep=False)].set_axis(["component", "date"], axis=1),
+        ]
+    )
+    return dates.assign(week=iso_week(dates["date"])).groupby("component")["week"].min()
+
+
+def compare(allocation: ComponentAllocation) -> pd.DataFrame:
+    allocation.generate_pool_projection()
+    shortages = simulate_pool_shortage(allocation, replications=1, default_distribution=RepairTimeDistribution("fixed"))
+    shortages = shortages.loc[shortages["shortage_probability"] > 0]
+    simulated_weeks = shortages.drop_duplicates(subset=["component"]).set_index("component")["week"]
+    collisions = collision_weeks(allocation)
+
+    rows = []
+    for component, log in allocation.allocations_log.items():
+        simulated_week = simulated_weeks.get(component)
+        collision_week = collisions.get(component)
+        first_week = min(week for week in (log.failed_week, simulated_week, "9999") if week is not None)
+        rows.append(
+            {
+                "component": component,
+                "failed_week": log.failed_week,
+                "simulated_week": simulated_week,
+                "collision_week": collision_week,
+                "comparable": collision_week is None or first_week < collision_week,
+                "agrees": log.failed_week == simulated_week,
+            }
+        )
+    return pd.DataFrame(rows)
+
+
+def main(seeds=range(6)) -> pd.DataFrame:
+    frames = []
+    for seed in seeds:
+        fleet = make_fleet(pool_slots=POOL_SLOTS, changeouts_per_equipo_year=CHANGEOUTS_PER_EQUIPO_YEAR, seed=seed)
+        fleet = confirm_at_projection(fleet)
+        frames.append(compare(ComponentAllocation(*fleet.to_tuple())).assign(seed=seed))
+
+    report = pd.concat(frames, ignore_index=True)
+    print(report.to_string(index=False))
+    mismatches = report.loc[report["comparable"] & ~report["agrees"]]
+    print(f"{report['comparable'].sum()} componentes comparables, {mismatches.shape[0]} diferencias")
+    return report
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Contrasta la simulación con tiempos fijos contra la asignación")
+    parser.add_argument("--seeds", type=int, nargs="+", default=list(range(6)))
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = main(args.seeds)
+    sys.exit(int((report["comparable"] & ~report["agrees"]).any()))
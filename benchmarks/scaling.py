@@ -0,0 +1,32 @@
+"""Tiempo por fila de cada escala relativo a la escala más chica, para detectar costos que crecen más que linealmente.
+
+Una razón cercana a 1 indica costo lineal en las filas; con una tolerancia, los benchmarks terminan con error si
+alguna escala la supera.
+"""
+
+# Standard library imports
+from typing import Optional
+
+# Third-party imports
+import pandas as pd
+
+
+def add_per_row_ratio(
+    report: pd.DataFrame, rows: str = "rows", seconds: str = "seconds", by: Optional[str] = None
+) -> pd.DataFrame:
+    # Con by, cada grupo (p. ej. cada etapa) se compara contra su propia escala más chica
+    per_row = report[seconds] / report[rows]
+    groups = report[by] if by else pd.Series(0, index=report.index)
+    smallest = report[rows].groupby(groups).transform("min") == report[rows]
+    baseline = per_row.where(smallest).groupby(groups).transform("first")
+    return report.assign(per_row_ratio=per_row / baseline)
+
+
+def exceeds_tolerance(report: pd.DataFrame, tolerance: Optional[float]) -> bool:
+    if tolerance is None:
+        return False
+    exceeded = report.loc[report["per_row_ratio"] > tolerance]
+    if not exceeded.empty:
+        print(f"\nTiempo por fila sobre {tolerance:g} veces el de la escala más chica:")
+        print(exceeded.to_string(index=False, float_format="{:.4f}".format))
+    return not exceeded.empty
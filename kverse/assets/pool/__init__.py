@@ -1,6 +1,27 @@
+from kverse.assets.pool.arrivals_store import ArrivalsSheetStore
 from kverse.assets.pool.base_pool_proj import read_base_pool_proj
 from kverse.assets.pool.comp_arrivals import read_component_arrivals
 from kverse.assets.pool.comp_changeouts import read_cc
 from kverse.assets.pool.component_allocation import ComponentAllocation
+from kverse.assets.pool.loader import PlanningSources, SourceLoader
+from kverse.assets.pool.pool_sizing import PoolSizeOptimizer, optimize_pool_size
+from kverse.assets.pool.projection_cache import CachedProjection, ProjectionCache
+from kverse.assets.pool.simulation import RepairTimeDistribution, simulate_pool_shortage
+from kverse.assets.pool.snapshots import SourceSnapshots
 
-__all__ = ["read_base_pool_proj", "read_component_arrivals", "read_cc", "ComponentAllocation"]
+__all__ = [
+    "ArrivalsSheetStore",
+    "read_base_pool_proj",
+    "read_component_arrivals",
+    "read_cc",
+    "ComponentAllocation",
+    "PlanningSources",
+    "SourceLoader",
+    "PoolSizeOptimizer",
+    "optimize_pool_size",
+    "CachedProjection",
+    "ProjectionCache",
+    "RepairTimeDistribution",
+    "simulate_pool_shortage",
+    "SourceSnapshots",
+]
@@ -0,0 +1,490 @@
+# Standard library imports
+import heapq
+from bisect import bisect_left, bisect_right, insort
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+# Third-party imports
+import numpy as np
+import pandas as pd
+
+# Local imports
+from kverse.assets.pool.allocation_log import AllocationLog
+
+# Constants
+
+NAT = np.iinfo(np.int64).min
+DAY_NS = 86_400_000_000_000
+MAX_NS = np.iinfo(np.int64).max
+
+
+def to_ns(series: pd.Series) -> np.ndarray:
+    # Fechas como enteros en nanosegundos, NaT queda como NAT
+    return pd.to_datetime(series).to_numpy(dtype="datetime64[ns]").view("i8")
+
+
+def slot_key(slot):
+    # Los NaN no son comparables ni hasheables de forma estable, se agrupan en una sola clave
+    return None if pd.isna(slot) else slot
+
+
+def slot_sort_key(slot) -> tuple:
+    # Mismo orden que sort_values("pool_slot"): NaN al final
+    return (1, 0) if slot is None else (0, slot)
+
+
+def quicksort_order(dates: np.ndarray) -> np.ndarray:
+    # Mismo indexador que sort_values sobre una columna de fechas (nargsort): quicksort de numpy sobre las fechas
+    # válidas y NaT al final en su orden original. Con más de 16 filas quicksort no es estable, por lo que el orden
+    # de los empates sólo se reproduce repitiendo la misma llamada sobre el mismo orden de entrada.
+    valid = dates != NAT
+    positions = np.flatnonzero(valid)
+    order = positions[dates[valid].view("datetime64[ns]").argsort(kind="quicksort")]
+    return order if order.shape[0] == dates.shape[0] else np.concatenate([order, np.flatnonzero(~valid)])
+
+
+@dataclass
+class ComponentAllocationResult:
+    component: str
+    component_df: pd.DataFrame
+    log: AllocationLog
+    allocated_labels: List = field(default_factory=list)
+    arrival_slots: Dict = field(default_factory=dict)
+    allocation_weeks: int = 0
+    engine: Optional["SlotAllocationEngine"] = None
+    # Trabajo hecho en esta ejecución (en resume() sólo las semanas reprocesadas)
+    processed_weeks: int = 0
+    slot_searches: int = 0
+
+
+@dataclass
+class EngineCheckpoint:
+    # Estado del motor al terminar una semana. Las filas sólo se agregan, por lo que basta con su cantidad;
+    # fechas de llegada y estados sí cambian con las confirmaciones y se copian.
+    week: str
+    n_rows: int
+    arrival: np.ndarray
+    status: np.ndarray
+    last_row: Dict
+    version: Dict
+    frame_order: np.ndarray
+    n_log: int
+    n_allocated: int
+    n_arrival_events: int
+    allocation_weeks: int
+
+
+def week_fingerprints(df: pd.DataFrame, week_column: str) -> Dict[str, int]:
+    # Huella por semana para detectar desde qué semana cambiaron los datos de entrada; incluye el orden de las filas
+    if df.empty:
+        return {}
+    weeks = df[week_column].to_numpy()
+    hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    order = pd.Series(weeks).groupby(weeks).cumcount().to_numpy(dtype=np.uint64) + np.uint64(1)
+    with np.errstate(over="ignore"):
+        mixed = hashes * (order * np.uint64(0x9E3779B97F4A7C15))
+    return pd.Series(mixed).groupby(weeks).sum().to_dict()
+
+
+class SlotAllocationEngine:
+    """Asignación por eventos de un componente sobre los slots del pool.
+
+    Reproduce ComponentAllocation.allocate_components manteniendo el estado de cada slot (último cambio y fecha de
+    llegada) en arreglos, en vez de reconstruir y reordenar el DataFrame en cada cambio de componente. Con
+    checkpoints=True guarda el estado al terminar cada semana para poder retomar la asignación con resume().
+    log_events=False desactiva el registro de eventos (sólo se mantiene la semana en que no hubo slot disponible).
+    """
+
+    def __init__(
+        self,
+        component: str,
+        base_df: pd.DataFrame,
+        changeouts_df: pd.DataFrame,
+        arrivals_df: pd.DataFrame,
+        checkpoints: bool = False,
+        log_events: bool = True,
+    ):
+        self.component = component
+        self.base_df = base_df
+        self.log_events = log_events
+        self.checkpoints: Optional[Dict[str, EngineCheckpoint]] = {} if checkpoints else None
+        self._bind(changeouts_df, arrivals_df)
+        self._reset()
+
+    def _bind(self, changeouts_df: pd.DataFrame, arrivals_df: pd.DataFrame) -> None:
+        self.changeouts_df = changeouts_df
+        self.arrivals_df = arrivals_df
+        self.weeks = sorted(
+            pd.concat([changeouts_df["changeout_week"], arrivals_df["arrival_week"]]).drop_duplicates().to_list()
+        )
+        if self.checkpoints is not None:
+            self.changeout_fingerprints = week_fingerprints(changeouts_df, "changeout_week")
+            self.arrival_fingerprints = week_fingerprints(arrivals_df, "arrival_week")
+
+    def _reset(self) -> None:
+        n_base = self.base_df.shape[0]
+        capacity = n_base + self.changeouts_df.shape[0]
+
+        # Estado por fila (filas base del pool seguidas de los cambios asignados)
+        self.co = np.full(capacity, NAT, dtype=np.int64)
+        self.arrival = np.full(capacity, NAT, dtype=np.int64)
+        self.proj = np.full(capacity, NAT, dtype=np.int64)
+        self.status = np.empty(capacity, dtype=object)
+        self.slot = np.empty(capacity, dtype=object)
+        self.source = np.full(capacity, -1, dtype=np.int64)
+        self.n_rows = 0
+
+        # Índices mantenidos durante la asignación
+        self.rows_by_changeout: Dict[int, List[int]] = {}
+        self.unconfirmed: List[tuple] = []
+        self.last_row: Dict = {}
+        self.version: Dict = {}
+        self.ready_heap: List[tuple] = []
+        # Filas en el orden en que quedaría el DataFrame de allocate_components tras cada sort_values
+        self.frame_order = np.arange(self.base_df.shape[0], dtype=np.int64)
+        # Última fila de cada slot en el orden de pool_slot, para desempatar; se reconstruye al aparecer un slot
+        self._slot_rows: Optional[np.ndarray] = None
+        self._slot_positions: Dict = {}
+
+        # Resultado acumulado
+        self.log = AllocationLog(self.component, enabled=self.log_events)
+        self.allocated_positions: List[int] = []
+        self.arrival_events: List[tuple] = []
+        self.allocation_weeks = 0
+        self.stopped_week: Optional[str] = None
+        if self.checkpoints is not None:
+            self.checkpoints.clear()
+
+        for co, arrival, proj, status, slot in zip(
+            to_ns(self.base_df["changeout_date"]),
+            to_ns(self.base_df["arrival_date"]),
+            to_ns(self.base_df["arrival_date_proj"]),
+            self.base_df["arrival_status"].to_numpy(dtype=object),
+            self.base_df["pool_slot"].to_numpy(dtype=object),
+        ):
+            self._append_row(co, arrival, proj, status, slot, source=-1)
+
+    def _checkpoint(self, week: str) -> EngineCheckpoint:
+        return EngineCheckpoint(
+            week=week,
+            n_rows=self.n_rows,
+            arrival=self.arrival[: self.n_rows].copy(),
+            status=self.status[: self.n_rows].copy(),
+            last_row=dict(self.last_row),
+            version=dict(self.version),
+            frame_order=self.frame_order,
+            n_log=len(self.log),
+            n_allocated=len(self.allocated_positions),
+            n_arrival_events=len(self.arrival_events),
+            allocation_weeks=self.allocation_weeks,
+        )
+
+    def _restore(self, checkpoint: EngineCheckpoint) -> None:
+        n_rows = checkpoint.n_rows
+        capacity = self.base_df.shape[0] + self.changeouts_df.shape[0]
+        if capacity > self.co.shape[0]:
+            extra = capacity - self.co.shape[0]
+            self.co = np.concatenate([self.co, np.full(extra, NAT, dtype=np.int64)])
+            self.arrival = np.concatenate([self.arrival, np.full(extra, NAT, dtype=np.int64)])
+            self.proj = np.concatenate([self.proj, np.full(extra, NAT, dtype=np.int64)])
+            self.status = np.concatenate([self.status, np.empty(extra, dtype=object)])
+            self.slot = np.concatenate([self.slot, np.empty(extra, dtype=object)])
+            self.source = np.concatenate([self.source, np.full(extra, -1, dtype=np.int64)])
+
+        self.n_rows = n_rows
+        self.arrival[:n_rows] = checkpoint.arrival
+        self.status[:n_rows] = checkpoint.status
+        self.last_row = dict(checkpoint.last_row)
+        self.version = dict(checkpoint.version)
+        # frame_order no se modifica en su lugar, cada cambio crea un arreglo nuevo
+        self.frame_order = checkpoint.frame_order
+        self._slot_rows = None
+
+        # Los índices se reconstruyen a partir de las filas vigentes
+        self.rows_by_changeout = {}
+        for row in range(n_rows):
+            self.rows_by_changeout.setdefault(self.co[row], []).append(row)
+        self.unconfirmed = sorted(
+            (self.proj[row], self.co[row], row) for row in range(n_rows) if self.status[row] == "unconfirmed"
+        )
+        self.ready_heap = [
+            (self.arrival[row], self.co[row], slot_sort_key(key), self.version[key], row)
+            for key, row in self.last_row.items()
+            if self.arrival[row] != NAT
+        ]
+        heapq.heapify(self.ready_heap)
+
+        self.log.truncate(checkpoint.n_log)
+        del self.allocated_positions[checkpoint.n_allocated :]
+        del self.arrival_events[checkpoint.n_arrival_events :]
+        self.allocation_weeks = checkpoint.allocation_weeks
+        self.stopped_week = None
+        for week in [week for week in self.checkpoints if week > checkpoint.week]:
+            del self.checkpoints[week]
+
+    def _append_row(self, co: int, arrival: int, proj: int, status, slot, source: int) -> int:
+        row = self.n_rows
+        self.n_rows += 1
+        self.co[row] = co
+        self.arrival[row] = arrival
+        self.proj[row] = proj
+        self.status[row] = status
+        self.slot[row] = slot
+        self.source[row] = source
+
+        self.rows_by_changeout.setdefault(co, []).append(row)
+        if status == "unconfirmed":
+            insort(self.unconfirmed, (proj, co, row))
+
+        if source >= 0:
+            # allocate_components concatena la fila y reordena todo el DataFrame por changeout_date
+            order = np.append(self.frame_order, row)
+            self.frame_order = order[quicksort_order(self.co[order])]
+
+        key = slot_key(slot)
+        last = self.last_row.get(key)
+        if last is None or co >= self.co[last]:
+            self.last_row[key] = row
+            self._touch_slot(key)
+            if key not in self._slot_positions:
+                self._slot_rows = None
+            elif self._slot_rows is not None:
+                self._slot_rows[self._slot_positions[key]] = row
+        return row
+
+    def _touch_slot(self, key) -> None:
+        self.version[key] = self.version.get(key, 0) + 1
+        row = self.last_row[key]
+        if self.arrival[row] != NAT:
+            heapq.heappush(
+                self.ready_heap,
+                (self.arrival[row], self.co[row], slot_sort_key(key), self.version[key], row),
+            )
+
+    def _confirm_arrivals(self, arrival_dates: np.ndarray) -> List:
+        # merge_asof(direction="nearest") contra las llegadas no confirmadas, evaluado antes de actualizar la semana.
+        # Con fechas iguales hacia atrás se toma la última y hacia adelante la primera, igual que pandas.
+        matches = []
+        for arrival in arrival_dates:
+            match = None
+            backward = bisect_right(self.unconfirmed, (arrival, MAX_NS, MAX_NS)) - 1
+            forward = bisect_left(self.unconfirmed, (arrival,))
+            if backward >= 0 and forward < len(self.unconfirmed):
+                backward_diff = arrival - self.unconfirmed[backward][0]
+                forward_diff = self.unconfirmed[forward][0] - arrival
+                match = self.unconfirmed[forward][2] if forward_diff < backward_diff else self.unconfirmed[backward][2]
+            elif backward >= 0:
+                match = self.unconfirmed[backward][2]
+            elif forward < len(self.unconfirmed):
+                match = self.unconfirmed[forward][2]
+            matches.append(match)
+
+        slots = []
+        for arrival, match in zip(arrival_dates, matches):
+            if match is None:
+                slots.append(np.nan)
+                continue
+            for row in self.rows_by_changeout[self.co[match]]:
+                if self.status[row] == "unconfirmed":
+                    self.unconfirmed.remove((self.proj[row], self.co[row], row))
+                self.arrival[row] = arrival
+                self.status[row] = "confirmed"
+                key = slot_key(self.slot[row])
+                if self.last_row[key] == row:
+                    self._touch_slot(key)
+            slots.append(self.slot[match])
+        return slots
+
+    def _find_most_time_unchanged_slot(self, changeout_date: int) -> Optional[int]:
+        # Slot disponible con más días sin cambio; empates por fecha de cambio y luego por número de slot
+        popped = []
+        best = []
+        best_days = None
+        while self.ready_heap:
+            arrival, co, sort_key, version, row = self.ready_heap[0]
+            key = slot_key(self.slot[row])
+            if self.version.get(key) != version:
+                heapq.heappop(self.ready_heap)
+                continue
+            if arrival > changeout_date:
+                break
+            entry = heapq.heappop(self.ready_heap)
+            popped.append(entry)
+            if co >= changeout_date:
+                continue
+            days = (changeout_date - arrival) // DAY_NS
+            if best_days is None:
+                best_days = days
+            elif days < best_days:
+                break
+            best.append(entry)
+        for entry in popped:
+            heapq.heappush(self.ready_heap, entry)
+
+        if not best:
+            return None
+        best_co = min(entry[1] for entry in best)
+        if sum(entry[1] == best_co for entry in best) == 1:
+            return min(best, key=lambda entry: entry[1])[4]
+        return self._resolve_tie(changeout_date)
+
+    def _resolve_tie(self, changeout_date: int) -> int:
+        # Con empate en días y fecha de cambio el resultado depende del sort_values (quicksort) de
+        # find_available_pool_slot sobre todos los slots disponibles en orden de pool_slot, por lo que se repite el
+        # mismo argsort sobre los mismos datos; quicksort no es estable sobre 16 filas y no hay clave que lo reemplace.
+        if self._slot_rows is None:
+            keys = sorted(self.last_row, key=slot_sort_key)
+            self._slot_positions = {key: position for position, key in enumerate(keys)}
+            self._slot_rows = np.array([self.last_row[key] for key in keys], dtype=np.int64)
+        rows = self._slot_rows
+        co = self.co[rows]
+        arrival = self.arrival[rows]
+        available = (co < changeout_date) & (arrival != NAT) & (arrival <= changeout_date)
+        rows = rows[available][quicksort_order(co[available])]
+        # idxmax: primera fila con el máximo de días
+        return int(rows[np.argmax((changeout_date - self.arrival[rows]) // DAY_NS)])
+
+    def run(self) -> ComponentAllocationResult:
+        self.processed_weeks = self.slot_searches = 0
+        self._process(self.weeks)
+        return self.result()
+
+    def resume(self, changeouts_df: pd.DataFrame, arrivals_df: pd.DataFrame) -> ComponentAllocationResult:
+        # Retoma desde la primera semana con cambios en las entradas, reutilizando el estado de las semanas previas
+        if self.checkpoints is None:
+            raise ValueError("Engine was created without checkpoints")
+        self.processed_weeks = self.slot_searches = 0
+        previous = (self.changeout_fingerprints, self.arrival_fingerprints)
+        self._bind(changeouts_df, arrivals_df)
+
+        changed_weeks = [
+            week
+            for old, new in zip(previous, (self.changeout_fingerprints, self.arrival_fingerprints))
+            for week in set(old) | set(new)
+            if old.get(week) != new.get(week)
+        ]
+        if not changed_weeks:
+            return self.result()
+        first_changed = min(changed_weeks)
+        if self.stopped_week is not None and first_changed > self.stopped_week:
+            # La asignación se detuvo antes de la semana modificada, el resultado no cambia
+            return self.result()
+
+        previous_weeks = [week for week in self.checkpoints if week < first_changed]
+        if not previous_weeks:
+            self._reset()
+            return self.run()
+        checkpoint = self.checkpoints[max(previous_weeks)]
+        self._restore(checkpoint)
+        self._process([week for week in self.weeks if week > checkpoint.week])
+        return self.result()
+
+    def _process(self, weeks: List[str]) -> None:
+        changeouts = self.changeouts_df
+        arrivals = self.arrivals_df
+        log = self.log
+
+        cc_weeks = changeouts.groupby("changeout_week", sort=False).indices
+        arrival_weeks = arrivals.groupby("arrival_week", sort=False).indices
+
+        co_dates = to_ns(changeouts["changeout_date"])
+        co_arrivals = to_ns(changeouts["arrival_date"])
+        co_proj = to_ns(changeouts["arrival_date_proj"])
+        co_types = changeouts["pool_changeout_type"].to_numpy(dtype=object)
+        co_slots = changeouts["pool_slot"].to_numpy(dtype=object)
+        co_equipos = changeouts["equipo"].to_numpy(dtype=object)
+        co_serials = changeouts["component_serial"].to_numpy(dtype=object)
+        arrival_dates = to_ns(arrivals["arrival_date"])
+
+        for week in weeks:
+            self.processed_weeks += 1
+            log.start_week(week)
+            week_arrivals = arrival_weeks.get(week, [])
+            week_cc = cc_weeks.get(week, [])
+            dates = arrival_dates[week_arrivals]
+            log.arrivals(dates)
+            if len(week_arrivals) > 0:
+                self.arrival_events += zip(dates, self._confirm_arrivals(dates))
+
+            if len(week_cc) == 0:
+                log.no_changeouts()
+            else:
+                should_break = False
+                allocated_in_week = False
+                for position in week_cc:
+                    if co_types[position] == "E":
+                        slot, status, outcome = co_slots[position], np.nan, "blocked_lane"
+                    else:
+                        self.slot_searches += 1
+                        row = self._find_most_time_unchanged_slot(co_dates[position])
+                        if row is None:
+                            log.changeout(
+                                co_dates[position], co_equipos[position], co_serials[position], None, "failed"
+                            )
+                            log.no_slot(week)
+                            should_break = True
+                            break
+                        slot, status, outcome = self.slot[row], "unconfirmed", "allocated"
+                    log.changeout(co_dates[position], co_equipos[position], co_serials[position], slot, outcome)
+                    self._append_row(
+                        co_dates[position],
+                        co_arrivals[position],
+                        co_proj[position],
+                        status,
+                        slot,
+                        source=position,
+                    )
+                    self.allocated_positions.append(position)
+                    allocated_in_week = True
+                self.allocation_weeks += allocated_in_week
+                if should_break:
+                    self.stopped_week = week
+                    break
+            log.end_week()
+            if self.checkpoints is not None:
+                self.checkpoints[week] = self._checkpoint(week)
+
+    def result(self) -> ComponentAllocationResult:
+        return ComponentAllocationResult(
+            component=self.component,
+            component_df=self._build_component_df(),
+            log=self.log.copy(),
+            allocated_labels=self.changeouts_df.index[self.allocated_positions].to_list(),
+            arrival_slots=dict(self.arrival_events),
+            allocation_weeks=self.allocation_weeks,
+            engine=self if self.checkpoints is not None else None,
+            processed_weeks=self.processed_weeks,
+            slot_searches=self.slot_searches,
+        )
+
+    def _build_component_df(self) -> pd.DataFrame:
+        n_base = self.base_df.shape[0]
+        base_df = self.base_df.assign(
+            arrival_date=pd.to_datetime(self.arrival[:n_base].view("datetime64[ns]")),
+            arrival_status=self.status[:n_base],
+        )
+
+        rows = slice(n_base, self.n_rows)
+        new_df = self.changeouts_df.iloc[self.source[rows]].assign(
+            arrival_date=pd.to_datetime(self.arrival[rows].view("datetime64[ns]")),
+            arrival_status=self.status[rows],
+            pool_slot=pd.Series(self.slot[rows], dtype=object).infer_objects().to_numpy(),
+        )
+        return pd.concat([base_df, new_df], ignore_index=True).take(self.frame_order)
+
+
+def allocate_component(
+    component: str,
+    base_df: pd.DataFrame,
+    changeouts_df: pd.DataFrame,
+    arrivals_df: pd.DataFrame,
+    engine: Optional[SlotAllocationEngine] = None,
+    checkpoints: bool = False,
+    log_events: bool = True,
+) -> ComponentAllocationResult:
+    # Punto de entrada a nivel de módulo para poder ejecutarlo en un pool de procesos
+    if engine is not None and engine.base_df.reset_index(drop=True).equals(base_df.reset_index(drop=True)):
+        return engine.resume(changeouts_df, arrivals_df)
+    return SlotAllocationEngine(
+        component, base_df, changeouts_df, arrivals_df, checkpoints=checkpoints, log_events=log_events
+    ).run()
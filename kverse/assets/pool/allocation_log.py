@@ -0,0 +1,172 @@
+# Standard library imports
+from array import array
+from typing import List, Optional
+
+# Third-party imports
+import numpy as np
+import pandas as pd
+
+# Constants
+
+NAT = np.iinfo(np.int64).min
+EVENT_TYPES = ("week", "no_arrivals", "arrival", "no_changeouts", "changeout", "no_slot", "week_end")
+WEEK, NO_ARRIVALS, ARRIVAL, NO_CHANGEOUTS, CHANGEOUT, NO_SLOT, WEEK_END = range(len(EVENT_TYPES))
+OUTCOMES = ("", "allocated", "blocked_lane", "failed")
+
+
+class AllocationLog:
+    """Registro de eventos de la asignación de un componente.
+
+    Los eventos se guardan en arreglos columnares (tipo de evento, semana, fecha, equipo, serie, slot y resultado) y el
+    texto legible que se muestra en modo debug se genera sólo al llamar a render(). Con enabled=False no se registra
+    ningún evento, pero se mantiene la semana en que la asignación no encontró slot disponible.
+    """
+
+    def __init__(self, component: str, enabled: bool = True):
+        self.component = component
+        self.enabled = enabled
+        self.failed_week: Optional[str] = None
+        self.weeks: List[str] = []
+        self.event = array("b")
+        self.week = array("q")
+        self.date = array("q")
+        self.outcome = array("b")
+        self.equipo: List = []
+        self.serial: List = []
+        self.slot: List = []
+
+    def __len__(self) -> int:
+        return len(self.event)
+
+    def __str__(self) -> str:
+        return self.render()
+
+    @property
+    def failed(self) -> bool:
+        return self.failed_week is not None
+
+    def _record(self, event: int, date: int = NAT, outcome: int = 0, equipo=None, serial=None, slot=None) -> None:
+        self.event.append(event)
+        self.week.append(len(self.weeks) - 1)
+        self.date.append(int(date))
+        self.outcome.append(outcome)
+        self.equipo.append(equipo)
+        self.serial.append(serial)
+        self.slot.append(slot)
+
+    def start_week(self, week: str) -> None:
+        if self.enabled:
+            self.weeks.append(week)
+            self._record(WEEK)
+
+    def arrivals(self, dates) -> None:
+        if not self.enabled:
+            return
+        if len(dates) == 0:
+            self._record(NO_ARRIVALS)
+        for date in dates:
+            self._record(ARRIVAL, date=pd.Timestamp(date).value)
+
+    def no_changeouts(self) -> None:
+        if self.enabled:
+            self._record(NO_CHANGEOUTS)
+
+    def changeout(self, date, equipo, serial, slot=None, outcome: str = "allocated") -> None:
+        if self.enabled:
+            self._record(
+                CHANGEOUT,
+                date=pd.Timestamp(date).value,
+                outcome=OUTCOMES.index(outcome),
+                equipo=equipo,
+                serial=serial,
+                slot=slot,
+            )
+
+    def no_slot(self, week: str) -> None:
+        self.failed_week = week
+        if self.enabled:
+            self._record(NO_SLOT, outcome=OUTCOMES.index("failed"))
+
+    def end_week(self) -> None:
+        if self.enabled:
+            self._record(WEEK_END)
+
+    def truncate(self, length: int) -> None:
+        # Descarta los eventos posteriores a un checkpoint, que siempre termina una semana completa
+        for column in (self.event, self.week, self.date, self.outcome, self.equipo, self.serial, self.slot):
+            del column[length:]
+        del self.weeks[(self.week[-1] + 1 if length else 0) :]
+        self.failed_week = None
+
+    def copy(self) -> "AllocationLog":
+        log = AllocationLog(self.component, enabled=self.enabled)
+        log.failed_week = self.failed_week
+        log.weeks = list(self.weeks)
+        for name in ("event", "week", "date", "outcome", "equipo", "serial", "slot"):
+            setattr(log, name, getattr(self, name)[:])
+        return log
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            {
+                "week": (
+                    pd.Categorical.from_codes(np.frombuffer(self.week, dtype=np.int64), categories=self.weeks)
+                    if self.weeks
+                    else pd.Categorical([])
+                ),
+                "event": pd.Categorical.from_codes(np.frombuffer(self.event, dtype=np.int8), categories=EVENT_TYPES),
+                "date": pd.to_datetime(np.frombuffer(self.date, dtype=np.int64).view("datetime64[ns]")),
+                "equipo": self.equipo,
+                "component_serial": self.serial,
+                "pool_slot": self.slot,
+                "outcome": pd.Categorical.from_codes(np.frombuffer(self.outcome, dtype=np.int8), categories=OUTCOMES),
+            }
+        )
+
+    @classmethod
+    def from_frame(cls, component: str, df: pd.DataFrame, failed_week: Optional[str] = None) -> "AllocationLog":
+        # Inverso de to_frame: cada evento "week" agrega una semana y los eventos siguientes apuntan a ella
+        log = cls(component)
+        log.failed_week = failed_week
+        events = pd.Categorical(df["event"].astype(str), categories=EVENT_TYPES).codes
+        log.weeks = df.loc[events == WEEK, "week"].astype(str).to_list()
+        log.event = array("b", events.astype(np.int8).tobytes())
+        log.week = array("q", (np.cumsum(events == WEEK) - 1).astype(np.int64).tobytes())
+        log.date = array("q", df["date"].to_numpy(dtype="datetime64[ns]").view(np.int64).tobytes())
+        outcomes = pd.Categorical(df["outcome"].astype(str), categories=OUTCOMES).codes
+        log.outcome = array("b", outcomes.astype(np.int8).tobytes())
+        for name, column in (("equipo", "equipo"), ("serial", "component_serial"), ("slot", "pool_slot")):
+            values = df[column].astype(object)
+            setattr(log, name, values.where(values.notnull(), None).to_list())
+        return log
+
+    def render(self) -> str:
+        # Mismo texto que se construía durante la asignación
+        parts = []
+        arrival_dates = []
+        for position, event in enumerate(self.event):
+            if event != ARRIVAL and arrival_dates:
+                parts.append(f"\nSe agrega llegada componente {self.component} con fecha: {arrival_dates}")
+                arrival_dates = []
+            if event == WEEK:
+                parts.append(f"\nSemana {self.weeks[self.week[position]]}:")
+            elif event == NO_ARRIVALS:
+                parts.append("\nSin llegadas de componente")
+            elif event == ARRIVAL:
+                arrival_dates.append(pd.Timestamp(self.date[position]).strftime("%Y-%m-%d"))
+            elif event == NO_CHANGEOUTS:
+                week = self.weeks[self.week[position]]
+                parts.append(f"\nNo existen cambios de componente para la semana {week}, componente {self.component}")
+            elif event == CHANGEOUT:
+                parts.append(
+                    f"\nSe agrega cambio de componente con fecha: "
+                    f"{pd.Timestamp(self.date[position]).strftime('%Y-%m-%d')}, "
+                    f"equipo: {self.equipo[position]}, serie: {self.serial[position]}"
+                )
+            elif event == NO_SLOT:
+                parts.append("\nNo se pudo agregar componente.")
+            elif event == WEEK_END:
+                parts.append("\n")
+        if arrival_dates:
+            parts.append(f"\nSe agrega llegada componente {self.component} con fecha: {arrival_dates}")
+        return "".join(parts)
@@ -0,0 +1,128 @@
+"""Ingesta incremental de la planilla de seguimiento de entregas.
+
+Cada hoja es una foto semanal que no cambia una vez publicada. El almacén guarda en un archivo Parquet las filas en
+formato largo de cada hoja ya procesada, junto con un hash de su contenido, y en cada carga procesa sólo las hojas
+nuevas o modificadas.
+"""
+
+# Standard library imports
+import hashlib
+import json
+import os
+import xml.etree.ElementTree as ET
+import zipfile
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+# Third-party imports
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Local imports
+from kverse.assets.pool.comp_arrivals import load_arrivals_sheets
+
+# Constants
+
+# Cambiar al modificar read_arrivals_sheet o el formato del almacén, para volver a procesar todas las hojas
+STORE_VERSION = 2
+DEFAULT_STORE_PATH = os.environ.get("KVERSE_ARRIVALS_STORE", ".cache/arrivals/sheets.parquet")
+METADATA_KEY = b"kverse_arrivals_sheets"
+MAIN_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+RELATIONSHIP_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+PACKAGE_RELATIONSHIP_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+
+def shared_strings(archive: zipfile.ZipFile) -> List[str]:
+    if "xl/sharedStrings.xml" not in archive.namelist():
+        return []
+    root = ET.fromstring(archive.read("xl/sharedStrings.xml"))
+    return ["".join(text.text or "" for text in item.iter(f"{MAIN_NS}t")) for item in root.iter(f"{MAIN_NS}si")]
+
+
+def sheet_hashes(blob_data) -> Dict[str, str]:
+    """Hash del contenido de cada hoja, en el orden del libro, sin cargarlo con openpyxl.
+
+    Se usa el XML de la hoja dentro del .xlsx y los textos compartidos que referencia: la tabla de textos compartidos
+    es común a todo el libro y cambia al agregar hojas, por lo que no se usa completa.
+    """
+    with zipfile.ZipFile(blob_data) as archive:
+        workbook = ET.fromstring(archive.read("xl/workbook.xml"))
+        relationships = ET.fromstring(archive.read("xl/_rels/workbook.xml.rels"))
+        targets = {
+            relationship.get("Id"): relationship.get("Target")
+            for relationship in relationships.iter(f"{PACKAGE_RELATIONSHIP_NS}Relationship")
+        }
+        strings = shared_strings(archive)
+        hashes = {}
+        for sheet in workbook.iter(f"{MAIN_NS}sheet"):
+            target = targets[sheet.get(f"{RELATIONSHIP_NS}id")]
+            content = archive.read(target.lstrip("/") if target.startswith("/") else f"xl/{target}")
+            digest = hashlib.sha256(content)
+            for cell in ET.fromstring(content).iter(f"{MAIN_NS}c"):
+                if cell.get("t") == "s":
+                    digest.update(strings[int(cell.find(f"{MAIN_NS}v").text)].encode() + b"\0")
+            hashes[sheet.get("name")] = digest.hexdigest()
+    return hashes
+
+
+class ArrivalsSheetStore:
+    def __init__(self, path: Union[str, Path] = DEFAULT_STORE_PATH):
+        self.path = Path(path)
+
+    def read(self) -> Dict[str, tuple]:
+        # Hoja -> (hash, filas en formato largo) de las hojas guardadas
+        try:
+            table = pq.read_table(self.path)
+            metadata = json.loads(table.schema.metadata[METADATA_KEY])
+        except (OSError, ValueError, KeyError, TypeError):
+            # Sin almacén, o un archivo truncado o ajeno: se vuelven a procesar todas las hojas
+            return {}
+        if metadata["version"] != STORE_VERSION:
+            return {}
+        df = table.to_pandas()
+        for column in df.columns[df.dtypes == object]:
+            df[column] = df[column].where(df[column].notnull(), np.nan)
+        sheets = {sheet: group.drop(columns="sheet") for sheet, group in df.groupby("sheet", sort=False)}
+        return {
+            sheet: (sheet_hash, sheets.get(sheet, df.iloc[:0].drop(columns="sheet")))
+            for sheet, sheet_hash in metadata["sheets"].items()
+        }
+
+    def write(self, hashes: Dict[str, str], frames: List[pd.DataFrame]) -> None:
+        # Se conserva el índice de cada hoja, para que una hoja leída del almacén sea igual a una recién procesada
+        df = pd.concat([frame.assign(sheet=sheet) for sheet, frame in zip(hashes, frames)])
+        table = pa.Table.from_pandas(df, preserve_index=True)
+        metadata = {
+            **(table.schema.metadata or {}),
+            METADATA_KEY: json.dumps({"version": STORE_VERSION, "sheets": hashes}),
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Se escribe a un archivo temporal propio del proceso y se reemplaza, para no dejar un almacén a medio escribir
+        # ni mezclar dos escrituras simultáneas
+        tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        pq.write_table(table.replace_schema_metadata(metadata), tmp)
+        os.replace(tmp, self.path)
+
+    def load(self, blob_data, parallel: bool = False, max_workers: Optional[int] = None) -> List[pd.DataFrame]:
+        # Hojas en formato largo en el orden del libro, procesando sólo las nuevas o modificadas
+        if isinstance(blob_data, BytesIO):
+            blob_data = blob_data.getvalue()
+        hashes = sheet_hashes(BytesIO(blob_data) if isinstance(blob_data, bytes) else blob_data)
+        stored = self.read()
+        frames = {
+            sheet: stored[sheet][1]
+            for sheet, sheet_hash in hashes.items()
+            if stored.get(sheet, (None,))[0] == sheet_hash
+        }
+
+        pending = [sheet for sheet in hashes if sheet not in frames]
+        if pending:
+            frames.update(zip(pending, load_arrivals_sheets(blob_data, pending, parallel, max_workers)))
+        frames = [frames[sheet] for sheet in hashes]
+        # Las hojas eliminadas del libro también se eliminan del almacén
+        if pending or set(stored) != set(hashes):
+            self.write(hashes, frames)
+        return frames
@@ -6,11 +6,26 @@ from pathlib import Path
 import os
 from io import BytesIO, StringIO
 from azure.storage.blob import BlobServiceClient
-from kverse.assets.pool.utils import extract_info, idx_to_pool_slot, get_weeks_and_comments, get_end_week
+from kverse.assets.pool.utils import (
+    extract_info,
+    idx_to_pool_slot,
+    get_weeks_and_comments,
+    get_end_week,
+    clean_string,
+    grid_changeouts,
+    grid_end_weeks,
+    repair_fill_types,
+    scan_pool_sheet,
+    sheet_comments,
+)
+import argparse
+import zipfile
 import numpy as np
 
+BASE_POOL_PROJ_PATH = "DATA/PLAN/pool_proj.csv"
 
-def read_base_pool_proj():
+
+def read_base_pool_proj(blob_data=BASE_POOL_PROJ_PATH, encoding=None):
     # if os.environ.get("USERNAME") in ["cecilvega", "U1309565", "andmn"]:
     #     blob_data = "DATA/pool_proj.csv"
     # else:
@@ -21,8 +36,7 @@ def read_base_pool_proj():
     # )
     # blob_data = blob_client.download_blob().readall()
     # blob_data = StringIO(blob_data.decode("latin-1"))
-    blob_data = "DATA/PLAN/pool_proj.csv"
-    df = pd.read_csv(blob_data)
+    df = pd.read_csv(blob_data, encoding=encoding)
     df = df.assign(
         equipo=df["equipo"].astype(str),
     )
@@ -31,3 +45,103 @@ def read_base_pool_proj():
     )
 
     return df
+
+
+def week_monday(week):
+    # Encabezado de semana de la planilla del pool (fecha o "2024-W05") al lunes de esa semana
+    if isinstance(week, str):
+        return datetime.strptime(week.strip() + "-1", "%Y-W%W-%w")
+    return pd.Timestamp(week).to_pydatetime()
+
+
+def pool_sheet_component(sheet_name):
+    # Nombre de la hoja al código del componente, con la misma limpieza que read_cc
+    component = clean_string(sheet_name)
+    return {"conjunto_masa_suspension_delantera": "suspension_delantera", "blower": "blower_parrilla"}.get(
+        component, component
+    )
+
+
+def read_pool_sheet(ws, comments):
+    """Cambios de cada slot de una hoja de la planilla del pool, con el formato de pool_proj.csv.
+
+    Cada celda con 1 es un cambio y su comentario indica equipo y NS. La reparación se marca con el relleno de las
+    celdas siguientes: el cambio llega en la semana en que termina el relleno que sigue al cambio (get_end_week). Los
+    cambios aún en reparación toman el tipo del relleno de la celda siguiente.
+    """
+    grid = scan_pool_sheet(ws, comments)
+    changeouts = grid_changeouts(grid).sort_values(["row", "column"])
+    ends = grid_end_weeks(grid).sort_values(["column", "row"])
+    if changeouts.empty:
+        return pd.DataFrame()
+
+    # Cada cambio llega con el primer término de reparación posterior y anterior al siguiente cambio del slot
+    changeouts["next_column"] = changeouts.groupby("row")["column"].shift(-1)
+    df = pd.merge_asof(
+        changeouts.sort_values("column"),
+        ends.rename(columns={"column": "end_column", "week": "end_week"}),
+        left_on="column",
+        right_on="end_column",
+        by="row",
+        direction="forward",
+    ).sort_values(["row", "column"])
+    arrived = df["end_column"].notnull() & ~(df["end_column"] >= df["next_column"])
+    # Un cambio aún en reparación no tiene término, pero su tipo se ve en el relleno de la celda siguiente
+    following = df["column"].to_numpy() + 1
+    has_following = following < grid.fills.shape[1]
+    in_repair_types = np.full(df.shape[0], None, dtype=object)
+    in_repair_types[has_following] = repair_fill_types(
+        grid.fills[df["row"].to_numpy()[has_following], following[has_following]]
+    )
+
+    changeout_dates = pd.to_datetime(df["week"].map(week_monday))
+    arrival_dates = pd.to_datetime(df["end_week"].where(arrived).map(week_monday, na_action="ignore"))
+    comments = df["comment"].astype(str)
+    return pd.DataFrame(
+        {
+            "equipo": comments.str.extract(r"Equipo:\s*(\d+)", expand=False),
+            "component": pool_sheet_component(ws.title),
+            "component_serial": comments.str.extract(r"NS:\s*(#+\w*-?\w*)", expand=False).str.replace(
+                r"^#+", "#", regex=True
+            ),
+            "changeout_week": changeout_dates.dt.year.astype(str)
+            + "-W"
+            + changeout_dates.dt.isocalendar()["week"].astype(int).astype(str),
+            "pool_changeout_type": df["pool_changeout_type"].where(arrived, pd.Series(in_repair_types, index=df.index)),
+            "changeout_date": changeout_dates.dt.strftime("%Y-%m-%d"),
+            "pool_slot": grid.labels[df["row"].to_numpy()].astype(str),
+            "arrival_week": arrival_dates.dt.strftime("%Y-W%W"),
+        }
+    ).assign(pool_slot=lambda x: x["pool_slot"].str.strip("N°").astype(int))
+
+
+def read_pool_workbook(blob_data):
+    # Regenera pool_proj.csv desde la planilla del pool, recorriendo cada hoja una sola vez
+    if isinstance(blob_data, bytes):
+        blob_data = BytesIO(blob_data)
+    with zipfile.ZipFile(blob_data) as archive:
+        comments = sheet_comments(archive)
+    if hasattr(blob_data, "seek"):
+        blob_data.seek(0)
+    wb = openpyxl.load_workbook(blob_data, read_only=True, data_only=True)
+    try:
+        frames = [read_pool_sheet(ws, comments.get(ws.title, {})) for ws in wb.worksheets]
+    finally:
+        wb.close()
+    return pd.concat(frames, ignore_index=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Regenera pool_proj.csv desde la planilla del pool")
+    parser.add_argument("workbook")
+    parser.add_argument("--output", default=BASE_POOL_PROJ_PATH)
+    args = parser.parse_args(argv)
+
+    df = read_pool_workbook(args.workbook)
+    df.to_csv(args.output, index=False)
+    print(f"{df.shape[0]} filas en {args.output}")
+    return df
+
+
+if __name__ == "__main__":
+    main()
@@ -9,8 +9,10 @@ import re
 from datetime import datetime, timedelta
 import openpyxl
 
+BLOCKED_LANES_PATH = "DATA/PLAN/COMPONENTES EN ESPERA APROBACION.xlsx"
 
-def read_blocked_lanes():
+
+def read_blocked_lanes(blob_data=BLOCKED_LANES_PATH):
 
     # blob_service_client = BlobServiceClient.from_connection_string(os.environ["AZURE_CONN_STR"])
     #
@@ -20,7 +22,6 @@ def read_blocked_lanes():
     # )
     # blob_data = blob_client.download_blob()
     # blob_data = BytesIO(blob_data.readall())
-    blob_data = "DATA/PLAN/COMPONENTES EN ESPERA APROBACION.xlsx"
     df = (
         pd.read_excel(blob_data)
         .rename(
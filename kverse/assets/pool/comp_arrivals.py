@@ -1,13 +1,12 @@
 import os
+from concurrent.futures import ProcessPoolExecutor
 from io import BytesIO
 
+import numpy as np
 import pandas as pd
-from azure.storage.blob import BlobServiceClient
-from kverse.assets.master_components import master_components
-import unicodedata
 import re
 from datetime import datetime, timedelta
-import openpyxl
+from kverse.assets.pool.utils import process_context
 
 
 def rename_datetime_columns(df):
@@ -29,7 +28,9 @@ def rename_datetime_columns(df):
 
 def reshape_to_long_format(df):
     # Identify date columns
-    date_columns = [col for col in df.columns if pd.to_datetime(col, errors="coerce") is not pd.NaT]
+    date_columns = df.columns[
+        pd.to_datetime(pd.Series(df.columns, dtype=object), format="%Y-%m-%d", errors="coerce").notna().to_numpy()
+    ].to_list()
 
     # Identify non-date columns
     id_vars = [col for col in df.columns if col not in date_columns]
@@ -43,7 +44,7 @@ def reshape_to_long_format(df):
     )
 
     # Convert arrival_date to datetime
-    df_long["arrival_week"] = df_long["arrival_week"].apply(convert_to_iso_week)
+    df_long["arrival_week"] = convert_to_iso_week(df_long["arrival_week"])
 
     # Sort the DataFrame
     df_long = df_long.sort_values(by=["Componente", "arrival_week"])
@@ -51,38 +52,32 @@ def reshape_to_long_format(df):
     return df_long
 
 
-def convert_to_iso_week(date_str):
-    date = pd.to_datetime(date_str)
-    if date.weekday() != 0:
-        raise ValueError(f"Date {date_str} is not a Monday")
-    return date.strftime("%Y-W%V")
+def convert_to_iso_week(dates):
+    # Semana ISO de cada fecha, convirtiendo una sola vez cada fecha distinta
+    codes, uniques = pd.factorize(dates)
+    weeks = pd.to_datetime(pd.Series(uniques, dtype=object))
+    not_monday = weeks.dt.weekday != 0
+    if not_monday.any():
+        raise ValueError(f"Date {uniques[not_monday.to_numpy().argmax()]} is not a Monday")
+    return pd.Series(weeks.dt.strftime("%Y-W%V").to_numpy(dtype=object)[codes], index=dates.index, dtype=object)
 
 
-def extract_date_and_type(value):
-    if pd.isna(value):
-        return pd.NaT, "PROYECTADO"
-
-    value_str = str(value)
-    date_match = re.search(r"\d{2}[-]\d{2}[-]\d{4}", value_str)
-
-    if date_match:
-        date_str = date_match.group()
-        try:
-            arrival_date = pd.to_datetime(date_str, format="%d-%m-%Y")
-            # arrival_date = date.strftime("%d-%m-%Y")
-        except:
-            arrival_date = pd.NaT
-    else:
-        arrival_date = pd.NaT
-
-    if "REAL" in value_str.upper():
-        arrival_type = "REAL"
-    elif "REPROGRAMADO" in value_str.upper():
-        arrival_type = "REPROGRAMADO"
-    else:
-        arrival_type = "PROYECTADO"
+def extract_date_and_type(values):
+    # Fecha dd-mm-yyyy y tipo de entrega de cada celda con valor
+    values = values.astype(str)
+    arrival_date = pd.to_datetime(
+        values.str.extract(r"(\d{2}-\d{2}-\d{4})", expand=False), format="%d-%m-%Y", errors="coerce"
+    )
 
-    return arrival_date, arrival_type
+    upper = values.str.upper()
+    arrival_type = np.select(
+        [upper.str.contains("REAL", regex=False), upper.str.contains("REPROGRAMADO", regex=False)],
+        ["REAL", "REPROGRAMADO"],
+        "PROYECTADO",
+    )
+    return pd.DataFrame(
+        {"arrival_date": arrival_date, "arrival_type": pd.Series(arrival_type, index=values.index, dtype=object)}
+    )
 
 
 def get_previous_week(week_range, year=2024):
@@ -118,7 +113,79 @@ def format_datetime(value):
         return value
 
 
-def read_component_arrivals():
+def format_datetime_frame(df):
+    # format_datetime sobre todas las celdas, evaluando una sola vez cada valor distinto
+    codes, uniques = pd.factorize(df.to_numpy(dtype=object).ravel())
+    uniques = pd.Series(uniques, dtype=object)
+    # Las celdas de fecha llegan como texto "yyyy-mm-dd hh:mm:ss" y se convierten en conjunto, el resto una por una
+    dates = pd.to_datetime(uniques.where(uniques.map(type) == str), format="%Y-%m-%d %H:%M:%S", errors="coerce")
+    formatted = dates.dt.strftime("%d-%m-%Y").copy()
+    formatted[dates.isna()] = uniques[dates.isna()].map(format_datetime)
+    values = np.append(formatted.to_numpy(dtype=object), np.nan)[codes]
+    return pd.DataFrame(values.reshape(df.shape), index=df.index, columns=df.columns)
+
+
+COMPONENT_ARRIVALS_PATH = "DATA/PLAN/Planilla de seguimiento de cumplimiento de entrega componentes 2024.xlsx"
+
+
+def read_arrivals_sheet(xls, sheet):
+    # Una hoja de la planilla (semana de proyección) en formato largo
+    df = xls.parse(sheet, skiprows=1, dtype="str")
+    # Apply the formatting function to every cell in the DataFrame
+    df = format_datetime_frame(df)
+
+    # Assume df is your DataFrame
+    df = rename_datetime_columns(df)
+    df = df[["Componente", "N°"] + [col for col in df.columns if re.match(r"^\d{4}-\d{2}-\d{2}$", col)]]
+    # Rellenar los componentes hacia adelante para cubrir el número 1 y 2.
+    # Por defecto la primera fila sólo debiese tener las semanas y el ffill no cambiará el hecho de que sea nula y se pueda sacar
+    df = df.assign(
+        Componente=df["Componente"].ffill(),
+        arrival_projection_week=get_previous_week(sheet),
+    )
+    df = df.dropna(subset=["Componente", "N°"])
+
+    df = df.pipe(reshape_to_long_format).dropna(subset=["value"])
+    df[["arrival_date", "arrival_type"]] = extract_date_and_type(df["value"])
+    # Add an overall assertion check
+
+    assert (
+        df[df["value"].notna()]["arrival_date"].notna().all() and df[df["value"].notna()]["arrival_type"].notna().all()
+    ), f"Some non-null values resulted in null arrival_date or arrival_type {df.loc[(df['value'].notna()) & (df['arrival_date'].isnull())]}"
+    return df
+
+
+def read_arrivals_sheets(blob_data, sheets=None):
+    # El libro se abre una sola vez (openpyxl en modo sólo lectura) y cada hoja se recorre fila a fila desde él
+    if isinstance(blob_data, bytes):
+        blob_data = BytesIO(blob_data)
+    with pd.ExcelFile(blob_data, engine="openpyxl") as xls:
+        return [read_arrivals_sheet(xls, sheet) for sheet in (xls.sheet_names if sheets is None else sheets)]
+
+
+def load_arrivals_sheets(blob_data, sheets=None, parallel=False, max_workers=None):
+    # Hojas en formato largo, en el orden de sheets (por defecto todas las del libro)
+    if not parallel:
+        return read_arrivals_sheets(blob_data, sheets)
+
+    # Cada proceso abre su propia copia del libro y procesa una de cada n_workers hojas
+    if isinstance(blob_data, BytesIO):
+        blob_data = blob_data.getvalue()
+    if sheets is None:
+        with pd.ExcelFile(BytesIO(blob_data) if isinstance(blob_data, bytes) else blob_data, engine="openpyxl") as xls:
+            sheets = xls.sheet_names
+    n_workers = max(min(max_workers or os.cpu_count() or 1, len(sheets)), 1)
+    chunks = [sheets[i::n_workers] for i in range(n_workers)]
+    with ProcessPoolExecutor(max_workers=n_workers, mp_context=process_context()) as executor:
+        chunk_frames = list(executor.map(read_arrivals_sheets, [blob_data] * n_workers, chunks))
+    # Se restituye el orden de las hojas
+    frames = [None] * len(sheets)
+    for i, chunk in enumerate(chunk_frames):
+        frames[i::n_workers] = chunk
+    return frames
+
+
+def read_component_arrivals(blob_data=COMPONENT_ARRIVALS_PATH, parallel=False, max_workers=None, store=None):
 
     # blob_service_client = BlobServiceClient.from_connection_string(os.environ["AZURE_CONN_STR"])
     #
@@ -128,36 +195,11 @@ def read_component_arrivals():
     # )
     # blob_data = blob_client.download_blob()
     # blob_data = BytesIO(blob_data.readall())
-    blob_data = "DATA/PLAN/Planilla de seguimiento de cumplimiento de entrega componentes 2024.xlsx"
-    workbook = openpyxl.load_workbook(blob_data)
-    frames = []
-
-    for sheet in workbook.sheetnames:
-        # print(sheet)
-        df = pd.read_excel(blob_data, sheet_name=sheet, skiprows=1, engine="openpyxl", dtype="str")
-        # Apply the formatting function to every cell in the DataFrame
-        df = df.applymap(format_datetime)
-
-        # Assume df is your DataFrame
-        df = rename_datetime_columns(df)
-        df = df[["Componente", "N°"] + [col for col in df.columns if re.match(r"^\d{4}-\d{2}-\d{2}$", col)]]
-        # Rellenar los componentes hacia adelante para cubrir el número 1 y 2.
-        # Por defecto la primera fila sólo debiese tener las semanas y el ffill no cambiará el hecho de que sea nula y se pueda sacar
-        df = df.assign(
-            Componente=df["Componente"].ffill(),
-            arrival_projection_week=get_previous_week(sheet),
-        )
-        df = df.dropna(subset=["Componente", "N°"])
-
-        df = df.pipe(reshape_to_long_format).dropna(subset=["value"])
-        df[["arrival_date", "arrival_type"]] = df["value"].apply(lambda x: pd.Series(extract_date_and_type(x)))
-        # Add an overall assertion check
-
-        assert (
-            df[df["value"].notna()]["arrival_date"].notna().all()
-            and df[df["value"].notna()]["arrival_type"].notna().all()
-        ), f"Some non-null values resulted in null arrival_date or arrival_type {df.loc[(df['value'].notna()) & (df['arrival_date'].isnull())]}"
-        frames.append(df)
+    if store is not None:
+        # Con un ArrivalsSheetStore sólo se procesan las hojas nuevas o modificadas
+        frames = store.load(blob_data, parallel=parallel, max_workers=max_workers)
+    else:
+        frames = load_arrivals_sheets(blob_data, parallel=parallel, max_workers=max_workers)
 
     # return frames
     df = pd.concat(frames)
@@ -191,34 +233,3 @@ def read_component_arrivals():
     df["arrival_week"] = df["arrival_week"].dt.strftime("%Y-W%W")
 
     return df
-
-
-def read_component_arrivals_old():
-    if os.environ.get("USERNAME") in ["cecilvega", "U1309565", "andmn"]:
-        blob_data = "DATA/ENTREGAS_CONFIRMADAS_COMPONENTES.xlsx"
-    else:
-        blob_service_client = BlobServiceClient.from_connection_string(os.environ["AZURE_CONN_STR"])
-
-        blob_client = blob_service_client.get_blob_client(
-            container="kdata-raw",
-            blob=f"PLANIFICACION/POOL/ENTREGAS_CONFIRMADAS_COMPONENTES.xlsx",
-        )
-        blob_data = blob_client.download_blob()
-        blob_data = BytesIO(blob_data.readall())
-
-    df = pd.read_excel(blob_data)
-
-    df = (
-        df.rename(
-            columns={
-                "COMPONENTE": "component",
-                # "MODELO": "model",
-                "SEMANA_LLEGADA": "arrival_week",
-                "FECHA_LLEGADA_REAL": "arrival_date",
-            }
-        )
-        .dropna()
-        .reset_index(drop=True)
-    )
-
-    return df
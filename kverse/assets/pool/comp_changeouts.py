@@ -4,31 +4,16 @@ from io import BytesIO
 import pandas as pd
 from azure.storage.blob import BlobServiceClient
 from kverse.assets.master_components import master_components
-import unicodedata
-import re
+from kverse.assets.pool.utils import clean_strings
 import openpyxl
 
 openpyxl.reader.excel.warnings.simplefilter(action="ignore")
 
 
-def clean_string(s):
-    # Remove accents
-    s = str(s)
-    if s is not None:
+CC_PATH = "DATA/PLAN/PLANILLA DE CONTROL CAMBIO DE COMPONENTES.xlsx"
 
-        s = s.lower()
-        s = "".join(c for c in unicodedata.normalize("NFD", s) if unicodedata.category(c) != "Mn")
 
-        # Replace whitespaces with underscore
-        s = re.sub(r"\s+", "_", s)
-
-        # Remove all non-alphanumeric characters except underscore
-        s = re.sub(r"[^\w]+", "", s)
-        s = {"cms": "conjunto_masa_suspension_delantera"}.get(s, s)
-    return s
-
-
-def read_cc():
+def read_cc(blob_data=CC_PATH):
 
     # blob_service_client = BlobServiceClient.from_connection_string(os.environ["AZURE_CONN_STR"])
     #
@@ -38,7 +23,6 @@ def read_cc():
     # )
     # blob_data = blob_client.download_blob()
     # blob_data = BytesIO(blob_data.readall())
-    blob_data = "DATA/PLAN/PLANILLA DE CONTROL CAMBIO DE COMPONENTES.xlsx"
     df = pd.read_excel(blob_data, usecols="A:AG").dropna(subset=["FECHA DE CAMBIO"])
     columns_map = {
         "EQUIPO": "equipo",
@@ -65,7 +49,7 @@ def read_cc():
 
     clean_columns = ["component", "subcomponent"]
 
-    df[clean_columns] = df[clean_columns].apply(lambda x: x.apply(clean_string))
+    df[clean_columns] = df[clean_columns].apply(clean_strings)
 
     df = df.assign(
         component=df["component"].map(
@@ -1,6 +1,10 @@
 # Standard library imports
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from enum import Enum
+from types import ModuleType
 from typing import Dict, List, Optional
 
 # Third-party imports
@@ -8,9 +12,18 @@ import pandas as pd
 import numpy as np
 from dataclasses import dataclass
 
+from kverse.assets.pool.allocation_engine import allocate_component
+from kverse.assets.pool.allocation_log import AllocationLog
+from kverse.assets.pool.instrumentation import AllocationProfiler, profiled
+from kverse.assets.pool.utils import process_context
+
 # Constants
 
 CHANGEOUT_START_DATE = pd.Timestamp(year=2024, month=7, day=29)
+# Bajo esta cantidad de cambios la asignación en serie toma menos que levantar el pool de procesos (~3 s). La flota
+# actual no llega a este volumen y el dyno tiene una sola CPU, por lo que la aplicación no usa parallel=True: la
+# asignación en paralelo queda disponible para flotas mayores o para correr fuera del dyno
+MIN_PARALLEL_CHANGEOUTS = 10_000
 
 
 @dataclass(frozen=True)
@@ -54,12 +67,55 @@ def find_available_pool_slot(component_df: pd.DataFrame, changeout: pd.Series) -
     return df
 
 
-def get_ovh_days(row: pd.Series) -> int:
-    component = next(c for c in ComponentType if c.value.code == row["component"])
-    if component == ComponentType.MP:
-        if row["subcomponent"] in ["alternador_principal", "radiador"]:
-            return 64 if row["pool_changeout_type"] == "P" else 114
-    return component.value.planned_ovh_days if row["pool_changeout_type"] == "P" else component.value.unplanned_ovh_days
+# Componentes cuyo tiempo de reparación depende del subcomponente: (componente, subcomponente) -> (planificado, imprevisto)
+OVH_DAYS_OVERRIDES = {
+    (ComponentType.MP.value.code, "alternador_principal"): (64, 114),
+    (ComponentType.MP.value.code, "radiador"): (64, 114),
+}
+
+
+def build_ovh_days_table() -> pd.Series:
+    # Tabla (componente, subcomponente, es planificado) -> días de reparación. El subcomponente "" es el valor general.
+    entries = {}
+    for component in ComponentType:
+        entries[(component.value.code, "", True)] = component.value.planned_ovh_days
+        entries[(component.value.code, "", False)] = component.value.unplanned_ovh_days
+    for (code, subcomponent), (planned_days, unplanned_days) in OVH_DAYS_OVERRIDES.items():
+        entries[(code, subcomponent, True)] = planned_days
+        entries[(code, subcomponent, False)] = unplanned_days
+    return pd.Series(entries, dtype="int64").rename_axis(["component", "subcomponent", "planned"])
+
+
+OVH_DAYS_TABLE = build_ovh_days_table()
+
+
+def get_ovh_days(df: pd.DataFrame) -> pd.Series:
+    required_columns = {"component", "subcomponent", "pool_changeout_type"}
+    if not required_columns.issubset(df.columns):
+        raise ValueError(f"Missing required columns: {required_columns}")
+
+    overrides = pd.MultiIndex.from_tuples(list(OVH_DAYS_OVERRIDES))
+    has_override = pd.MultiIndex.from_arrays([df["component"], df["subcomponent"]]).isin(overrides)
+    keys = pd.MultiIndex.from_arrays(
+        [
+            df["component"].to_numpy(),
+            np.where(has_override, df["subcomponent"].to_numpy(dtype=object), ""),
+            (df["pool_changeout_type"] == "P").to_numpy(),
+        ]
+    )
+    ovh_days = OVH_DAYS_TABLE.reindex(keys)
+    if ovh_days.isnull().any():
+        unknown = sorted(set(df.loc[ovh_days.isnull().to_numpy(), "component"].astype(str)))
+        raise ValueError(f"Unknown components: {unknown}")
+    return pd.Series(ovh_days.to_numpy(dtype="int64"), index=df.index, name="ovh_days")
+
+
+def iso_week(dates: pd.Series) -> pd.Series:
+    # Equivalente a dates.dt.strftime("%G-W%V"), formateando una sola vez cada semana distinta
+    iso = dates.dt.isocalendar()
+    codes, uniques = pd.factorize(iso["year"].astype("float64") * 100 + iso["week"].astype("float64"))
+    labels = np.array([f"{int(value) // 100}-W{int(value) % 100:02d}" for value in uniques] + [np.nan], dtype=object)
+    return pd.Series(labels[codes], index=dates.index, dtype=object)
 
 
 def add_arrival_date_proj(df: pd.DataFrame) -> pd.DataFrame:
@@ -69,11 +125,36 @@ def add_arrival_date_proj(df: pd.DataFrame) -> pd.DataFrame:
         raise ValueError(f"Missing required columns: {required_columns}")
 
     df = df.copy()
-    df["ovh_days"] = df.apply(get_ovh_days, axis=1)
-    df["arrival_date_proj"] = df["changeout_date"] + pd.to_timedelta(df["ovh_days"], unit="D")
-    df["arrival_week_proj"] = df["arrival_date_proj"].dt.strftime("%G-W%V")
+    df["arrival_date_proj"] = df["changeout_date"] + pd.to_timedelta(get_ovh_days(df), unit="D")
+    df["arrival_week_proj"] = iso_week(df["arrival_date_proj"])
+
+    return df
+
 
-    return df.drop(columns=["ovh_days"])
+# Prioridad de los subcomponentes dentro de un mismo cambio: se asigna la del primer texto contenido en el subcomponente
+SUBCOMPONENT_PRIORITIES = {
+    ComponentType.MT.value.code: ["MOTOR TRACCIÓN"],
+    ComponentType.CMS.value.code: ["Suspension Delantera"],
+    ComponentType.MP.value.code: ["MOTOR", "Alternador Principal", "Radiador"],
+}
+DEFAULT_SUBCOMPONENT_PRIORITY = 999
+
+
+def get_subcomponent_priority(df: pd.DataFrame) -> pd.Series:
+    priority = np.full(df.shape[0], DEFAULT_SUBCOMPONENT_PRIORITY, dtype="int64")
+    components = df["component"].to_numpy()
+    for component, subcomponents in SUBCOMPONENT_PRIORITIES.items():
+        mask = components == component
+        if not mask.any():
+            continue
+        subcomponent = df.loc[mask, "subcomponent"]
+        if subcomponent.isnull().any():
+            raise TypeError(f"Missing subcomponent for component {component}")
+        subcomponent = subcomponent.astype(str)
+        conditions = [subcomponent.str.contains(text, regex=False).to_numpy() for text in subcomponents]
+        choices = list(range(1, len(subcomponents) + 1))
+        priority[mask] = np.select(conditions, choices, default=DEFAULT_SUBCOMPONENT_PRIORITY)
+    return pd.Series(priority, index=df.index, name="subcomponent_priority")
 
 
 def priority_sort(df: pd.DataFrame) -> pd.DataFrame:
@@ -82,26 +163,8 @@ def priority_sort(df: pd.DataFrame) -> pd.DataFrame:
     if not required_columns.issubset(df.columns):
         raise ValueError(f"Missing required columns: {required_columns}")
 
-    priority_map = {
-        ComponentType.MT.value.code: {"MOTOR TRACCIÓN": 1},
-        ComponentType.CMS.value.code: {"Suspension Delantera": 1},
-        ComponentType.MP.value.code: {"MOTOR": 1, "Alternador Principal": 2, "Radiador": 3},
-    }
-    default_priority = 999
-
-    def get_priority(row: pd.Series) -> int:
-        component_priorities = priority_map.get(row["component"], {})
-        return next(
-            (
-                priority
-                for subcomponent, priority in component_priorities.items()
-                if subcomponent in row["subcomponent"]
-            ),
-            default_priority,
-        )
-
     df = df.copy()
-    df["subcomponent_priority"] = df.apply(get_priority, axis=1)
+    df["subcomponent_priority"] = get_subcomponent_priority(df)
     return (
         df.sort_values(["equipo", "changeout_date", "component", "position", "subcomponent_priority"])
         .reset_index(drop=True)
@@ -110,27 +173,61 @@ def priority_sort(df: pd.DataFrame) -> pd.DataFrame:
 
 
 class ComponentAllocation:
+    ENGINES = ("events", "frame")
+    BACKENDS = ("pandas", "polars")
+
     def __init__(
-        self, cc_df: pd.DataFrame, pool_proj_df: pd.DataFrame, arrivals_df: pd.DataFrame, blocked_lanes: pd.DataFrame
+        self,
+        cc_df: pd.DataFrame,
+        pool_proj_df: pd.DataFrame,
+        arrivals_df: pd.DataFrame,
+        blocked_lanes: pd.DataFrame,
+        engine: str = "events",
+        parallel: bool = False,
+        max_workers: Optional[int] = None,
+        checkpoints: bool = False,
+        log_events: bool = True,
+        profile: bool = False,
+        backend: str = "pandas",
     ):
+        self.profiler = AllocationProfiler(enabled=profile)
+        if engine not in self.ENGINES:
+            raise ValueError(f"Unknown allocation engine: {engine}, expected one of {self.ENGINES}")
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown backend: {backend}, expected one of {self.BACKENDS}")
+        # Con "polars" la preparación y la proyección se ejecutan en polars_backend; la asignación no cambia
+        self.backend = backend
+        if (parallel or checkpoints) and engine != "events":
+            raise ValueError("Parallel and incremental allocation are only supported by the events engine")
+        self.engine = engine
+        self.parallel = parallel
+        self.max_workers = max_workers
+        self.checkpoints = checkpoints
+        self.log_events = log_events
+        self.engines = {}
+        self._previous_engines = {}
         self.blocked_lanes = blocked_lanes
         self.cc_df = self._preprocess_cc_df(cc_df)
         self.pool_proj_df = self._preprocess_pool_proj_df(pool_proj_df)
         self.arrivals_df = self._preprocess_arrivals_df(arrivals_df)
+        self.arrival_positions = self._index_arrivals()
         self.missing_cc_df = self.get_missing_changeouts()
         self.pool_slots_df = self.get_base_pool_slots()
         self.allocated_df = pd.DataFrame
         self.allocations_log = {}
 
+    @profiled("preprocess_cc_df")
     def _preprocess_cc_df(self, cc_df: pd.DataFrame) -> pd.DataFrame:
-        cc_df = priority_sort(cc_df)
+        cc_df = self._backend_module().priority_sort(cc_df)
         return cc_df.drop_duplicates(subset=["equipo", "component", "position", "changeout_date"])[
             cc_df["component"].isin(ComponentType.get_all_codes())
         ].reset_index(drop=True)
 
+    @profiled("preprocess_pool_proj_df")
     def _preprocess_pool_proj_df(self, pool_proj_df: pd.DataFrame) -> pd.DataFrame:
         return pool_proj_df[pool_proj_df["component"].isin(ComponentType.get_all_codes())].reset_index(drop=True)
 
+    @profiled("preprocess_arrivals_df")
     def _preprocess_arrivals_df(self, arrivals_df: pd.DataFrame) -> pd.DataFrame:
         df = arrivals_df.copy()
 
@@ -187,28 +284,175 @@ class ComponentAllocation:
 
         # self.component_arrival_df = component_arrival_df
 
-        for _, row in component_arrival_df.iterrows():
-            mask = (component_df["changeout_date"] == row["changeout_date"]) & (
-                component_df["component"] == row["component"]
-            )
-            component_df.loc[mask, "arrival_date"] = row["arrival_date"]
+        # Confirmar de una vez los cambios asociados; si dos llegadas apuntan al mismo cambio prevalece la última
+        confirmed = component_arrival_df.dropna(subset=["changeout_date"]).drop_duplicates(
+            subset=["component", "changeout_date"], keep="last"
+        )
+        if not confirmed.empty:
+            arrival_dates = confirmed.set_index(["component", "changeout_date"])["arrival_date"]
+            keys = pd.MultiIndex.from_frame(component_df[["component", "changeout_date"]])
+            mask = keys.isin(arrival_dates.index)
+            component_df.loc[mask, "arrival_date"] = arrival_dates.reindex(keys[mask]).to_numpy()
             component_df.loc[mask, "arrival_status"] = "confirmed"
-            self.arrivals_df.loc[
-                (self.arrivals_df["arrival_date"] == row["arrival_date"])
-                & (self.arrivals_df["component"] == row["component"]),
-                "pool_slot",
-            ] = row["pool_slot"]
+
+        self._assign_arrival_slots(
+            {
+                (component, arrival_date): pool_slot
+                for component, arrival_date, pool_slot in zip(
+                    component_arrival_df["component"],
+                    component_arrival_df["arrival_date"],
+                    component_arrival_df["pool_slot"],
+                )
+            }
+        )
 
         return component_df
 
+    @profiled("allocate_components")
     def allocate_components(self) -> pd.DataFrame:
+        if self.engine == "events":
+            return self._allocate_components_events()
+        return self._allocate_components_frame()
+
+    def _partition_components(self) -> List[tuple]:
+        # Los componentes no comparten estado: cada uno recibe su porción de slots, cambios y llegadas
+        partitions = []
+        for component in self.missing_cc_df["component"].unique():
+            partitions.append(
+                (
+                    component,
+                    self.pool_slots_df.loc[self.pool_slots_df["component"] == component],
+                    self._backend_module().add_arrival_date_proj(
+                        self.missing_cc_df.loc[self.missing_cc_df["component"] == component]
+                    ),
+                    self.arrivals_df.loc[self.arrivals_df["component"] == component],
+                    self._previous_engines.get(component),
+                    self.checkpoints,
+                    self.log_events,
+                )
+            )
+        return partitions
+
+    def _allocate_components_events(self) -> pd.DataFrame:
+        # Mismo resultado que _allocate_components_frame, pero cada componente se procesa como un flujo de eventos
+        partitions = self._partition_components()
+        if self._use_processes(partitions):
+            # Sin fork: la página corre dentro del servidor de Streamlit, que tiene hilos
+            with ProcessPoolExecutor(max_workers=self.max_workers, mp_context=process_context()) as executor:
+                # map conserva el orden de entrada, por lo que el resultado es determinista
+                results = list(executor.map(allocate_component, *zip(*partitions)))
+        else:
+            results = [allocate_component(*partition) for partition in partitions]
+
+        frames = []
+        has_allocated_column = "allocated" in self.missing_cc_df.columns
+        allocated_labels = []
+        arrival_slots = {}
+        for result in results:
+            self.allocations_log[result.component] = result.log
+            if result.engine is not None:
+                self.engines[result.component] = result.engine
+            component_df = result.component_df
+            # Las filas tomadas de missing_cc_df después de la primera asignación traen la columna "allocated" vacía
+            n_allocated = len(result.allocated_labels)
+            if (has_allocated_column and n_allocated > 0) or result.allocation_weeks > 1:
+                component_df = component_df.assign(allocated=np.nan)
+            has_allocated_column = has_allocated_column or n_allocated > 0
+
+            allocated_labels += result.allocated_labels
+            self.profiler.count("processed_weeks", result.processed_weeks)
+            self.profiler.count("slot_searches", result.slot_searches)
+            arrival_slots.update({(result.component, date): slot for date, slot in result.arrival_slots.items()})
+            frames.append(component_df)
+
+        self._mark_allocated(allocated_labels)
+        self._assign_arrival_slots(arrival_slots)
+        df = pd.concat(frames)
+        self.profiler.count("frame_concats", len(frames) + 1)
+        return df
+
+    def _use_processes(self, partitions: List[tuple]) -> bool:
+        # Con una sola CPU o pocos cambios los procesos sólo suman el costo de crearlos
+        return (
+            self.parallel
+            and len(partitions) > 1
+            and (os.cpu_count() or 1) > 1
+            and sum(partition[2].shape[0] for partition in partitions) >= MIN_PARALLEL_CHANGEOUTS
+        )
+
+    def _backend_module(self) -> ModuleType:
+        # Funciones de preparación y proyección del backend elegido, con la misma firma en ambos módulos
+        if self.backend == "polars":
+            # Importación diferida: polars_backend depende de este módulo
+            from kverse.assets.pool import polars_backend
+
+            return polars_backend
+        return sys.modules[__name__]
+
+    def update(
+        self,
+        cc_df: pd.DataFrame,
+        pool_proj_df: pd.DataFrame,
+        arrivals_df: pd.DataFrame,
+        blocked_lanes: pd.DataFrame,
+        profile: Optional[bool] = None,
+    ) -> "ComponentAllocation":
+        # Nueva proyección que retoma cada componente desde la primera semana afectada por los datos nuevos; sin profile
+        # se mantiene el de esta asignación
+        allocation = ComponentAllocation(
+            cc_df,
+            pool_proj_df,
+            arrivals_df,
+            blocked_lanes,
+            engine=self.engine,
+            parallel=self.parallel,
+            max_workers=self.max_workers,
+            checkpoints=True,
+            log_events=self.log_events,
+            profile=self.profiler.enabled if profile is None else profile,
+            backend=self.backend,
+        )
+        allocation._previous_engines = self.engines
+        allocation.generate_pool_projection()
+        allocation._previous_engines = {}
+        return allocation
+
+    def _mark_allocated(self, labels: List) -> None:
+        # Actualizar en missing components para debugging
+        if not labels:
+            return
+        keys = ["component", "component_serial", "changeout_date"]
+        allocated = self.missing_cc_df.loc[labels, keys].dropna(subset=["component_serial"])
+        mask = pd.MultiIndex.from_frame(self.missing_cc_df[keys]).isin(pd.MultiIndex.from_frame(allocated))
+        mask &= self.missing_cc_df["component_serial"].notnull().to_numpy()
+        self.missing_cc_df.loc[mask, "allocated"] = True
+
+    def _index_arrivals(self) -> Dict:
+        # Posiciones de las llegadas por (componente, fecha de llegada) para actualizar su slot sin recorrer arrivals_df
+        return self.arrivals_df.groupby(["component", "arrival_date"], sort=False).indices
+
+    def _assign_arrival_slots(self, arrival_slots: Dict) -> None:
+        # Cada llegada queda con el último slot al que se asoció
+        positions = []
+        values = []
+        for (component, arrival_date), pool_slot in arrival_slots.items():
+            rows = self.arrival_positions.get((component, pd.Timestamp(arrival_date)))
+            if rows is not None:
+                positions.append(rows)
+                values.append(np.full(len(rows), pool_slot, dtype=object))
+        if positions:
+            column = self.arrivals_df.columns.get_loc("pool_slot")
+            self.arrivals_df.iloc[np.concatenate(positions), column] = np.concatenate(values)
+
+    def _allocate_components_frame(self) -> pd.DataFrame:
 
         frames = []
         for component in self.missing_cc_df["component"].unique():
             # for component in ["motor_traccion"]:
             component_df = self.pool_slots_df.loc[self.pool_slots_df["component"] == component]
 
-            self.allocations_log[component] = ""
+            log = AllocationLog(component, enabled=self.log_events)
+            self.allocations_log[component] = log
             should_break = False
             # Encontrar semanas por donde va a ir iterando el algoritmo dado un componente
             weeks = (
@@ -224,39 +468,30 @@ class ComponentAllocation:
             )
             weeks = sorted(weeks)
             for week in weeks:
-                self.allocations_log[component] += f"\nSemana {week}:"
+                self.profiler.count("processed_weeks")
+                log.start_week(week)
                 week_arrivals_df = self.arrivals_df.loc[
                     (self.arrivals_df["arrival_week"] == week) & (self.arrivals_df["component"] == component)
                 ].reset_index(drop=True)
                 week_cc_df = self.missing_cc_df.loc[
                     (self.missing_cc_df["changeout_week"] == week) & (self.missing_cc_df["component"] == component)
                 ].reset_index(drop=True)
-                if week_arrivals_df.shape[0] == 0:
-                    self.allocations_log[component] += f"\nSin llegadas de componente"
-                else:
-
-                    self.allocations_log[
-                        component
-                    ] += f"\nSe agrega llegada componente {component} con fecha: {week_arrivals_df['arrival_date'].dt.strftime('%Y-%m-%d').to_list()}"
-
+                log.arrivals(week_arrivals_df["arrival_date"])
+                if week_arrivals_df.shape[0] > 0:
                     component_df = component_df.pipe(self.add_arrival_date, week_arrivals_df)
 
                 if week_cc_df.shape[0] == 0:
-                    self.allocations_log[
-                        component
-                    ] += f"\nNo existen cambios de componente para la semana {week}, componente {component}"
+                    log.no_changeouts()
                 else:
 
                     # Proceder con agregar el componente
                     for _, changeout in week_cc_df.iterrows():
-                        self.allocations_log[component] += (
-                            f"\nSe agrega cambio de componente con fecha: {changeout['changeout_date'].strftime('%Y-%m-%d')}, "
-                            f"equipo: {changeout['equipo']}, serie: {changeout['component_serial']}"
-                        )
                         new_row = changeout.copy()
+                        blocked_lane = changeout["pool_changeout_type"] == "E"
                         # 0. Omite verificar si tiene disponibilidad en el pool en caso de que sea linea blockeada esperando
-                        if not changeout["pool_changeout_type"] == "E":
+                        if not blocked_lane:
                             # 1. Verifica si el componente sujeto a cambio tiene disponibilidad en el pool
+                            self.profiler.count("slot_searches")
                             available_slots_df = find_available_pool_slot(component_df, changeout)
                             if not available_slots_df.empty:
 
@@ -268,11 +503,25 @@ class ComponentAllocation:
 
                             else:
                                 should_break = True
-                                self.allocations_log[component] += f"\nNo se pudo agregar componente."
+                                log.changeout(
+                                    changeout["changeout_date"],
+                                    changeout["equipo"],
+                                    changeout["component_serial"],
+                                    outcome="failed",
+                                )
+                                log.no_slot(week)
                                 break
+                        log.changeout(
+                            changeout["changeout_date"],
+                            changeout["equipo"],
+                            changeout["component_serial"],
+                            new_row["pool_slot"],
+                            "blocked_lane" if blocked_lane else "allocated",
+                        )
                         new_row = pd.DataFrame([new_row])
                         new_row = add_arrival_date_proj(new_row)
                         component_df = pd.concat([component_df, new_row], ignore_index=True)
+                        self.profiler.count("frame_concats")
                         component_df = component_df.sort_values("changeout_date")
 
                         # Actualizar en missing components para debugging
@@ -284,14 +533,19 @@ class ComponentAllocation:
                         ] = True
                     if should_break:
                         break
-                self.allocations_log[component] += "\n"
+                log.end_week()
             frames.append(component_df)
 
         df = pd.concat(frames)
+        self.profiler.count("frame_concats")
         return df
 
+    @profiled("get_base_pool_slots")
     def get_base_pool_slots(self) -> pd.DataFrame:
         # proyección en base a un archivo base para darle forma al gráfico de timeline
+        if self.backend == "polars":
+            return self._backend_module().get_base_pool_slots(self.pool_proj_df, self.cc_df)
+
         merge_columns = ["equipo", "component", "component_serial", "changeout_week"]
 
         df = pd.merge(self.pool_proj_df, self.cc_df, on=merge_columns, how="left", suffixes=("_proj", ""))
@@ -310,7 +564,10 @@ class ComponentAllocation:
 
         return df
 
+    @profiled("get_missing_changeouts")
     def get_missing_changeouts(self) -> pd.DataFrame:
+        if self.backend == "polars":
+            return self._backend_module().get_missing_changeouts(self.cc_df, self.pool_proj_df, self.blocked_lanes)
 
         merge_columns = ["equipo", "component", "component_serial", "changeout_week"]
         df = self.cc_df[self.cc_df["changeout_date"] >= CHANGEOUT_START_DATE][
@@ -340,21 +597,25 @@ class ComponentAllocation:
         )
         df = df.assign(
             pool_changeout_type=np.where(df["pool_slot"].notnull(), "E", df["pool_changeout_type"]),
-            changeout_week=df["changeout_date"].dt.strftime("%G-W%V"),
+            changeout_week=iso_week(df["changeout_date"]),
             # arrival_week=df["arrival_date"].dt.strftime("%G-W%V"),
         )
         assert df.loc[df["pool_changeout_type"] == "E"].shape[0] == self.blocked_lanes.shape[0]
         df = df.sort_values(["component", "changeout_date"]).reset_index(drop=True)
         return df
 
+    @profiled("generate_pool_projection", rows=lambda self, _: self.allocated_df.shape[0])
     def generate_pool_projection(self) -> pd.DataFrame:
 
         df = self.allocate_components()
+        if self.backend == "polars":
+            self.allocated_df = self._backend_module().enrich_projection(df)
+            return
 
         df[["changeout_date", "arrival_date"]] = df[["changeout_date", "arrival_date"]].apply(pd.to_datetime)
 
         df["componente"] = df["component"].map({c.value.code: c.value.name for c in ComponentType})
         df = df.reset_index(drop=True)
         df = df.assign(arrival_date=np.where(df["arrival_date"].isnull(), df["arrival_date_proj"], df["arrival_date"]))
-        df["ovh_days"] = df.apply(get_ovh_days, axis=1)
+        df["ovh_days"] = get_ovh_days(df)
         self.allocated_df = df
@@ -0,0 +1,57 @@
+# Standard library imports
+import time
+from functools import wraps
+from typing import Callable, Dict, List, Optional
+
+# Third-party imports
+import pandas as pd
+
+
+class AllocationProfiler:
+    """Tiempo por fase y contadores de ComponentAllocation.
+
+    Deshabilitado no toma tiempos ni acumula contadores, de modo que puede quedar siempre presente en la asignación.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.phases: List[Dict] = []
+        self.counters: Dict[str, int] = {}
+
+    def record(self, phase: str, seconds: float, rows: Optional[int] = None) -> None:
+        self.phases.append({"phase": phase, "seconds": seconds, "rows": rows})
+
+    def count(self, counter: str, value: int = 1) -> None:
+        if self.enabled:
+            self.counters[counter] = self.counters.get(counter, 0) + value
+
+    def report(self) -> pd.DataFrame:
+        # Las fases anidadas (allocate_components dentro de generate_pool_projection) se informan por separado
+        return pd.DataFrame(self.phases, columns=["phase", "seconds", "rows"])
+
+
+def profiled(phase: str, rows: Optional[Callable] = None) -> Callable:
+    """Registra el tiempo de un método en self.profiler.
+
+    rows recibe (self, resultado) y retorna las filas procesadas; por defecto se usa el largo del DataFrame retornado.
+    """
+
+    def decorator(method: Callable) -> Callable:
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            profiler = self.profiler
+            if not profiler.enabled:
+                return method(self, *args, **kwargs)
+            start = time.perf_counter()
+            result = method(self, *args, **kwargs)
+            elapsed = time.perf_counter() - start
+            if rows is not None:
+                n_rows = rows(self, result)
+            else:
+                n_rows = result.shape[0] if isinstance(result, pd.DataFrame) else None
+            profiler.record(phase, elapsed, n_rows)
+            return result
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,138 @@
+"""Carga concurrente de las cuatro planillas de planificación.
+
+SourceLoader lee las fuentes en paralelo a través de sus snapshots: los snapshots al día y el CSV del pool base se leen
+en hilos, y las planillas que openpyxl debe procesar de nuevo se procesan en procesos aparte (la planilla de entregas
+reparte sus hojas en su propio grupo de procesos). Dos cargas simultáneas de la misma fuente y versión del archivo
+comparten el mismo resultado.
+"""
+
+# Standard library imports
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+
+# Third-party imports
+import pandas as pd
+
+# Local imports
+from kverse.assets.pool.arrivals_store import ArrivalsSheetStore
+from kverse.assets.pool.snapshots import SOURCES, SourceSnapshots
+from kverse.assets.pool.utils import process_context
+from kverse.storage import BlobMirror
+
+# Constants
+
+# Fuentes que se procesan con openpyxl en un proceso aparte cuando su snapshot no está al día
+PROCESS_SOURCES = ("cc", "blocked_lanes")
+# Ubicación de cada planilla en el contenedor kdata-raw
+BLOB_NAMES = {
+    "cc": "PLANIFICACION/POOL/ESCONDIDA/PLANILLA DE CONTROL CAMBIO DE COMPONENTES MEL2.xlsx",
+    "base_pool_proj": "PLANIFICACION/POOL/ESCONDIDA/pool_proj.csv",
+    "component_arrivals": (
+        "PLANIFICACION/POOL/ESCONDIDA/Planilla de seguimiento de cumplimiento de entrega componentes 2024.xlsx"
+    ),
+    "blocked_lanes": "PLANIFICACION/POOL/ESCONDIDA/COMPONENTES EN ESPERA APROBACION.xlsx",
+}
+# El pool_proj.csv del contenedor está en latin-1
+BLOB_READER_KWARGS = {"base_pool_proj": {"encoding": "latin-1"}}
+
+
+@dataclass
+class PlanningSources:
+    cc_df: pd.DataFrame
+    pool_proj_df: pd.DataFrame
+    arrivals_df: pd.DataFrame
+    blocked_lanes: pd.DataFrame
+
+    @property
+    def allocation_inputs(self) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+        # En el orden de los argumentos de ComponentAllocation
+        return self.cc_df, self.pool_proj_df, self.arrivals_df, self.blocked_lanes
+
+
+def build_snapshot(snapshots: SourceSnapshots, name: str, path: Union[str, Path], kwargs: Dict) -> pd.DataFrame:
+    return snapshots.build(name, path, **kwargs)
+
+
+def source_paths(mirror: Optional[BlobMirror] = None) -> Dict[str, Path]:
+    # Rutas locales de las planillas: las de DATA/PLAN, o las copias del contenedor revalidadas en paralelo
+    if mirror is None:
+        return {name: Path(source.path) for name, source in SOURCES.items()}
+    with ThreadPoolExecutor(max_workers=len(BLOB_NAMES)) as executor:
+        return dict(zip(BLOB_NAMES, executor.map(mirror.fetch, BLOB_NAMES.values())))
+
+
+class SourceLoader:
+    def __init__(
+        self,
+        snapshots: Optional[SourceSnapshots] = None,
+        arrivals_store: Optional[ArrivalsSheetStore] = None,
+        max_workers: Optional[int] = None,
+        processes: Optional[bool] = None,
+        reader_kwargs: Optional[Dict[str, Dict]] = None,
+    ):
+        self.snapshots = snapshots or SourceSnapshots()
+        self.arrivals_store = arrivals_store
+        # Procesos para las hojas de la planilla de entregas
+        self.max_workers = max_workers
+        # Con una sola CPU los procesos no se ejecutan en paralelo y sólo suman el costo de crearlos
+        self.processes = (os.cpu_count() or 1) > 1 if processes is None else processes
+        # Argumentos adicionales del lector de cada fuente
+        self.reader_kwargs = reader_kwargs or {}
+        self._threads = ThreadPoolExecutor(max_workers=len(self.snapshots.sources), thread_name_prefix="kverse-loader")
+        self._lock = threading.Lock()
+        self._inflight: Dict[tuple, Future] = {}
+
+    def _read(self, name: str, path: Union[str, Path]) -> pd.DataFrame:
+        if self.snapshots.is_current(name, path):
+            return self.snapshots.read(name)
+        kwargs = self.reader_kwargs.get(name, {})
+        if self.processes and name in PROCESS_SOURCES:
+            with ProcessPoolExecutor(max_workers=1, mp_context=process_context()) as executor:
+                return executor.submit(build_snapshot, self.snapshots, name, path, kwargs).result()
+        if name == "component_arrivals":
+            kwargs = {
+                "parallel": self.processes,
+                "max_workers": self.max_workers,
+                "store": self.arrivals_store,
+                **kwargs,
+            }
+        return self.snapshots.build(name, path, **kwargs)
+
+    def load(self, name: str, path: Optional[Union[str, Path]] = None) -> Future:
+        # Future con la fuente; una carga en curso de la misma versión del archivo se reutiliza
+        path = path or self.snapshots.sources[name].path
+        stat = os.stat(path)
+        key = (name, str(path), stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                return future
+            future = self._threads.submit(self._read, name, path)
+            self._inflight[key] = future
+        # Fuera del lock: si la carga ya terminó, el callback se ejecuta en este mismo hilo
+        future.add_done_callback(lambda _: self._release(key))
+        return future
+
+    def _release(self, key: tuple) -> None:
+        with self._lock:
+            self._inflight.pop(key, None)
+
+    def load_all(self, paths: Optional[Dict[str, Union[str, Path]]] = None) -> PlanningSources:
+        paths = paths or {}
+        futures = {
+            name: self.load(name, paths.get(name))
+            for name in ("cc", "base_pool_proj", "component_arrivals", "blocked_lanes")
+        }
+        return PlanningSources(
+            cc_df=futures["cc"].result(),
+            pool_proj_df=futures["base_pool_proj"].result(),
+            arrivals_df=futures["component_arrivals"].result(),
+            blocked_lanes=futures["blocked_lanes"].result(),
+        )
+
+    def close(self) -> None:
+        self._threads.shutdown(wait=True)
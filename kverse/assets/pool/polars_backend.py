@@ -0,0 +1,288 @@
+"""Implementación en polars de los pasos de preparación y proyección de ComponentAllocation.
+
+Cada función recibe y retorna DataFrames de pandas con el mismo contenido, orden y tipos que su equivalente en
+component_allocation. Sólo las columnas clave pasan a polars, donde se resuelven los joins, ordenamientos y columnas
+derivadas como consultas lazy; las filas del resultado se arman después en pandas por posición, de modo que las
+demás columnas de las planillas (que pueden mezclar tipos) no se convierten. Se activa con
+ComponentAllocation(backend="polars").
+"""
+
+# Standard library imports
+from typing import List
+
+# Third-party imports
+import numpy as np
+import pandas as pd
+import polars as pl
+
+# Local imports
+from kverse.assets.pool.component_allocation import (
+    CHANGEOUT_START_DATE,
+    DEFAULT_SUBCOMPONENT_PRIORITY,
+    OVH_DAYS_OVERRIDES,
+    OVH_DAYS_TABLE,
+    SUBCOMPONENT_PRIORITIES,
+    ComponentType,
+)
+
+# Constants
+
+MERGE_COLUMNS = ["equipo", "component", "component_serial", "changeout_week"]
+BLOCKED_LANE_COLUMNS = ["component", "equipo", "changeout_date"]
+
+
+def from_pandas(df: pd.DataFrame) -> pl.LazyFrame:
+    # Índice de fila para volver a armar el resultado en pandas
+    return pl.from_pandas(df.reset_index(drop=True)).lazy().with_row_index("row")
+
+
+def take(df: pd.DataFrame, rows: np.ndarray) -> pd.DataFrame:
+    # Filas por posición; -1 queda como fila vacía con los mismos cambios de tipo que un merge de pandas
+    return df.reset_index(drop=True).reindex(rows).reset_index(drop=True)
+
+
+def to_numpy(lf: pl.LazyFrame, column: str) -> np.ndarray:
+    return lf.select(column).collect().to_series().to_numpy()
+
+
+def to_object(series: pl.Series) -> np.ndarray:
+    # Texto de polars a arreglo object de pandas, con NaN en vez de None
+    values = series.to_numpy().astype(object)
+    values[series.is_null().to_numpy()] = np.nan
+    return values
+
+
+def iso_week(column: str) -> pl.Expr:
+    return pl.col(column).dt.strftime("%G-W%V")
+
+
+def subcomponent_priority() -> pl.Expr:
+    expr = pl.lit(DEFAULT_SUBCOMPONENT_PRIORITY, dtype=pl.Int64)
+    # Se construye desde la última prioridad para que la primera coincidencia sea la condición exterior
+    for component, subcomponents in SUBCOMPONENT_PRIORITIES.items():
+        for priority, text in reversed(list(enumerate(subcomponents, start=1))):
+            condition = (pl.col("component") == component) & pl.col("subcomponent").str.contains(text, literal=True)
+            expr = pl.when(condition).then(pl.lit(priority, dtype=pl.Int64)).otherwise(expr)
+    return expr
+
+
+def priority_sort(df: pd.DataFrame) -> pd.DataFrame:
+
+    required_columns = {"component", "subcomponent", "equipo", "changeout_date", "position"}
+    if not required_columns.issubset(df.columns):
+        raise ValueError(f"Missing required columns: {required_columns}")
+
+    missing = df["component"].isin(list(SUBCOMPONENT_PRIORITIES)) & df["subcomponent"].isnull()
+    if missing.any():
+        raise TypeError(f"Missing subcomponent for component {df.loc[missing, 'component'].iloc[0]}")
+
+    keys = df[["equipo", "changeout_date", "component", "position", "subcomponent"]]
+    order = to_numpy(
+        from_pandas(keys.assign(subcomponent=keys["subcomponent"].astype(str).where(keys["subcomponent"].notnull())))
+        .with_columns(subcomponent_priority=subcomponent_priority())
+        .sort(
+            ["equipo", "changeout_date", "component", "position", "subcomponent_priority"],
+            nulls_last=True,
+            maintain_order=True,
+        ),
+        "row",
+    )
+    return take(df, order)
+
+
+def ovh_days(lf: pl.LazyFrame) -> pl.LazyFrame:
+    # Días de reparación por (componente, subcomponente si tiene valor propio, es planificado)
+    overrides = pl.LazyFrame(
+        {
+            "component": [component for component, _ in OVH_DAYS_OVERRIDES],
+            "subcomponent": [subcomponent for _, subcomponent in OVH_DAYS_OVERRIDES],
+            "subcomponent_key": [subcomponent for _, subcomponent in OVH_DAYS_OVERRIDES],
+        }
+    )
+    table = pl.from_pandas(OVH_DAYS_TABLE.reset_index(name="ovh_days")).lazy()
+    return (
+        lf.join(overrides, on=["component", "subcomponent"], how="left", maintain_order="left")
+        .with_columns(
+            subcomponent_key=pl.col("subcomponent_key").fill_null(""),
+            planned=pl.col("pool_changeout_type").eq("P").fill_null(False),
+        )
+        .join(
+            table.rename({"subcomponent": "subcomponent_key"}),
+            on=["component", "subcomponent_key", "planned"],
+            how="left",
+            maintain_order="left",
+        )
+        .drop("subcomponent_key", "planned")
+    )
+
+
+def get_ovh_days(df: pd.DataFrame) -> pd.Series:
+    required_columns = {"component", "subcomponent", "pool_changeout_type"}
+    if not required_columns.issubset(df.columns):
+        raise ValueError(f"Missing required columns: {required_columns}")
+
+    keys = df[["component", "subcomponent", "pool_changeout_type"]].astype(object)
+    days = ovh_days(from_pandas(keys.where(keys.notnull(), None))).select("ovh_days").collect().to_series()
+    if days.null_count() > 0:
+        unknown = sorted(set(df.loc[days.is_null().to_numpy(), "component"].astype(str)))
+        raise ValueError(f"Unknown components: {unknown}")
+    return pd.Series(days.to_numpy(), index=df.index, name="ovh_days", dtype="int64")
+
+
+def add_arrival_date_proj(df: pd.DataFrame) -> pd.DataFrame:
+
+    required_columns = {"component", "changeout_date", "pool_changeout_type", "subcomponent"}
+    if not required_columns.issubset(df.columns):
+        raise ValueError(f"Missing required columns: {required_columns}")
+
+    df = df.copy()
+    days = get_ovh_days(df)
+    projection = (
+        pl.LazyFrame({"changeout_date": df["changeout_date"].to_numpy(), "ovh_days": days.to_numpy()})
+        .select(arrival_date_proj=pl.col("changeout_date") + pl.duration(days=pl.col("ovh_days"), time_unit="ns"))
+        .with_columns(arrival_week_proj=iso_week("arrival_date_proj"))
+        .collect()
+    )
+    df["arrival_date_proj"] = projection["arrival_date_proj"].to_numpy()
+    df["arrival_week_proj"] = to_object(projection["arrival_week_proj"])
+    return df
+
+
+def get_missing_changeouts(
+    cc_df: pd.DataFrame, pool_proj_df: pd.DataFrame, blocked_lanes: pd.DataFrame
+) -> pd.DataFrame:
+    columns = [
+        "equipo",
+        "component",
+        "subcomponent",
+        "changeout_date",
+        "changeout_week",
+        "pool_changeout_type",
+        "component_hours",
+        "component_serial",
+    ]
+    if blocked_lanes.duplicated(subset=BLOCKED_LANE_COLUMNS).any():
+        raise pd.errors.MergeError("Merge keys are not unique in right dataset; not a many-to-one merge")
+
+    # Cambios desde el inicio de la proyección que no están en el pool base
+    changeouts = (
+        from_pandas(cc_df[MERGE_COLUMNS + ["changeout_date", "pool_changeout_type"]])
+        .filter(pl.col("changeout_date") >= CHANGEOUT_START_DATE)
+        .filter(pl.col("pool_changeout_type").ne_missing("N"))
+        .join(
+            pl.from_pandas(pool_proj_df[MERGE_COLUMNS]).lazy().unique(),
+            on=MERGE_COLUMNS,
+            how="anti",
+            nulls_equal=True,
+            maintain_order="left",
+        )
+        .select(BLOCKED_LANE_COLUMNS + ["row"])
+    )
+    # Unión completa con las líneas bloqueadas, ordenada como el merge outer de pandas seguido del sort por fecha
+    pairs = (
+        changeouts.join(
+            from_pandas(blocked_lanes[BLOCKED_LANE_COLUMNS]),
+            on=BLOCKED_LANE_COLUMNS,
+            how="full",
+            coalesce=True,
+            nulls_equal=True,
+            suffix="_blocked",
+            maintain_order="left_right",
+        )
+        .sort(["component", "changeout_date", "equipo"], nulls_last=True, maintain_order=True)
+        .collect()
+    )
+    cc_rows = pairs["row"].fill_null(-1).to_numpy()
+    blocked_rows = pairs["row_blocked"].fill_null(-1).to_numpy()
+
+    df = take(cc_df[columns], cc_rows)
+    blocked_df = take(blocked_lanes, blocked_rows)
+    for column in BLOCKED_LANE_COLUMNS:
+        df[column] = df[column].where(cc_rows >= 0, blocked_df[column])
+    df = pd.concat([df, blocked_df.drop(columns=BLOCKED_LANE_COLUMNS)], axis=1)
+    df["pool_changeout_type"] = df["pool_changeout_type"].where(cc_rows < 0, df["pool_changeout_type"].fillna("P"))
+
+    weeks = pl.LazyFrame({"changeout_date": df["changeout_date"].to_numpy()}).select(iso_week("changeout_date"))
+    df = df.assign(
+        pool_changeout_type=np.where(df["pool_slot"].notnull(), "E", df["pool_changeout_type"]),
+        changeout_week=to_object(weeks.collect().to_series()),
+    )
+    assert df.loc[df["pool_changeout_type"] == "E"].shape[0] == blocked_lanes.shape[0]
+    return df
+
+
+def get_base_pool_slots(pool_proj_df: pd.DataFrame, cc_df: pd.DataFrame) -> pd.DataFrame:
+    # Join izquierdo del pool base con los cambios, resuelto en polars sobre las columnas clave
+    pairs = (
+        from_pandas(pool_proj_df[MERGE_COLUMNS])
+        .join(
+            from_pandas(cc_df[MERGE_COLUMNS]),
+            on=MERGE_COLUMNS,
+            how="left",
+            nulls_equal=True,
+            suffix="_cc",
+            maintain_order="left_right",
+        )
+        .collect()
+    )
+    overlapping = [column for column in pool_proj_df.columns if column in cc_df.columns and column not in MERGE_COLUMNS]
+    df = pd.concat(
+        [
+            take(pool_proj_df, pairs["row"].to_numpy()).rename(
+                columns={column: f"{column}_proj" for column in overlapping}
+            ),
+            take(cc_df.drop(columns=MERGE_COLUMNS), pairs["row_cc"].fill_null(-1).to_numpy()),
+        ],
+        axis=1,
+    )
+
+    df["pool_changeout_type"] = df["pool_changeout_type"].fillna(df["pool_changeout_type_proj"])
+    df = df.drop(columns="pool_changeout_type_proj")
+
+    df["changeout_date"] = df["changeout_date"].fillna(df["changeout_date_proj"])
+
+    df = df.drop(columns="changeout_date_proj").reset_index(drop=True)
+
+    df = add_arrival_date_proj(df)
+
+    # Los que no fecha llegada asignada en la planilla base son proyecciones, no llegadas reales
+    df = df.assign(arrival_status=np.where(df["arrival_date"].isnull(), "unconfirmed", "historical"))
+
+    return df
+
+
+def enrich_projection(df: pd.DataFrame) -> pd.DataFrame:
+    # Mismo enriquecimiento final que generate_pool_projection
+    df[["changeout_date", "arrival_date"]] = df[["changeout_date", "arrival_date"]].apply(pd.to_datetime)
+
+    names = {component.value.code: component.value.name for component in ComponentType}
+    enrichment = (
+        pl.LazyFrame(
+            {
+                "component": df["component"].astype(object).where(df["component"].notnull(), None).to_list(),
+                "arrival_date": df["arrival_date"].to_numpy(),
+                "arrival_date_proj": df["arrival_date_proj"].to_numpy(),
+            },
+            schema_overrides={"component": pl.String},
+        )
+        .select(
+            componente=pl.col("component").replace_strict(names, default=None, return_dtype=pl.String),
+            arrival_date=pl.coalesce("arrival_date", "arrival_date_proj"),
+        )
+        .collect()
+    )
+    df["componente"] = to_object(enrichment["componente"])
+    df = df.reset_index(drop=True)
+    df = df.assign(arrival_date=enrichment["arrival_date"].to_numpy())
+    df["ovh_days"] = get_ovh_days(df)
+    return df
+
+
+__all__: List[str] = [
+    "add_arrival_date_proj",
+    "enrich_projection",
+    "get_base_pool_slots",
+    "get_missing_changeouts",
+    "get_ovh_days",
+    "priority_sort",
+]
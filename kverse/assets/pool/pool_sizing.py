@@ -0,0 +1,85 @@
+# Standard library imports
+from typing import Dict, Optional, Tuple
+
+# Third-party imports
+import numpy as np
+import pandas as pd
+
+# Local imports
+from kverse.assets.pool.component_allocation import ComponentAllocation
+from kverse.assets.pool.simulation import RepairTimeDistribution, build_scenarios, simulate_component
+
+
+class PoolSizeOptimizer:
+    """Busca por componente la menor cantidad de slots del pool que cumple un nivel de servicio.
+
+    El nivel de servicio de una capacidad es la fracción de réplicas en que ningún cambio pendiente se queda sin slot
+    durante todo el horizonte. Cada capacidad se evalúa con la misma semilla, de modo que las capacidades comparten
+    los tiempos de reparación muestreados, y su resultado se guarda para reutilizarlo entre búsquedas.
+    """
+
+    def __init__(
+        self,
+        allocation: ComponentAllocation,
+        replications: int = 1000,
+        distributions: Optional[Dict[str, RepairTimeDistribution]] = None,
+        default_distribution: RepairTimeDistribution = RepairTimeDistribution(),
+        seed: int = 0,
+    ):
+        self.scenarios = build_scenarios(allocation)
+        self.replications = replications
+        self.distributions = distributions or {}
+        self.default_distribution = default_distribution
+        self.seed = seed
+        self.service_levels: Dict[Tuple[str, int], float] = {}
+
+    def service_level(self, component: str, capacity: int) -> float:
+        key = (component, capacity)
+        if key not in self.service_levels:
+            scenario = self.scenarios[component].with_capacity(capacity)
+            distribution = self.distributions.get(component, self.default_distribution)
+            shortage = simulate_component(scenario, distribution, self.replications, np.random.default_rng(self.seed))
+            self.service_levels[key] = float((~shortage.any(axis=1)).mean())
+        return self.service_levels[key]
+
+    def minimum_capacity(self, component: str, target: float) -> int:
+        # Con un slot vacío adicional por cada cambio pendiente nunca falta slot, lo que acota la búsqueda
+        scenario = self.scenarios[component]
+        if len(scenario.changeout_days) == 0:
+            return 0
+        upper_bound = len(scenario.pool_slots) + len(scenario.changeout_days)
+
+        # Sin slots todo cambio queda sin asignar. Se duplica la capacidad hasta cumplir el objetivo y luego se recorre
+        # en orden el intervalo entre la última capacidad que no lo cumple y esa. Con la misma semilla el nivel de
+        # servicio en general crece con la capacidad, pero no está garantizado (un slot más cambia qué slot toma cada
+        # cambio): el recorrido lineal devuelve la menor capacidad del intervalo que cumple aunque el nivel no sea
+        # monótono dentro de él. Sólo se asume que bajo una capacidad evaluada que no cumple ninguna cumple.
+        low, high = 0, max(len(scenario.pool_slots), 1)
+        while high < upper_bound and self.service_level(component, high) < target:
+            low, high = high, min(high * 2, upper_bound)
+        for capacity in range(low + 1, high):
+            if self.service_level(component, capacity) >= target:
+                return capacity
+        return high
+
+    def optimize(self, target: float = 0.95) -> pd.DataFrame:
+        if not 0 < target <= 1:
+            raise ValueError(f"Service level target must be in (0, 1], got {target}")
+        rows = []
+        for component, scenario in self.scenarios.items():
+            capacity = self.minimum_capacity(component, target)
+            rows.append(
+                {
+                    "component": component,
+                    "current_slots": len(scenario.pool_slots),
+                    "required_slots": capacity,
+                    "service_level": self.service_level(component, capacity),
+                    "current_service_level": self.service_level(component, len(scenario.pool_slots)),
+                }
+            )
+        return pd.DataFrame(rows)
+
+
+def optimize_pool_size(allocation: ComponentAllocation, target: float = 0.95, **kwargs) -> pd.DataFrame:
+    """Menor cantidad de slots por componente cuyo nivel de servicio simulado alcanza target."""
+    return PoolSizeOptimizer(allocation, **kwargs).optimize(target)
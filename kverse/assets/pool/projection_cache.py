@@ -0,0 +1,216 @@
+"""Caché en disco de la proyección del pool.
+
+Cada entrada es un directorio con allocated_df, arrivals_df, las llegadas leídas de la planilla y los registros de
+asignación en Parquet. La clave es un hash del contenido de las cuatro planillas de entrada y de los parámetros de los
+componentes, por lo que un cambio en cualquiera de ellos genera una entrada nueva. Sobre max_bytes se eliminan las
+entradas usadas hace más tiempo.
+
+El directorio por defecto (.cache/projection) está en el disco efímero del dyno: la caché evita recalcular mientras el
+dyno sigue arriba y se pierde en cada reinicio. Para que las proyecciones sobrevivan a los reinicios, KVERSE_CACHE_DIR
+debe apuntar a un almacenamiento persistente (ver README).
+"""
+
+# Standard library imports
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+# Third-party imports
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+# Local imports
+from kverse.assets.pool.allocation_log import AllocationLog
+from kverse.assets.pool.base_pool_proj import BASE_POOL_PROJ_PATH
+from kverse.assets.pool.blocked_lanes import BLOCKED_LANES_PATH
+from kverse.assets.pool.comp_arrivals import COMPONENT_ARRIVALS_PATH
+from kverse.assets.pool.comp_changeouts import CC_PATH
+from kverse.assets.pool.component_allocation import (
+    CHANGEOUT_START_DATE,
+    OVH_DAYS_OVERRIDES,
+    SUBCOMPONENT_PRIORITIES,
+    ComponentAllocation,
+    ComponentType,
+)
+
+# Constants
+
+# Cambiar al modificar el formato de las entradas o la lógica de asignación, para no servir proyecciones antiguas
+CACHE_VERSION = 2
+SOURCE_PATHS = (CC_PATH, BASE_POOL_PROJ_PATH, COMPONENT_ARRIVALS_PATH, BLOCKED_LANES_PATH)
+DEFAULT_CACHE_DIR = os.environ.get("KVERSE_CACHE_DIR", ".cache/projection")
+DEFAULT_MAX_BYTES = 512 * 2**20
+FRAMES = ("allocated_df", "arrivals_df", "component_arrivals_df")
+LOG_COLUMNS = ["week", "event", "date", "equipo", "component_serial", "pool_slot", "outcome", "component"]
+MANIFEST = "manifest.json"
+CHUNK_SIZE = 2**20
+NONE_PREFIX = "__none__"
+
+
+@dataclass
+class CachedProjection:
+    allocated_df: pd.DataFrame
+    arrivals_df: pd.DataFrame
+    component_arrivals_df: pd.DataFrame
+    allocations_log: Dict[str, AllocationLog] = field(default_factory=dict)
+
+    @classmethod
+    def from_allocation(
+        cls, allocation: ComponentAllocation, component_arrivals_df: pd.DataFrame
+    ) -> "CachedProjection":
+        # component_arrivals_df es la planilla de entregas tal como se leyó, que la página muestra en la línea de tiempo
+        return cls(
+            allocation.allocated_df, allocation.arrivals_df, component_arrivals_df, dict(allocation.allocations_log)
+        )
+
+
+def component_parameters() -> Dict:
+    return {
+        "components": [
+            [component.name, code.code, code.name, code.planned_ovh_days, code.unplanned_ovh_days]
+            for component in ComponentType
+            for code in [component.value]
+        ],
+        "ovh_days_overrides": [[*key, *value] for key, value in OVH_DAYS_OVERRIDES.items()],
+        "subcomponent_priorities": SUBCOMPONENT_PRIORITIES,
+        "changeout_start_date": CHANGEOUT_START_DATE.isoformat(),
+    }
+
+
+def to_arrow_frame(df: pd.DataFrame) -> pd.DataFrame:
+    # Las columnas de planilla que mezclan números y texto no tienen tipo Arrow: se guardan como texto
+    df = df.copy()
+    for column in df.columns[df.dtypes == object]:
+        # Parquet no distingue None de NaN: las posiciones con None se guardan aparte
+        is_none = np.array([value is None for value in df[column]], dtype=bool)
+        if is_none.any():
+            df[f"{NONE_PREFIX}{column}"] = is_none
+        try:
+            pa.array(df[column], from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            df[column] = df[column].where(df[column].isnull(), df[column].astype(str))
+    return df
+
+
+def from_arrow_frame(df: pd.DataFrame, object_columns: List[str]) -> pd.DataFrame:
+    # Parquet devuelve con tipo numérico las columnas object que sólo tenían números, y None donde pandas usa NaN
+    for column in object_columns:
+        values = df[column].astype(object)
+        values = values.where(values.notnull(), np.nan)
+        if f"{NONE_PREFIX}{column}" in df:
+            values[df.pop(f"{NONE_PREFIX}{column}").to_numpy(dtype=bool)] = None
+        df[column] = values
+    return df
+
+
+class ProjectionCache:
+    def __init__(self, directory: Union[str, Path] = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+
+    def key(self, sources: Iterable[Union[str, Path]] = SOURCE_PATHS) -> str:
+        digest = hashlib.sha256()
+        digest.update(json.dumps([CACHE_VERSION, component_parameters()], sort_keys=True).encode())
+        # Sólo cuenta el contenido de cada planilla, en el orden recibido, y no su ubicación
+        for source in sources:
+            source_digest = hashlib.sha256()
+            with open(source, "rb") as file:
+                while chunk := file.read(CHUNK_SIZE):
+                    source_digest.update(chunk)
+            digest.update(source_digest.digest())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[CachedProjection]:
+        path = self.directory / key
+        try:
+            manifest = json.loads((path / MANIFEST).read_text())
+            frames = {
+                name: from_arrow_frame(pd.read_parquet(path / f"{name}.parquet"), manifest["object_columns"][name])
+                for name in FRAMES
+            }
+            logs_df = pd.read_parquet(path / "allocations_log.parquet")
+            logs = {
+                component: AllocationLog.from_frame(
+                    component,
+                    logs_df.loc[logs_df["component"] == component].reset_index(drop=True),
+                    manifest["failed_weeks"].get(component),
+                )
+                for component in manifest["components"]
+            }
+            # El tiempo de modificación del manifiesto marca el último uso para la eliminación LRU
+            os.utime(path / MANIFEST)
+        except (OSError, ValueError, KeyError, pa.ArrowInvalid):
+            # Sin entrada, o una entrada truncada o a medio eliminar (p. ej. tras una caída durante evict): se
+            # descarta y cuenta como ausente
+            shutil.rmtree(path, ignore_errors=True)
+            return None
+        return CachedProjection(**frames, allocations_log=logs)
+
+    def put(self, key: str, projection: CachedProjection) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Se escribe en un directorio temporal y se renombra, para que un lector nunca vea una entrada incompleta
+        tmp = Path(tempfile.mkdtemp(prefix=".tmp-", dir=self.directory))
+        try:
+            for name in FRAMES:
+                to_arrow_frame(getattr(projection, name)).to_parquet(tmp / f"{name}.parquet", index=False)
+            logs = projection.allocations_log
+            log_frames = [
+                log.to_frame().assign(component=component, week=lambda x: x["week"].astype(str))
+                for component, log in logs.items()
+            ]
+            logs_df = pd.concat(log_frames, ignore_index=True) if log_frames else pd.DataFrame(columns=LOG_COLUMNS)
+            to_arrow_frame(logs_df).to_parquet(tmp / "allocations_log.parquet", index=False)
+            manifest = {
+                "version": CACHE_VERSION,
+                "created": time.time(),
+                "components": list(logs),
+                "object_columns": {
+                    name: getattr(projection, name).columns[getattr(projection, name).dtypes == object].to_list()
+                    for name in FRAMES
+                },
+                "failed_weeks": {component: log.failed_week for component, log in logs.items()},
+            }
+            (tmp / MANIFEST).write_text(json.dumps(manifest))
+            try:
+                tmp.rename(self.directory / key)
+            except OSError:
+                # Otro proceso ya guardó la misma entrada
+                shutil.rmtree(tmp)
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        self.evict(keep=key)
+
+    def entries(self) -> List[Path]:
+        # Entradas completas, de la usada hace más tiempo a la más reciente
+        if not self.directory.exists():
+            return []
+        paths = [path for path in self.directory.iterdir() if (path / MANIFEST).exists()]
+        return sorted(paths, key=lambda path: (path / MANIFEST).stat().st_mtime)
+
+    def size(self, path: Path) -> int:
+        return sum(file.stat().st_size for file in path.iterdir())
+
+    def evict(self, keep: Optional[str] = None) -> List[str]:
+        entries = self.entries()
+        total = sum(self.size(path) for path in entries)
+        evicted = []
+        for path in entries:
+            if total <= self.max_bytes:
+                break
+            if path.name == keep:
+                continue
+            total -= self.size(path)
+            shutil.rmtree(path, ignore_errors=True)
+            evicted.append(path.name)
+        return evicted
+
+    def clear(self) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)
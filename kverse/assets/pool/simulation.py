@@ -0,0 +1,243 @@
+# Standard library imports
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+# Third-party imports
+import numpy as np
+import pandas as pd
+
+# Local imports
+from kverse.assets.pool.allocation_engine import DAY_NS, NAT, to_ns
+from kverse.assets.pool.component_allocation import ComponentAllocation, get_ovh_days
+
+# Constants
+
+REPAIR_TIME_KINDS = ("fixed", "gamma", "lognormal", "triangular")
+
+
+@dataclass(frozen=True)
+class RepairTimeDistribution:
+    """Distribución del tiempo de reparación, centrada en los días de ComponentType (planificado o imprevisto).
+
+    cv es el coeficiente de variación respecto de esos días; con kind="fixed" o cv=0 cada reparación dura exactamente
+    esos días. Esto no equivale a la proyección de ComponentAllocation, que sólo libera un slot con una llegada real
+    (ver simulate_pool_shortage).
+    """
+
+    kind: str = "gamma"
+    cv: float = 0.25
+
+    def __post_init__(self):
+        if self.kind not in REPAIR_TIME_KINDS:
+            raise ValueError(f"Unknown repair time distribution: {self.kind}, expected one of {REPAIR_TIME_KINDS}")
+        if self.cv < 0:
+            raise ValueError(f"Coefficient of variation must be non-negative, got {self.cv}")
+
+    def sample(self, rng: np.random.Generator, mean_days: np.ndarray, replications: int) -> np.ndarray:
+        mean_days = np.broadcast_to(np.asarray(mean_days, dtype="float64"), (replications, len(mean_days)))
+        if self.kind == "fixed" or self.cv == 0:
+            return mean_days.copy()
+        if self.kind == "gamma":
+            shape = 1 / self.cv**2
+            return rng.gamma(shape, mean_days / shape)
+        if self.kind == "lognormal":
+            sigma2 = np.log1p(self.cv**2)
+            return rng.lognormal(np.log(mean_days) - sigma2 / 2, np.sqrt(sigma2))
+        # Triangular simétrica: desviación estándar = semiancho / sqrt(6)
+        half_width = self.cv * np.sqrt(6) * mean_days
+        return np.maximum(rng.triangular(mean_days - half_width, mean_days, mean_days + half_width), 0)
+
+
+@dataclass
+class ComponentScenario:
+    """Estado inicial del pool y cambios pendientes de un componente, con las fechas expresadas en días."""
+
+    component: str
+    pool_slots: np.ndarray
+    ready_days: np.ndarray
+    last_changeout_days: np.ndarray
+    pending_mean_days: np.ndarray
+    changeout_days: np.ndarray
+    changeout_slots: np.ndarray
+    changeout_mean_days: np.ndarray
+    changeout_weeks: np.ndarray
+
+    def initial_state(
+        self, rng: np.random.Generator, distribution: RepairTimeDistribution, replications: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        # Los slots sin llegada confirmada quedan disponibles tras un tiempo de reparación muestreado
+        pending = np.isnan(self.ready_days)
+        ready = np.broadcast_to(self.ready_days, (replications, len(self.pool_slots))).copy()
+        if pending.any():
+            durations = distribution.sample(rng, self.pending_mean_days[pending], replications)
+            ready[:, pending] = self.last_changeout_days[pending] + durations
+        last_changeout = np.broadcast_to(self.last_changeout_days, ready.shape).copy()
+        return ready, last_changeout
+
+    def with_capacity(self, capacity: int) -> "ComponentScenario":
+        """Mismo escenario con otra cantidad de slots.
+
+        Al reducir el pool se conservan los slots que quedan disponibles antes; al ampliarlo se agregan slots vacíos,
+        disponibles desde el inicio. Los cambios en línea bloqueada de un slot eliminado pasan a buscar slot.
+        """
+        n_slots = len(self.pool_slots)
+        order = np.lexsort((np.arange(n_slots), np.nan_to_num(self.ready_days, nan=np.inf)))
+        kept = np.sort(order[:capacity])
+        extra = max(capacity - n_slots, 0)
+        positions = np.full(n_slots + 1, -1, dtype="int64")
+        positions[kept] = np.arange(len(kept))
+        return ComponentScenario(
+            component=self.component,
+            pool_slots=np.concatenate([self.pool_slots[kept], np.full(extra, None, dtype=object)]),
+            ready_days=np.concatenate([self.ready_days[kept], np.full(extra, -np.inf)]),
+            last_changeout_days=np.concatenate([self.last_changeout_days[kept], np.full(extra, -np.inf)]),
+            pending_mean_days=np.concatenate([self.pending_mean_days[kept], np.full(extra, np.nan)]),
+            changeout_days=self.changeout_days,
+            changeout_slots=positions[self.changeout_slots],
+            changeout_mean_days=self.changeout_mean_days,
+            changeout_weeks=self.changeout_weeks,
+        )
+
+
+def days(dates: pd.Series) -> np.ndarray:
+    # Fechas como días flotantes desde epoch, NaT queda como NaN
+    ns = to_ns(dates)
+    return np.where(ns == NAT, np.nan, ns / DAY_NS)
+
+
+def build_scenarios(allocation: ComponentAllocation) -> Dict[str, ComponentScenario]:
+    """Extrae de una ComponentAllocation el último estado conocido de cada slot y los cambios por asignar."""
+    scenarios = {}
+    pool_slots_df = allocation.pool_slots_df
+    missing_cc_df = allocation.missing_cc_df.dropna(subset=["changeout_date"])
+    for component in missing_cc_df["component"].unique():
+        slots_df = (
+            pool_slots_df.loc[pool_slots_df["component"] == component]
+            .sort_values(["pool_slot", "changeout_date"])
+            .drop_duplicates(subset=["pool_slot"], keep="last")
+        )
+        slots_df = slots_df.loc[slots_df["pool_slot"].notnull()]
+        cc_df = missing_cc_df.loc[missing_cc_df["component"] == component]
+
+        # Los cambios en línea bloqueada ocupan su slot; si el slot no es parte del pool no consumen capacidad
+        slot_positions = pd.Series(np.arange(slots_df.shape[0]), index=slots_df["pool_slot"].to_numpy())
+        blocked_lane = (cc_df["pool_changeout_type"] == "E").to_numpy()
+        changeout_slots = np.where(
+            blocked_lane, slot_positions.reindex(cc_df["pool_slot"].to_numpy()).fillna(-2).to_numpy(), -1
+        ).astype("int64")
+        keep = changeout_slots != -2
+        cc_df = cc_df.loc[keep]
+
+        ready_days = days(slots_df["arrival_date"])
+        scenarios[component] = ComponentScenario(
+            component=component,
+            pool_slots=slots_df["pool_slot"].to_numpy(),
+            ready_days=ready_days,
+            last_changeout_days=days(slots_df["changeout_date"]),
+            pending_mean_days=get_ovh_days(slots_df).to_numpy(dtype="float64"),
+            changeout_days=days(cc_df["changeout_date"]),
+            changeout_slots=changeout_slots[keep],
+            changeout_mean_days=get_ovh_days(cc_df).to_numpy(dtype="float64"),
+            changeout_weeks=cc_df["changeout_week"].to_numpy(dtype=object),
+        )
+    return scenarios
+
+
+def shortage_kernel(
+    ready: np.ndarray,
+    last_changeout: np.ndarray,
+    changeout_days: np.ndarray,
+    changeout_slots: np.ndarray,
+    durations: np.ndarray,
+) -> np.ndarray:
+    """Asigna los cambios en orden para todas las réplicas a la vez y retorna una matriz (réplicas, cambios) que indica
+    los cambios sin slot disponible.
+
+    ready y last_changeout son matrices (réplicas, slots) con el día en que cada slot vuelve a estar disponible y el
+    día de su último cambio; se modifican en el lugar. Igual que find_available_pool_slot, un slot está disponible si
+    su componente ya llegó y su último cambio es anterior, y se elige el que lleva más tiempo sin cambios; la llegada es
+    el fin del tiempo de reparación y no una llegada confirmada. Un cambio sin slot se registra como faltante y no ocupa
+    el pool.
+    """
+    replications, _ = ready.shape
+    rows = np.arange(replications)
+    shortage = np.zeros((replications, len(changeout_days)), dtype=bool)
+    if ready.shape[1] == 0:
+        shortage[:] = True
+        return shortage
+    for position, (day, slot) in enumerate(zip(changeout_days, changeout_slots)):
+        if slot >= 0:
+            ready[:, slot] = day + durations[:, position]
+            last_changeout[:, slot] = day
+            continue
+        candidates = np.where((ready <= day) & (last_changeout < day), ready, np.inf)
+        chosen = candidates.argmin(axis=1)
+        allocated = candidates[rows, chosen] < np.inf
+        shortage[:, position] = ~allocated
+        chosen_rows, chosen_slots = rows[allocated], chosen[allocated]
+        ready[chosen_rows, chosen_slots] = day + durations[allocated, position]
+        last_changeout[chosen_rows, chosen_slots] = day
+    return shortage
+
+
+def simulate_component(
+    scenario: ComponentScenario,
+    distribution: RepairTimeDistribution,
+    replications: int,
+    rng: np.random.Generator,
+) -> np.ndarray:
+    # Los cambios se muestrean primero para que escenarios con distinta capacidad compartan sus tiempos de reparación
+    durations = distribution.sample(rng, scenario.changeout_mean_days, replications)
+    ready, last_changeout = scenario.initial_state(rng, distribution, replications)
+    return shortage_kernel(ready, last_changeout, scenario.changeout_days, scenario.changeout_slots, durations)
+
+
+def summarize_shortages(scenario: ComponentScenario, shortage: np.ndarray) -> pd.DataFrame:
+    # Los cambios vienen ordenados por fecha, por lo que cada semana es un tramo contiguo de columnas
+    weeks, starts = np.unique(scenario.changeout_weeks, return_index=True)
+    order = np.argsort(starts)
+    weeks, starts = weeks[order], starts[order]
+    if len(starts) == 0:
+        return pd.DataFrame(columns=["component", "week", "changeouts", "shortage_probability", "expected_shortages"])
+    counts = np.diff(np.append(starts, shortage.shape[1]))
+    shortages_per_week = np.add.reduceat(shortage, starts, axis=1)
+    return pd.DataFrame(
+        {
+            "component": scenario.component,
+            "week": weeks,
+            "changeouts": counts,
+            "shortage_probability": (shortages_per_week > 0).mean(axis=0),
+            "expected_shortages": shortages_per_week.mean(axis=0),
+        }
+    )
+
+
+def simulate_pool_shortage(
+    allocation: ComponentAllocation,
+    replications: int = 2000,
+    distributions: Optional[Dict[str, RepairTimeDistribution]] = None,
+    default_distribution: RepairTimeDistribution = RepairTimeDistribution(),
+    seed: Optional[int] = None,
+) -> pd.DataFrame:
+    """Simulación Monte Carlo de la falta de slots del pool con tiempos de reparación aleatorios.
+
+    Retorna, por componente y semana de cambio, la probabilidad de que al menos un cambio no encuentre slot disponible
+    ("No se pudo agregar componente") y el número esperado de cambios sin slot. Las llegadas de arrivals_df no se usan:
+    cada slot vuelve a estar disponible tras el tiempo de reparación muestreado.
+
+    El modelo difiere del de ComponentAllocation, que libera un slot sólo cuando una llegada real de arrivals_df
+    confirma su cambio (la llegada no confirmada más cercana a la fecha proyectada). Allí las reparaciones sin llegada
+    real, que incluyen todos los cambios posteriores a la última llegada informada, ocupan su slot indefinidamente, y
+    los cambios en línea bloqueada lo liberan en la arrival_date de blocked_lanes. Por eso la asignación puede fallar en
+    semanas donde la simulación con RepairTimeDistribution("fixed") no ve faltantes. Ambos coinciden cuando cada
+    reparación se confirma en su fecha proyectada (ver synthetic.confirm_at_projection y
+    benchmarks/check_simulation.py).
+    """
+    distributions = distributions or {}
+    rng = np.random.default_rng(seed)
+    frames = []
+    for component, scenario in build_scenarios(allocation).items():
+        distribution = distributions.get(component, default_distribution)
+        shortage = simulate_component(scenario, distribution, replications, rng)
+        frames.append(summarize_shortages(scenario, shortage))
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,227 @@
+"""Snapshots en Parquet de las planillas de planificación.
+
+Cada fuente (cambios de componentes, proyección base del pool, entregas y carriles bloqueados) se guarda, ya procesada
+por su lector, en un archivo Parquet tipado. El estado del archivo de origen (mtime, tamaño y hash) queda en los
+metadatos del Parquet: mientras el origen no cambie, el snapshot se lee en vez de volver a procesar la planilla. Si sólo
+cambia el mtime y el hash coincide, se actualizan los metadatos sin procesarla.
+
+La aplicación genera los snapshots a medida que los necesita (SourceLoader). El directorio por defecto
+(.cache/snapshots) está en el disco efímero del dyno, por lo que los snapshots duran lo que dura el dyno; para que
+sobrevivan a los reinicios, KVERSE_SNAPSHOT_DIR debe apuntar a un almacenamiento persistente (ver README). Ahí se pueden
+generar de antemano: python -m kverse.assets.pool.snapshots [fuentes] [--directory DIR] [--force]
+"""
+
+# Standard library imports
+import argparse
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from datetime import date, datetime, time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Union
+
+# Third-party imports
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Local imports
+from kverse.assets.pool.base_pool_proj import BASE_POOL_PROJ_PATH, read_base_pool_proj
+from kverse.assets.pool.blocked_lanes import BLOCKED_LANES_PATH, read_blocked_lanes
+from kverse.assets.pool.comp_arrivals import COMPONENT_ARRIVALS_PATH, read_component_arrivals
+from kverse.assets.pool.comp_changeouts import CC_PATH, read_cc
+
+# Constants
+
+# Cambiar al modificar un lector o el formato del snapshot, para volver a procesar todas las planillas
+SNAPSHOT_VERSION = 1
+DEFAULT_SNAPSHOT_DIR = os.environ.get("KVERSE_SNAPSHOT_DIR", ".cache/snapshots")
+METADATA_KEY = b"kverse_snapshot"
+TYPE_PREFIX = "__type__"
+CHUNK_SIZE = 2**20
+
+# Columnas object que mezclan tipos: cada valor se guarda como texto junto con el nombre de su tipo
+VALUE_TYPES = [
+    ("bool", (bool, np.bool_), lambda value: value == "True"),
+    ("int", (int, np.integer), int),
+    ("float", (float, np.floating), float),
+    ("Timestamp", (pd.Timestamp,), pd.Timestamp),
+    ("datetime", (datetime,), datetime.fromisoformat),
+    ("date", (date,), date.fromisoformat),
+    ("time", (time,), time.fromisoformat),
+    ("str", (str,), str),
+]
+PARSERS = {name: parser for name, _, parser in VALUE_TYPES}
+
+
+@dataclass(frozen=True)
+class Source:
+    path: str
+    reader: Callable[..., pd.DataFrame]
+
+
+SOURCES: Dict[str, Source] = {
+    "cc": Source(CC_PATH, read_cc),
+    "base_pool_proj": Source(BASE_POOL_PROJ_PATH, read_base_pool_proj),
+    "component_arrivals": Source(COMPONENT_ARRIVALS_PATH, read_component_arrivals),
+    "blocked_lanes": Source(BLOCKED_LANES_PATH, read_blocked_lanes),
+}
+
+
+def file_hash(path: Union[str, Path]) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        while chunk := file.read(CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def value_type(value) -> str:
+    for name, types, _ in VALUE_TYPES:
+        if isinstance(value, types):
+            return name
+    raise TypeError(f"Unsupported value {value!r} of type {type(value).__name__}")
+
+
+def encode_frame(df: pd.DataFrame) -> tuple:
+    # Frame con tipos Arrow y las columnas object que tuvieron que guardarse como texto
+    df = df.copy()
+    object_columns = df.columns[df.dtypes == object].to_list()
+    mixed_columns = []
+    for column in object_columns:
+        try:
+            pa.array(df[column], from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            values = df[column]
+            notnull = values.notnull()
+            df[f"{TYPE_PREFIX}{column}"] = values.where(~notnull, values[notnull].map(value_type))
+            df[column] = values.where(~notnull, values[notnull].astype(str))
+            mixed_columns.append(column)
+    return df, object_columns, mixed_columns
+
+
+def decode_frame(df: pd.DataFrame, object_columns: List[str], mixed_columns: List[str]) -> pd.DataFrame:
+    for column in mixed_columns:
+        types = df.pop(f"{TYPE_PREFIX}{column}").to_numpy(dtype=object)
+        values = df[column].to_numpy(dtype=object)
+        # Se asigna sobre el arreglo object para que pandas no convierta los valores (int a float, datetime a Timestamp)
+        for name in pd.unique(types[pd.notnull(types)]):
+            mask = types == name
+            values[mask] = [PARSERS[name](value) for value in values[mask]]
+        df[column] = pd.Series(values, index=df.index, dtype=object)
+    # Parquet devuelve con tipo numérico las columnas object que sólo tenían números, y None donde pandas usa NaN
+    for column in object_columns:
+        values = df[column].astype(object)
+        df[column] = values.where(values.notnull(), np.nan)
+    return df
+
+
+class SourceSnapshots:
+    def __init__(self, directory: Union[str, Path] = DEFAULT_SNAPSHOT_DIR, sources: Dict[str, Source] = SOURCES):
+        self.directory = Path(directory)
+        self.sources = sources
+
+    def snapshot_path(self, name: str) -> Path:
+        return self.directory / f"{name}.parquet"
+
+    def metadata(self, name: str) -> Optional[Dict]:
+        try:
+            metadata = pq.read_schema(self.snapshot_path(name)).metadata or {}
+        except (OSError, ValueError):
+            # Sin snapshot, o un archivo truncado o ajeno: se vuelve a procesar la planilla
+            return None
+        if METADATA_KEY not in metadata:
+            return None
+        metadata = json.loads(metadata[METADATA_KEY])
+        return metadata if metadata["version"] == SNAPSHOT_VERSION else None
+
+    def is_current(self, name: str, path: Optional[Union[str, Path]] = None) -> bool:
+        path = path or self.sources[name].path
+        metadata = self.metadata(name)
+        if metadata is None:
+            return False
+        stat = os.stat(path)
+        if (str(path), stat.st_mtime_ns, stat.st_size) == (metadata["source"], metadata["mtime_ns"], metadata["size"]):
+            return True
+        if stat.st_size != metadata["size"] or file_hash(path) != metadata["sha256"]:
+            return False
+        # Mismo contenido con otro mtime (p. ej. copiado de nuevo al desplegar): se registra el mtime actual
+        table = pq.read_table(self.snapshot_path(name))
+        self.write(name, table, {**metadata, "mtime_ns": stat.st_mtime_ns})
+        return True
+
+    def write(self, name: str, table: pa.Table, metadata: Dict) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), METADATA_KEY: json.dumps(metadata)})
+        # Se escribe a un archivo temporal y se reemplaza, para que un lector nunca vea un snapshot a medio escribir
+        tmp = self.directory / f".{name}.{os.getpid()}.tmp"
+        pq.write_table(table, tmp)
+        os.replace(tmp, self.snapshot_path(name))
+
+    def read(self, name: str) -> pd.DataFrame:
+        table = pq.read_table(self.snapshot_path(name))
+        metadata = json.loads(table.schema.metadata[METADATA_KEY])
+        return decode_frame(table.to_pandas(), metadata["object_columns"], metadata["mixed_columns"])
+
+    def build(self, name: str, path: Optional[Union[str, Path]] = None, **kwargs) -> pd.DataFrame:
+        # Procesa la planilla con su lector y guarda el snapshot; kwargs se pasan al lector
+        path = path or self.sources[name].path
+        stat = os.stat(path)
+        sha256 = file_hash(path)
+        df = self.sources[name].reader(path, **kwargs)
+        encoded, object_columns, mixed_columns = encode_frame(df)
+        metadata = {
+            "version": SNAPSHOT_VERSION,
+            "source": str(path),
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "sha256": sha256,
+            "object_columns": object_columns,
+            "mixed_columns": mixed_columns,
+        }
+        self.write(name, pa.Table.from_pandas(encoded), metadata)
+        return df
+
+    def load(self, name: str, path: Optional[Union[str, Path]] = None, **kwargs) -> pd.DataFrame:
+        # Lee el snapshot si está al día con la planilla y si no, la procesa y lo actualiza
+        if self.is_current(name, path):
+            try:
+                return self.read(name)
+            except (OSError, ValueError, KeyError):
+                # Metadatos legibles pero datos dañados
+                pass
+        return self.build(name, path, **kwargs)
+
+    def build_all(self, names: Optional[Iterable[str]] = None, force: bool = False) -> Dict[str, str]:
+        status = {}
+        for name in names or self.sources:
+            if not os.path.exists(self.sources[name].path):
+                status[name] = "missing"
+            elif not force and self.is_current(name):
+                status[name] = "current"
+            else:
+                self.build(name)
+                status[name] = "built"
+        return status
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, str]:
+    parser = argparse.ArgumentParser(description="Genera los snapshots en Parquet de las planillas de planificación")
+    parser.add_argument("sources", nargs="*", help=f"fuentes a generar ({', '.join(SOURCES)}), por defecto todas")
+    parser.add_argument("--directory", default=DEFAULT_SNAPSHOT_DIR)
+    parser.add_argument("--force", action="store_true", help="volver a procesar aunque el snapshot esté al día")
+    args = parser.parse_args(argv)
+    unknown = set(args.sources) - set(SOURCES)
+    if unknown:
+        parser.error(f"unknown sources: {', '.join(sorted(unknown))}")
+
+    status = SourceSnapshots(args.directory).build_all(args.sources, force=args.force)
+    for name, state in status.items():
+        print(f"{name}: {state}")
+    return status
+
+
+if __name__ == "__main__":
+    main()
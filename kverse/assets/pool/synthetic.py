@@ -0,0 +1,326 @@
+"""Flota sintética con los mismos esquemas que entregan los lectores de planillas.
+
+Permite ejecutar ComponentAllocation y los gráficos del pool sin los archivos de DATA/PLAN, por ejemplo para medir
+cómo escalan con el tamaño de la flota.
+"""
+
+# Standard library imports
+from dataclasses import dataclass
+from datetime import datetime
+from io import StringIO
+from typing import Tuple, Union
+
+# Third-party imports
+import numpy as np
+import openpyxl
+import pandas as pd
+
+# Local imports
+from kverse.assets.pool.base_pool_proj import read_base_pool_proj
+from kverse.assets.pool.component_allocation import (
+    CHANGEOUT_START_DATE,
+    ComponentAllocation,
+    ComponentType,
+    add_arrival_date_proj,
+    iso_week,
+)
+
+# Constants
+
+# Nombres de los componentes en la planilla de seguimiento de entregas
+ARRIVALS_COMPONENT_NAMES = {
+    ComponentType.BP.value.code: "Blower parrillas 930 - 960",
+    ComponentType.CD.value.code: "Cil. de dirección 960",
+    ComponentType.CL.value.code: "Cil. de levante 960",
+    ComponentType.MT.value.code: "Motor de tracción 960",
+    ComponentType.MP.value.code: "Módulo Potencia 960",
+    ComponentType.CMS.value.code: "Suspensión delantera 960",
+    ComponentType.ST.value.code: "Suspensión trasera 960",
+}
+# Subcomponentes ya normalizados con clean_string
+SUBCOMPONENTS = {
+    ComponentType.MT.value.code: ["motor_traccion"],
+    ComponentType.CMS.value.code: ["suspension_delantera"],
+    ComponentType.MP.value.code: ["motor", "alternador_principal", "radiador"],
+}
+# Rellenos de la planilla del pool durante la reparación, según tipo de cambio (ver get_end_week)
+POOL_REPAIR_FILLS = {"P": "FFC5E0B4", "I": "FFEDBFBB"}
+ARRIVAL_VALUE_FORMATS = ["REAL {date}", "PROYECTADO {date}", "REPROGRAMADO\n{date}", "X1 REAL {date}", None]
+POOL_CHANGEOUT_TYPES = np.array(["P", "I", "N", None], dtype=object)
+POOL_CHANGEOUT_TYPE_PROBABILITIES = [0.5, 0.35, 0.05, 0.1]
+# Volumen actual aproximado: flota 960E y slots de pool por componente
+CURRENT_N_EQUIPOS = 40
+CURRENT_POOL_SLOTS = 12
+
+
+@dataclass
+class SyntheticFleet:
+    cc_df: pd.DataFrame
+    pool_proj_df: pd.DataFrame
+    arrivals_df: pd.DataFrame
+    blocked_lanes: pd.DataFrame
+
+    def to_tuple(self) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+        # Mismo orden de argumentos que ComponentAllocation
+        return self.cc_df, self.pool_proj_df, self.arrivals_df, self.blocked_lanes
+
+
+def changeout_week(dates: pd.Series) -> pd.Series:
+    # Formato de read_cc: año calendario y semana de la planilla sin ceros a la izquierda
+    return dates.dt.year.astype(str) + "-W" + dates.dt.isocalendar()["week"].astype(int).astype(str)
+
+
+def monday_week(dates: pd.Series) -> pd.Series:
+    # Formato "%Y-W%W" de las planillas de pool y de entregas
+    return dates.dt.strftime("%Y-W%W")
+
+
+def make_fleet(
+    n_equipos: int = CURRENT_N_EQUIPOS,
+    years: int = 2,
+    pool_slots: int = CURRENT_POOL_SLOTS,
+    changeouts_per_equipo_year: float = 0.25,
+    blocked_lane_share: float = 0.05,
+    seed: int = 0,
+) -> SyntheticFleet:
+    """Genera cc_df, pool_proj_df, arrivals_df y blocked_lanes de forma determinista para una semilla dada.
+
+    Cada componente tiene pool_slots slots con un cambio anterior a CHANGEOUT_START_DATE, y cambios nuevos durante
+    years años. Las llegadas reales se informan hasta la mitad del horizonte y las posteriores quedan proyectadas.
+    """
+    rng = np.random.default_rng(seed)
+    start = CHANGEOUT_START_DATE
+    as_of = start + pd.Timedelta(days=365 * years // 2)
+    equipos = np.arange(1, n_equipos + 1) + 100
+
+    cc_frames, pool_frames, arrival_frames, blocked_frames = [], [], [], []
+    for component in ComponentType:
+        code = component.value.code
+        subcomponents = SUBCOMPONENTS.get(code, [code])
+
+        # Estado base del pool: último cambio de cada slot antes del inicio de la proyección
+        base_dates = start - pd.to_timedelta(rng.integers(30, 200, pool_slots), unit="D")
+        base_types = rng.choice(["P", "I"], pool_slots)
+        base_repair_days = np.where(
+            base_types == "P", component.value.planned_ovh_days, component.value.unplanned_ovh_days
+        )
+        base_arrivals = pd.Series(base_dates + pd.to_timedelta(base_repair_days, unit="D"))
+        base = pd.DataFrame(
+            {
+                "equipo": rng.choice(equipos, pool_slots).astype(str),
+                "component": code,
+                "subcomponent": rng.choice(subcomponents, pool_slots),
+                "position": rng.integers(1, 3, pool_slots).astype(str),
+                "component_serial": [f"#{code[:3].upper()}P{slot}" for slot in range(1, pool_slots + 1)],
+                "changeout_date": base_dates,
+                "component_hours": rng.integers(1_000, 30_000, pool_slots).astype(float),
+                "tbo_hours": 20_000.0,
+                "pool_changeout_type": base_types,
+            }
+        )
+        base["changeout_week"] = changeout_week(base["changeout_date"])
+        pool_frames.append(
+            base[["equipo", "component", "component_serial", "changeout_week", "pool_changeout_type"]].assign(
+                changeout_date=base["changeout_date"].dt.strftime("%Y-%m-%d"),
+                pool_slot=np.arange(1, pool_slots + 1),
+                arrival_week=monday_week(base_arrivals).where(base_arrivals < start),
+            )
+        )
+
+        # Cambios dentro del horizonte
+        n_changeouts = rng.poisson(changeouts_per_equipo_year * n_equipos * years)
+        dates = pd.Series(
+            start + pd.to_timedelta(np.sort(rng.integers(0, 365 * years, n_changeouts)), unit="D"),
+            dtype="datetime64[ns]",
+        )
+        changeouts = pd.DataFrame(
+            {
+                "equipo": rng.choice(equipos, n_changeouts).astype(str),
+                "component": code,
+                "subcomponent": rng.choice(subcomponents, n_changeouts),
+                "position": rng.integers(1, 3, n_changeouts).astype(str),
+                "component_serial": [f"#{code[:3].upper()}{number}" for number in range(n_changeouts)],
+                "changeout_date": dates,
+                "component_hours": rng.integers(1_000, 30_000, n_changeouts).astype(float),
+                "tbo_hours": 20_000.0,
+                "pool_changeout_type": rng.choice(
+                    POOL_CHANGEOUT_TYPES, n_changeouts, p=POOL_CHANGEOUT_TYPE_PROBABILITIES
+                ),
+            }
+        ).drop_duplicates(subset=["equipo", "changeout_date"])
+        changeouts["changeout_week"] = changeout_week(changeouts["changeout_date"])
+        cc_frames += [base, changeouts]
+
+        # Cambios en espera de aprobación (línea bloqueada)
+        pooled = changeouts.loc[changeouts["pool_changeout_type"] != "N"]
+        blocked = pooled.loc[rng.random(pooled.shape[0]) < blocked_lane_share]
+        blocked_frames.append(
+            pd.DataFrame(
+                {
+                    "component": code,
+                    "equipo": blocked["equipo"].to_numpy(),
+                    "pool_slot": rng.integers(1, pool_slots + 1, blocked.shape[0]).astype(float),
+                    "changeout_date": blocked["changeout_date"].to_numpy(),
+                    "arrival_date": (
+                        blocked["changeout_date"] + pd.to_timedelta(rng.integers(10, 60, blocked.shape[0]), unit="D")
+                    ).to_numpy(),
+                }
+            )
+        )
+
+        # Entregas: reales hasta as_of, proyectadas después
+        repair_days = np.where(
+            pooled["pool_changeout_type"] == "P", component.value.planned_ovh_days, component.value.unplanned_ovh_days
+        )
+        arrivals = pooled.assign(
+            arrival_date=(
+                pooled["changeout_date"]
+                + pd.to_timedelta(repair_days + rng.integers(-20, 30, pooled.shape[0]), unit="D")
+            ).dt.normalize()
+        )
+        arrivals = arrivals.loc[rng.random(arrivals.shape[0]) < 0.95]
+        arrival_types = np.where(arrivals["arrival_date"] < as_of, "REAL", "PROYECTADO")
+        arrival_frames.append(
+            pd.DataFrame(
+                {
+                    "Componente": ARRIVALS_COMPONENT_NAMES[code],
+                    "N°": rng.integers(1, 3, arrivals.shape[0]).astype(str),
+                    "arrival_projection_week": (as_of - pd.Timedelta(weeks=1)).strftime("%Y-W%W"),
+                    "arrival_week": monday_week(arrivals["arrival_date"]).to_numpy(),
+                    "value": arrival_types + " " + arrivals["arrival_date"].dt.strftime("%d-%m-%Y").to_numpy(),
+                    "arrival_date": arrivals["arrival_date"].to_numpy(),
+                    "arrival_type": arrival_types,
+                    "component": code,
+                }
+            )
+        )
+
+    cc_df = pd.concat(cc_frames, ignore_index=True).assign(MODÉLO="960E")
+    cc_df = cc_df[
+        [
+            "equipo",
+            "component",
+            "subcomponent",
+            "position",
+            "component_serial",
+            "changeout_week",
+            "changeout_date",
+            "component_hours",
+            "tbo_hours",
+            "pool_changeout_type",
+            "MODÉLO",
+        ]
+    ]
+    # El pool base pasa por el mismo lector que pool_proj.csv
+    pool_proj_df = read_base_pool_proj(StringIO(pd.concat(pool_frames, ignore_index=True).to_csv(index=False)))
+    arrivals_df = (
+        pd.concat(arrival_frames, ignore_index=True).sort_values(["Componente", "arrival_date"]).reset_index(drop=True)
+    )
+    blocked_lanes = pd.concat(blocked_frames, ignore_index=True)
+    return SyntheticFleet(cc_df, pool_proj_df, arrivals_df, blocked_lanes)
+
+
+def make_scaled_fleet(scale: float, seed: int = 0, **kwargs) -> SyntheticFleet:
+    # Escala la flota y el pool en la misma proporción respecto del volumen actual
+    n_equipos = int(round(kwargs.pop("n_equipos", CURRENT_N_EQUIPOS) * scale))
+    pool_slots = int(round(kwargs.pop("pool_slots", CURRENT_POOL_SLOTS) * scale))
+    return make_fleet(n_equipos=n_equipos, pool_slots=pool_slots, seed=seed, **kwargs)
+
+
+def confirm_at_projection(fleet: SyntheticFleet) -> SyntheticFleet:
+    """Misma flota sin líneas bloqueadas y con cada reparación confirmada por una llegada real en su fecha proyectada.
+
+    Es el escenario en que ComponentAllocation libera los slots igual que la simulación con tiempos fijos: cada slot
+    vuelve a estar disponible cuando termina su reparación (changeout_date más los días de overhaul).
+    """
+    blocked_lanes = fleet.blocked_lanes.iloc[:0]
+    allocation = ComponentAllocation(fleet.cc_df, fleet.pool_proj_df, fleet.arrivals_df, blocked_lanes)
+    pool_slots_df = allocation.pool_slots_df
+    repairs = pd.concat(
+        [
+            pool_slots_df.loc[pool_slots_df["arrival_status"] == "unconfirmed"],
+            add_arrival_date_proj(allocation.missing_cc_df),
+        ]
+    )
+    arrival_dates = repairs["arrival_date_proj"].reset_index(drop=True)
+    arrivals_df = pd.DataFrame(
+        {
+            "Componente": repairs["component"].map(ARRIVALS_COMPONENT_NAMES).to_numpy(),
+            "N°": "1",
+            # Semana con el formato de changeout_week, para que la llegada se procese antes de los cambios de su semana
+            "arrival_week": iso_week(arrival_dates).to_numpy(),
+            "value": ("REAL " + arrival_dates.dt.strftime("%d-%m-%Y")).to_numpy(),
+            "arrival_date": arrival_dates.to_numpy(),
+            "arrival_type": "REAL",
+            "component": repairs["component"].to_numpy(),
+        }
+    )
+    arrivals_df = arrivals_df.sort_values(["Componente", "arrival_date"]).reset_index(drop=True)
+    return SyntheticFleet(fleet.cc_df, fleet.pool_proj_df, arrivals_df, blocked_lanes)
+
+
+def write_arrivals_workbook(
+    path, n_sheets: int = 30, n_weeks: int = 52, fill_rate: float = 0.15, year: int = 2024, seed: int = 0
+) -> Union[str, object]:
+    """Planilla de seguimiento de entregas con una hoja por semana de proyección, como la que lee
+    read_component_arrivals.
+
+    Cada hoja tiene el título en la primera fila, los lunes del año como encabezado y dos filas (N° 1 y 2) por
+    componente. Las celdas con entrega mezclan texto con la fecha dd-mm-yyyy y celdas de fecha.
+    """
+    rng = np.random.default_rng(seed)
+    mondays = pd.date_range(datetime.strptime(f"{year}-W1-1", "%Y-W%W-%w"), periods=n_weeks, freq="7D")
+    workbook = openpyxl.Workbook()
+    workbook.remove(workbook.active)
+    for week in range(1, n_sheets + 1):
+        sheet = workbook.create_sheet(f"W{week}-W{week + 1}")
+        sheet.append([f"Seguimiento entregas semana {week}"])
+        sheet.append(["Componente", "N°"] + [monday.to_pydatetime() for monday in mondays])
+        for name in ARRIVALS_COMPONENT_NAMES.values():
+            for number in (1, 2):
+                row = [name if number == 1 else None, number]
+                for monday in mondays:
+                    if rng.random() >= fill_rate:
+                        row.append(None)
+                        continue
+                    arrival = monday + pd.Timedelta(days=int(rng.integers(0, 5)))
+                    value_format = ARRIVAL_VALUE_FORMATS[rng.integers(len(ARRIVAL_VALUE_FORMATS))]
+                    row.append(
+                        arrival.to_pydatetime()
+                        if value_format is None
+                        else value_format.format(date=arrival.strftime("%d-%m-%Y"))
+                    )
+                sheet.append(row)
+    workbook.save(path)
+    return path
+
+
+def write_pool_workbook(path, pool_proj_df: pd.DataFrame, margin_weeks: int = 8) -> Union[str, object]:
+    """Planilla del pool con una hoja por componente, como la que lee read_pool_workbook.
+
+    Cada fila es un slot (N°1, N°2, ...) y cada columna un lunes. El cambio se marca con un 1 y un comentario con equipo
+    y NS, y la reparación con el relleno de su tipo desde la semana siguiente hasta la semana de llegada.
+    """
+    changeouts = pd.to_datetime(pool_proj_df["changeout_date"])
+    mondays = pd.date_range(
+        (changeouts.min() - pd.Timedelta(weeks=margin_weeks)).to_period("W-SUN").start_time,
+        pool_proj_df["arrival_date"].max() + pd.Timedelta(weeks=margin_weeks),
+        freq="7D",
+    )
+    workbook = openpyxl.Workbook()
+    workbook.remove(workbook.active)
+    for component, component_df in pool_proj_df.groupby("component", sort=False):
+        sheet = workbook.create_sheet(component.replace("_", " ").title())
+        sheet.append(["N°"] + [monday.to_pydatetime() for monday in mondays])
+        for slot in range(1, int(component_df["pool_slot"].max()) + 1):
+            sheet.append([f"N°{slot}"] + [None] * len(mondays))
+        for row in component_df.itertuples():
+            changeout_column = mondays.searchsorted(pd.Timestamp(row.changeout_date), side="right") + 1
+            cell = sheet.cell(row=int(row.pool_slot) + 1, column=changeout_column, value=1)
+            cell.comment = openpyxl.comments.Comment(f"Equipo: {row.equipo} NS: {row.component_serial}", "kverse")
+            end_column = len(mondays) + 1 if pd.isnull(row.arrival_date) else mondays.searchsorted(row.arrival_date) + 2
+            fill = openpyxl.styles.PatternFill("solid", fgColor=POOL_REPAIR_FILLS[row.pool_changeout_type])
+            for column in range(changeout_column + 1, end_column + 1):
+                sheet.cell(row=int(row.pool_slot) + 1, column=column).fill = fill
+    workbook.save(path)
+    return path
@@ -1,5 +1,52 @@
 import pandas as pd
+import numpy as np
 import re
+import unicodedata
+import zipfile
+from dataclasses import dataclass
+from functools import lru_cache
+from openpyxl.comments.comment_sheet import CommentSheet
+from openpyxl.packaging.relationship import get_dependents, get_rels_path
+from openpyxl.reader.workbook import WorkbookParser
+from openpyxl.utils.cell import coordinate_to_tuple
+from openpyxl.xml.constants import ARC_WORKBOOK, COMMENTS_NS
+from openpyxl.xml.functions import fromstring
+
+from kverse.utils import process_context
+
+# Rellenos que marcan la reparación de un componente en la planilla del pool
+END_WEEK_FILLS = ["FFEDBFBB", "FFC5E0B4", "FFE88880"]
+# get_end_week compara contra '"FFE88880"' (con comillas), por lo que sólo FFEDBFBB se clasifica como imprevisto
+UNPLANNED_FILLS = ["FFEDBFBB"]
+# Relleno de las celdas sin estilo
+DEFAULT_FILL = "00000000"
+
+
+# typed=True: True, 1 y 1.0 son iguales como claves pero str() los convierte en textos distintos
+@lru_cache(maxsize=4096, typed=True)
+def clean_string(s):
+    # Remove accents
+    s = str(s)
+    if s is not None:
+
+        s = s.lower()
+        s = "".join(c for c in unicodedata.normalize("NFD", s) if unicodedata.category(c) != "Mn")
+
+        # Replace whitespaces with underscore
+        s = re.sub(r"\s+", "_", s)
+
+        # Remove all non-alphanumeric characters except underscore
+        s = re.sub(r"[^\w]+", "", s)
+        s = {"cms": "conjunto_masa_suspension_delantera"}.get(s, s)
+    return s
+
+
+def clean_strings(values):
+    # clean_string sobre una columna, una sola vez por valor distinto (clean_string parte con str(s), por lo que
+    # agrupar por el texto da el mismo resultado y evita que 1 y 1.0 se confundan)
+    codes, uniques = pd.factorize(values.astype(str))
+    cleaned = np.array([clean_string(value) for value in uniques], dtype=object)
+    return pd.Series(cleaned[codes], index=values.index, dtype=object)
 
 
 # Function to extract information from comments
@@ -58,3 +105,115 @@ def get_end_week(row, sheet):
                     pool_changeout_types.append("P")
 
     return pd.Series({"weeks": weeks, "pool_changeout_type": pool_changeout_types})
+
+
+@dataclass
+class PoolGrid:
+    """Valores, rellenos y comentarios de una hoja de la planilla del pool, leídos en una sola pasada.
+
+    Las columnas son las de la hoja: la 0 tiene el N° del slot y weeks los encabezados de cada columna.
+    """
+
+    weeks: list
+    values: np.ndarray
+    fills: np.ndarray
+    comments: np.ndarray
+
+    @property
+    def labels(self) -> np.ndarray:
+        return self.values[:, 0]
+
+
+def sheet_comments(archive: zipfile.ZipFile) -> dict:
+    # Hoja -> {(fila, columna) base 1: texto}, leídos del .xlsx porque openpyxl no carga comentarios en modo sólo lectura
+    parser = WorkbookParser(archive, ARC_WORKBOOK)
+    parser.parse()
+    comments = {}
+    for sheet, relationship in parser.find_sheets():
+        sheet_comments = comments.setdefault(sheet.name, {})
+        rels_path = get_rels_path(relationship.target)
+        if rels_path not in archive.namelist():
+            continue
+        for comments_rel in get_dependents(archive, rels_path).find(COMMENTS_NS):
+            comment_sheet = CommentSheet.from_tree(fromstring(archive.read(comments_rel.target)))
+            for ref, comment in comment_sheet.comments:
+                sheet_comments[coordinate_to_tuple(ref)] = comment.text
+    return comments
+
+
+def scan_pool_sheet(ws, comments: dict) -> PoolGrid:
+    # Recorre las filas de una hoja abierta con read_only=True guardando el valor y el id de relleno de cada celda
+    rows = ws.iter_rows()
+    weeks = [cell.value for cell in next(rows)]
+    values, fill_ids, fill_rgbs = [], [], {}
+    for row in rows:
+        values.append([cell.value for cell in row])
+        row_fills = []
+        for cell in row:
+            style = getattr(cell, "style_array", None)
+            fill_id = -1 if style is None else style.fillId
+            if fill_id not in fill_rgbs:
+                rgb = cell.fill.fgColor.rgb if style is not None else DEFAULT_FILL
+                fill_rgbs[fill_id] = rgb if isinstance(rgb, str) else None
+            row_fills.append(fill_id)
+        fill_ids.append(row_fills)
+
+    n_columns = max([len(weeks)] + [len(row) for row in values])
+    weeks = weeks + [None] * (n_columns - len(weeks))
+    grid_values = np.full((len(values), n_columns), None, dtype=object)
+    grid_fills = np.full((len(values), n_columns), -1, dtype=np.int64)
+    for i, (row_values, row_fills) in enumerate(zip(values, fill_ids)):
+        grid_values[i, : len(row_values)] = row_values
+        grid_fills[i, : len(row_fills)] = row_fills
+    fill_rgbs.setdefault(-1, DEFAULT_FILL)
+    fill_ids, rgbs = zip(*fill_rgbs.items())
+    lookup = np.full(max(fill_ids) + 2, None, dtype=object)
+    lookup[list(fill_ids)] = rgbs
+
+    grid_comments = np.full(grid_values.shape, "", dtype=object)
+    for (row, column), text in comments.items():
+        if 2 <= row < len(values) + 2 and 1 <= column <= n_columns:
+            grid_comments[row - 2, column - 1] = text
+    return PoolGrid(weeks, grid_values, lookup[grid_fills], grid_comments)
+
+
+def grid_changeouts(grid: PoolGrid) -> pd.DataFrame:
+    # Equivalente a get_weeks_and_comments: celdas con 1, con la semana de la columna y el comentario de la celda
+    rows, columns = np.nonzero(grid.values[:, 1:] == 1)
+    columns = columns + 1
+    return pd.DataFrame(
+        {
+            "row": rows,
+            "column": columns,
+            "week": np.array(grid.weeks, dtype=object)[columns],
+            "comment": grid.comments[rows, columns],
+        }
+    )
+
+
+def grid_end_weeks(grid: PoolGrid) -> pd.DataFrame:
+    """Equivalente a get_end_week sobre todas las filas a la vez.
+
+    Una reparación termina en una celda vacía con uno de los rellenos de END_WEEK_FILLS cuando la celda siguiente tiene
+    otro relleno. Como en get_end_week, se revisan las celdas de la columna 2 a la antepenúltima.
+    """
+    previous = grid.fills[:, 2:-2]
+    following = grid.fills[:, 3:-1]
+    ended = (previous != following) & pd.isnull(grid.values[:, 2:-2]) & np.isin(previous.astype(str), END_WEEK_FILLS)
+    rows, columns = np.nonzero(ended)
+    fills = previous[rows, columns]
+    columns = columns + 2
+    return pd.DataFrame(
+        {
+            "row": rows,
+            "column": columns,
+            "week": np.array(grid.weeks, dtype=object)[columns],
+            "pool_changeout_type": repair_fill_types(fills),
+        }
+    )
+
+
+def repair_fill_types(fills: np.ndarray) -> np.ndarray:
+    # Tipo de cambio según el relleno de reparación: "I" imprevisto, "P" programado y None si no es de reparación
+    fills = fills.astype(str)
+    return np.where(np.isin(fills, UNPLANNED_FILLS), "I", np.where(np.isin(fills, END_WEEK_FILLS), "P", None))
@@ -1,43 +1,233 @@
 import pdfplumber
-import pandas as pd
 from pathlib import Path
-import re
-
+import hashlib
 import json
-import pickle
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
+from pdfminer.pdftypes import PDFObjRef, PDFStream
 
-def read_all_tables(pdf_path):
-    """Extract all tables from PDF and return a list of their basic info"""
+from kverse.utils import process_context
+
+# Pages handed to a worker per task in parallel mode
+PAGES_PER_TASK = 8
+DEFAULT_CACHE_DIR = os.environ.get("KVERSE_RESO_CACHE_DIR", ".cache/reso")
+# Bump when the table cleaning or the formatting changes, to invalidate the cached pages and documents
+EXTRACTION_VERSION = 2
+
+
+def file_hash(pdf_path):
+    digest = hashlib.sha256()
+    with open(pdf_path, "rb") as file:
+        while chunk := file.read(2**20):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def settings_hash(table_settings=None):
+    settings = {"version": EXTRACTION_VERSION, "table_settings": table_settings or {}}
+    return hashlib.sha256(json.dumps(settings, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def object_digest(obj, memo, visiting=frozenset()):
+    """Digest of a PDF object and everything it references (XObjects, fonts and their programs, ...)"""
+    if isinstance(obj, PDFObjRef):
+        if obj.objid in memo:
+            return memo[obj.objid]
+        if obj.objid in visiting:
+            return f"ref:{obj.objid}".encode()
+        digest = object_digest(obj.resolve(), memo, visiting | {obj.objid})
+        memo[obj.objid] = digest
+        return digest
+    digest = hashlib.sha256(type(obj).__name__.encode())
+    if isinstance(obj, PDFStream):
+        digest.update(object_digest(obj.attrs, memo, visiting))
+        digest.update(obj.get_data())
+    elif isinstance(obj, dict):
+        # Parent points back up the page tree, which doesn't change what the page draws
+        for key in sorted(key for key in obj if key != "Parent"):
+            digest.update(str(key).encode())
+            digest.update(object_digest(obj[key], memo, visiting))
+    elif isinstance(obj, (list, tuple)):
+        for item in obj:
+            digest.update(object_digest(item, memo, visiting))
+    else:
+        digest.update(repr(obj).encode())
+    return digest.digest()
+
+
+def page_hash(page, memo=None):
+    """Digest of what the tables of a page are extracted from: its geometry, content streams and resources
+
+    Resources are hashed with everything they reference, including Form XObjects drawn with Do and the fonts' widths
+    and programs. memo keeps the digests of shared objects by id, so pass the same dict for pages of one document.
+    """
+    memo = {} if memo is None else memo
+    digest = hashlib.sha256(repr((page.bbox, page.rotation)).encode())
+    digest.update(object_digest(page.page_obj.contents, memo))
+    digest.update(object_digest(page.page_obj.resources or {}, memo))
+    return digest.hexdigest()
+
+
+class PageTableCache:
+    """Persistent cache of the tables extracted from each page, and of the formatted tables of whole documents
+
+    Pages are keyed by their content and the extraction settings, not by the file or the page number, so an amended
+    report only re-extracts the pages that changed, even if pages were inserted or removed before them.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR):
+        self.directory = Path(directory)
+
+    def page_key(self, page, table_settings=None, memo=None):
+        return hashlib.sha256(f"{settings_hash(table_settings)}-{page_hash(page, memo)}".encode()).hexdigest()
+
+    def document_key(self, pdf_path, table_settings=None):
+        return f"{file_hash(pdf_path)}-{settings_hash(table_settings)}"
+
+    def _path(self, kind, key):
+        return self.directory / kind / f"{key}.json"
+
+    def _read(self, kind, key):
+        try:
+            return json.loads(self._path(kind, key).read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+
+    def _write(self, kind, key, value):
+        path = self._path(kind, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file and replace, so a reader never sees a half-written entry
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(value, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def has_page(self, key):
+        return self._path("pages", key).exists()
+
+    def get_page(self, key, page_num):
+        entries = self._read("pages", key)
+        return None if entries is None else [{"page": page_num, **entry} for entry in entries]
+
+    def put_page(self, key, table_info):
+        self._write("pages", key, [{k: v for k, v in info.items() if k != "page"} for info in table_info])
+
+    def get_document(self, key):
+        return self._read("documents", key)
+
+    def put_document(self, key, formatted_tables):
+        self._write("documents", key, formatted_tables)
+
+
+def read_page_tables(page, page_num, table_settings=None):
+    """Extract the non-empty tables of a single page"""
     table_info = []
+    for table_num, table in enumerate(page.extract_tables(table_settings), 1):
+        # Clean table data
+        cleaned_table = []
+        for row in table:
+            cleaned_row = [str(cell).strip() if cell is not None else "" for cell in row]
+            if any(cleaned_row):  # Only include non-empty rows
+                cleaned_table.append(cleaned_row)
 
-    with pdfplumber.open(pdf_path) as pdf:
-        for page_num, page in enumerate(pdf.pages, 1):
-            tables = page.extract_tables()
-
-            for table_num, table in enumerate(tables, 1):
-                # Clean table data
-                cleaned_table = []
-                for row in table:
-                    cleaned_row = [str(cell).strip() if cell is not None else "" for cell in row]
-                    if any(cleaned_row):  # Only include non-empty rows
-                        cleaned_table.append(cleaned_row)
-
-                if cleaned_table:
-                    # Get basic info about the table
-                    info = {
-                        "page": page_num,
-                        "table_number": table_num,
-                        "data": cleaned_table,
-                    }
-                    table_info.append(info)
-
-    # table_info = merge_split_tables(table_info)
+        if cleaned_table:
+            # Get basic info about the table
+            info = {
+                "page": page_num,
+                "table_number": table_num,
+                "data": cleaned_table,
+            }
+            table_info.append(info)
     return table_info
 
 
-def merge_split_tables(tables):
-    merged = []
+def read_pages(pdf_path, page_indices, table_settings=None):
+    """Extract the tables of the given pages (0-based), one list per page; runs inside the worker processes"""
+    results = []
+    with pdfplumber.open(pdf_path) as pdf:
+        for page_index in page_indices:
+            page = pdf.pages[page_index]
+            results.append(read_page_tables(page, page_index + 1, table_settings))
+            # Drop the parsed layout objects so memory doesn't grow with the page count
+            page.close()
+    return results
+
+
+def iter_tables(
+    pdf_path, parallel=False, max_workers=None, pages_per_task=PAGES_PER_TASK, table_settings=None, cache=None
+):
+    """Yield the tables of the PDF in page order
+
+    With parallel=True page ranges are extracted in a process pool. Only a couple of ranges per worker are in flight
+    at a time, so memory stays bounded regardless of the PDF length. With a PageTableCache, pages already extracted
+    with the same settings are read from the cache and only the rest go through pdfplumber.
+    """
+    with pdfplumber.open(pdf_path) as pdf:
+        # Digests of the objects shared between pages (fonts, XObjects), computed once per document
+        memo = {}
+        if not parallel:
+            for page_num, page in enumerate(pdf.pages, 1):
+                key = cache.page_key(page, table_settings, memo) if cache else None
+                table_info = cache.get_page(key, page_num) if cache else None
+                if table_info is None:
+                    table_info = read_page_tables(page, page_num, table_settings)
+                    if cache:
+                        cache.put_page(key, table_info)
+                yield from table_info
+                page.close()
+            return
+
+        keys = [cache.page_key(page, table_settings, memo) if cache else None for page in pdf.pages]
+
+    # Runs of consecutive pages to extract, split in tasks of up to pages_per_task pages, and cached pages in between
+    segments = []
+    for page_index, key in enumerate(keys):
+        if cache and cache.has_page(key):
+            segments.append((None, page_index))
+        elif segments and segments[-1][0] is not None and len(segments[-1][0]) < pages_per_task:
+            segments[-1][0].append(page_index)
+        else:
+            segments.append(([page_index], None))
+    tasks = [indices for indices, _ in segments if indices is not None]
+    if not tasks:
+        for _, page_index in segments:
+            yield from cache.get_page(keys[page_index], page_index + 1)
+        return
+
+    n_workers = max(min(max_workers or os.cpu_count() or 1, len(tasks)), 1)
+    with ProcessPoolExecutor(max_workers=n_workers, mp_context=process_context()) as executor:
+        tasks = iter(tasks)
+        pending = deque()
+
+        def submit_next():
+            indices = next(tasks, None)
+            if indices is not None:
+                pending.append(executor.submit(read_pages, str(pdf_path), indices, table_settings))
+
+        for _ in range(2 * n_workers):
+            submit_next()
+        for indices, page_index in segments:
+            if indices is None:
+                yield from cache.get_page(keys[page_index], page_index + 1)
+                continue
+            results = pending.popleft().result()
+            submit_next()
+            for page_index, table_info in zip(indices, results):
+                if cache:
+                    cache.put_page(keys[page_index], table_info)
+                yield from table_info
+
+
+def read_all_tables(pdf_path, parallel=False, max_workers=None, table_settings=None, cache=None):
+    """Extract all tables from PDF and return a list of their basic info"""
+    return list(
+        iter_tables(pdf_path, parallel=parallel, max_workers=max_workers, table_settings=table_settings, cache=cache)
+    )
+
+
+def iter_merged_tables(tables):
+    """Merge tables split across pages, yielding each one as soon as the next table starts"""
     current_table = None
 
     for table in tables:
@@ -56,16 +246,18 @@ def merge_split_tables(tables):
         # It's a complete table if it has both title and header
         if has_title and has_header:
             if current_table:
-                merged.append(current_table)
+                yield current_table
             current_table = table
         # It's a continuation if it matches column count and doesn't have title/header
         elif current_table and len(data[0]) == len(current_table["data"][0]) and not has_title and not has_header:
             current_table["data"].extend(data)
 
     if current_table:
-        merged.append(current_table)
+        yield current_table
+
 
-    return merged
+def merge_split_tables(tables):
+    return list(iter_merged_tables(tables))
 
 
 def format_tables_for_df(merged_tables):
@@ -102,8 +294,19 @@ def format_tables_for_df(merged_tables):
     return formatted_tables
 
 
-def extract_all_tables(pdf_path):
-    tables = read_all_tables(pdf_path)
-    merged_tables = merge_split_tables(tables)  # [40:43]
+def extract_all_tables(pdf_path, parallel=False, max_workers=None, table_settings=None, cache=None):
+    # With a cache, an unchanged document is loaded as is and an amended one only re-extracts its changed pages
+    if cache:
+        document_key = cache.document_key(pdf_path, table_settings)
+        formatted_tables = cache.get_document(document_key)
+        if formatted_tables is not None:
+            return formatted_tables
+    # Pages are merged as they arrive: only the table being continued is held besides the results
+    tables = iter_tables(
+        pdf_path, parallel=parallel, max_workers=max_workers, table_settings=table_settings, cache=cache
+    )
+    merged_tables = iter_merged_tables(tables)  # [40:43]
     merged_tables = format_tables_for_df(merged_tables)
+    if cache:
+        cache.put_document(document_key, merged_tables)
     return merged_tables
@@ -0,0 +1,149 @@
+"""Copia local de los blobs de Azure, revalidada con ETag antes de volver a descargarlos.
+
+BlobMirror guarda cada blob en disco junto con su ETag y fecha de modificación. Al pedirlo hace una descarga
+condicional: si el blob no cambió, Azure responde 304 sin contenido y se usa la copia local. Los blobs grandes se
+descargan en rangos en paralelo.
+
+Para pruebas, DirectorySource sirve los blobs desde un directorio local con la misma interfaz, y AzureBlobSource
+funciona contra Azurite con su cadena de conexión (por ejemplo "UseDevelopmentStorage=true").
+"""
+
+# Standard library imports
+import json
+import os
+import shutil
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path, PurePosixPath
+from typing import Dict, Optional, Union
+
+# Third-party imports
+from azure.core import MatchConditions
+from azure.core.exceptions import HttpResponseError, ResourceNotModifiedError
+from azure.storage.blob import BlobServiceClient
+
+# Constants
+
+DEFAULT_MIRROR_DIR = os.environ.get("KVERSE_BLOB_MIRROR_DIR", ".cache/blobs")
+DEFAULT_CONTAINER = "kdata-raw"
+# Sobre este tamaño la descarga se divide en rangos de CHUNK_SIZE que se descargan en paralelo
+MAX_SINGLE_GET_SIZE = 4 * 2**20
+CHUNK_SIZE = 4 * 2**20
+MAX_CONCURRENCY = 4
+
+
+@dataclass
+class BlobVersion:
+    etag: str
+    last_modified: float
+    size: int
+
+
+class DirectorySource:
+    """Blobs servidos desde un directorio: el ETag se deriva del mtime y el tamaño del archivo."""
+
+    def __init__(self, root: Union[str, Path]):
+        self.root = Path(root)
+
+    def download(self, name: str, target: Path, etag: Optional[str] = None) -> Optional[BlobVersion]:
+        # None si el blob sigue teniendo el ETag indicado
+        stat = os.stat(self.root / name)
+        version = BlobVersion(f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"', stat.st_mtime, stat.st_size)
+        if etag == version.etag:
+            return None
+        shutil.copyfile(self.root / name, target)
+        return version
+
+
+class AzureBlobSource:
+    def __init__(
+        self,
+        container: str = DEFAULT_CONTAINER,
+        connection_string: Optional[str] = None,
+        max_concurrency: int = MAX_CONCURRENCY,
+    ):
+        service_client = BlobServiceClient.from_connection_string(
+            connection_string or os.environ["AZURE_CONN_STR"],
+            max_single_get_size=MAX_SINGLE_GET_SIZE,
+            max_chunk_get_size=CHUNK_SIZE,
+        )
+        self.container_client = service_client.get_container_client(container)
+        self.max_concurrency = max_concurrency
+
+    def download(self, name: str, target: Path, etag: Optional[str] = None) -> Optional[BlobVersion]:
+        conditions = {"etag": etag, "match_condition": MatchConditions.IfModified} if etag else {}
+        try:
+            downloader = self.container_client.get_blob_client(name).download_blob(
+                max_concurrency=self.max_concurrency, **conditions
+            )
+        except ResourceNotModifiedError:
+            return None
+        except HttpResponseError as error:
+            # Según el código de error que acompañe al 304, el SDK no siempre lo traduce a ResourceNotModifiedError
+            if error.status_code == 304:
+                return None
+            raise
+        with open(target, "wb") as file:
+            downloader.readinto(file)
+        properties = downloader.properties
+        return BlobVersion(properties.etag, properties.last_modified.timestamp(), properties.size)
+
+
+class BlobMirror:
+    def __init__(
+        self,
+        source: Union[AzureBlobSource, DirectorySource],
+        directory: Union[str, Path] = DEFAULT_MIRROR_DIR,
+        max_age: float = 0,
+    ):
+        self.source = source
+        self.directory = Path(directory)
+        # Segundos en que la copia local se usa sin consultar al origen
+        self.max_age = max_age
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+
+    def local_path(self, name: str) -> Path:
+        parts = PurePosixPath(name).parts
+        if not parts or any(part in ("..", "/") for part in parts):
+            raise ValueError(f"Invalid blob name: {name}")
+        return self.directory.joinpath(*parts)
+
+    def _metadata_path(self, path: Path) -> Path:
+        return path.with_name(f".{path.name}.json")
+
+    def _lock(self, name: str) -> threading.Lock:
+        with self._locks_lock:
+            return self._locks.setdefault(name, threading.Lock())
+
+    def fetch(self, name: str) -> Path:
+        # Ruta local del blob, descargándolo sólo si cambió desde la última copia
+        path = self.local_path(name)
+        metadata_path = self._metadata_path(path)
+        with self._lock(name):
+            metadata = json.loads(metadata_path.read_text()) if metadata_path.exists() and path.exists() else None
+            if metadata is not None and time.time() - metadata["checked"] < self.max_age:
+                return path
+
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Se descarga a un archivo temporal y se reemplaza, para que un lector nunca vea una copia a medio escribir
+            tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+            try:
+                version = self.source.download(name, tmp, etag=metadata["etag"] if metadata else None)
+                if version is not None:
+                    # Sólo el usuario del servidor puede leer la copia
+                    os.chmod(tmp, 0o600)
+                    os.replace(tmp, path)
+                    metadata = asdict(version)
+            finally:
+                if tmp.exists():
+                    tmp.unlink()
+            metadata["checked"] = time.time()
+            metadata_tmp = metadata_path.with_name(f"{metadata_path.name}.{os.getpid()}.tmp")
+            metadata_tmp.write_text(json.dumps(metadata))
+            os.replace(metadata_tmp, metadata_path)
+        return path
+
+    def read_bytes(self, name: str) -> bytes:
+        return self.fetch(name).read_bytes()
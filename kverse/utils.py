@@ -0,0 +1,9 @@
+# Standard library imports
+import multiprocessing
+
+
+def process_context():
+    # Procesos sin fork: un fork desde un proceso con hilos (Streamlit, Jupyter, SourceLoader) puede heredar un lock tomado y
+    # quedar bloqueado
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
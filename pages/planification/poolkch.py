@@ -11,42 +11,90 @@ from azure.storage.blob import BlobServiceClient
 from io import BytesIO
 from kverse.assets.pool import *
 from pages.planification.utils.vis_px_timeline import plot_pool_px_timeline
-from kverse.assets.pool.blocked_lanes import read_blocked_lanes
 from pages.planification.utils.vis_timeline import plot_component_arrival_timeline
-from pages.planification.utils.preprocessing import modify_dataframe
+from pages.planification.utils.preprocessing import modify_all_components
+from kverse.assets.pool.loader import BLOB_READER_KWARGS, source_paths
+from kverse.storage import AzureBlobSource, BlobMirror
 from datetime import datetime, date, timedelta
 
-
 # st.set_page_config(page_title="DevOps", page_icon=":bar_chart:", layout="wide")
 styler()
 
 current_date = datetime.now().date()
 
 
+@st.cache_resource
+def allocation_checkpoints():
+    # Última asignación calculada, se conserva entre expiraciones del caché para retomar la proyección
+    return {}
+
+
+@st.cache_resource
+def projection_cache():
+    # Proyecciones en disco, sobreviven a los reinicios del servidor
+    return ProjectionCache()
+
+
+# Con KVERSE_PLANNING_SOURCE=blob las planillas se leen del contenedor kdata-raw en vez de DATA/PLAN
+FROM_BLOB = os.environ.get("KVERSE_PLANNING_SOURCE") == "blob"
+
+
+@st.cache_resource
+def blob_mirror():
+    # Copia local del contenedor, sólo se descargan las planillas que cambiaron
+    return BlobMirror(AzureBlobSource())
+
+
+@st.cache_resource
+def source_loader():
+    # Planillas desde sus snapshots en Parquet, cargadas en paralelo; de la planilla de entregas sólo se procesan las
+    # semanas nuevas
+    return SourceLoader(
+        SourceSnapshots(), ArrivalsSheetStore(), reader_kwargs=BLOB_READER_KWARGS if FROM_BLOB else None
+    )
+
+
 @st.cache_data(ttl=timedelta(hours=1))
-def fetch_arrivals(ttl=timedelta(hours=1)):
-    return read_component_arrivals()
+def fetch_and_clean_data(profile=False):
+    # Proyección y si se leyó del caché en disco; con profile se toman los tiempos de la asignación
+    paths = source_paths(blob_mirror() if FROM_BLOB else None)
+    cache = projection_cache()
+    key = cache.key(paths.values())
+    projection = cache.get(key)
+    if projection is not None:
+        return projection, True
+
+    # Las mismas fuentes alimentan la asignación y la línea de tiempo de entregas
+    sources = source_loader().load_all(paths)
+    checkpoints = allocation_checkpoints()
+    if "allocation" in checkpoints:
+        allocation = checkpoints["allocation"].update(*sources.allocation_inputs, profile=profile)
+    else:
+        allocation = ComponentAllocation(*sources.allocation_inputs, checkpoints=True, profile=profile)
+        allocation.generate_pool_projection()
+    checkpoints["allocation"] = allocation
+    projection = CachedProjection.from_allocation(allocation, sources.arrivals_df)
+    cache.put(key, projection)
+    return projection, False
 
 
 @st.cache_data(ttl=timedelta(hours=1))
-def fetch_and_clean_data():
-    cc_df = read_cc()
-    pool_proj_df = read_base_pool_proj()
-    arrivals_df = read_component_arrivals()
-    blocked_lanes = read_blocked_lanes()
-    allocation = ComponentAllocation(cc_df, pool_proj_df, arrivals_df, blocked_lanes)
-    allocation.generate_pool_projection()
-    return allocation
+def fetch_pool_segments(profile=False):
+    # Tramos adelantados y a piso de todos los componentes, calculados una vez por proyección
+    df = fetch_and_clean_data(profile)[0].allocated_df.copy()
+    df = df.assign(pool_slot=lambda x: x["pool_slot"].astype("int"))
 
+    # Drop missing components
+    df = df.dropna(subset=["arrival_date"]).reset_index(drop=True)
+    return modify_all_components(df)
 
-allocation = fetch_and_clean_data()
-df = allocation.allocated_df.copy()
-df = df.assign(pool_slot=lambda x: x["pool_slot"].astype("int"))
-allocations_log = allocation.allocations_log
-arrivals_df = fetch_arrivals()
 
-# Drop missing components
-df = df.dropna(subset=["arrival_date"]).reset_index(drop=True)
+# Los tiempos de la asignación se toman sólo con Debug Mode activo
+profile = st.session_state.get("debug_mode", False)
+projection, from_cache = fetch_and_clean_data(profile)
+allocations_log = projection.allocations_log
+arrivals_df = projection.component_arrivals_df
+segments_df = fetch_pool_segments(profile)
 
 options_display = {
     "blower_parrilla": "Blower Parrilla",
@@ -67,10 +115,7 @@ component = st.sidebar.selectbox(
 )
 
 
-comp_df = df.loc[df["component"] == component].reset_index(drop=True)
-
-
-comp_df = modify_dataframe(comp_df)
+comp_df = segments_df.loc[segments_df["component"] == component]
 
 st.title("Entregas confirmadas")
 
@@ -125,7 +170,7 @@ colors = (
 
 # Filtro especial para ver cuales están confirmados
 confirmed_filter = st.sidebar.toggle = st.toggle("Ver Confirmados")
-debug_mode = st.toggle("Debug Mode")
+debug_mode = st.toggle("Debug Mode", key="debug_mode")
 plot_df = comp_df.loc[(comp_df["pool_slot"].isin(pool_slots_filter))]
 
 ## Number of colors does not need to match the number of options
@@ -136,9 +181,17 @@ fig = plot_pool_px_timeline(plot_df, by_confirmed=confirmed_filter, range_x=d)
 st.plotly_chart(fig, use_container_width=True)
 
 if debug_mode:
-    if "No se pudo agregar componente" in allocations_log[component]:
+    if allocations_log[component].failed:
         st.markdown("❌")
     else:
         st.markdown("✅")
 
-    st.write(allocations_log[component], unsafe_allow_html=True)
+    st.write(allocations_log[component].render(), unsafe_allow_html=True)
+
+    # Los tiempos sólo existen si la proyección se calculó en este proceso y no se leyó del caché en disco
+    if from_cache:
+        st.info("Proyección leída del caché en disco: no se calculó en esta ejecución y no tiene tiempos.")
+    elif "allocation" in allocation_checkpoints():
+        allocation = allocation_checkpoints()["allocation"]
+        st.dataframe(allocation.profiler.report(), hide_index=True)
+        st.json(allocation.profiler.counters)
@@ -1,72 +1,63 @@
+import numpy as np
 import pandas as pd
 
+# Columnas que los tramos derivados toman del cambio anterior del slot
+SEGMENT_COLUMNS = ["component", "componente", "subcomponent", "position"]
 
-def modify_dataframe(df):
-    # Sort the dataframe
-    df = df.sort_values(["pool_slot", "changeout_date"])
-
-    # Create new dataframes for overlaps and gaps
-    overlaps = []
-    gaps = []
-
-    # Iterate through the dataframe
-    for i in range(len(df) - 1):
-        current_row = df.iloc[i]
-        next_row = df.iloc[i + 1]
-
-        # Check for overlaps
-        if (
-            current_row["pool_slot"] == next_row["pool_slot"]
-            and current_row["arrival_date"] > next_row["changeout_date"]
-        ):
-
-            overlap_start = next_row["changeout_date"]
-            overlap_end = min(current_row["arrival_date"], next_row["arrival_date"])
-
-            overlaps.append(
-                {
-                    "pool_slot": current_row["pool_slot"],
-                    "changeout_date": overlap_start,
-                    "arrival_date": overlap_end,
-                    "equipo": next_row["equipo"],
-                    "component_serial": next_row["component_serial"],
-                    "pool_changeout_type": "A",  # A for Ahead of schedule
-                    "component": current_row["component"],
-                    "componente": current_row["componente"],
-                    "subcomponent": current_row["subcomponent"],
-                    "position": current_row["position"],
-                }
-            )
-
-        # Check for gaps
-        if current_row["pool_slot"] == next_row["pool_slot"]:
-            gap_start = current_row["arrival_date"]
-            gap_end = next_row["changeout_date"]
-
-            if gap_start < gap_end:
-                gaps.append(
-                    {
-                        "pool_slot": current_row["pool_slot"],
-                        "changeout_date": gap_start,
-                        "arrival_date": gap_end,
-                        "pool_changeout_type": "R",  # R for Ready
-                        "component": current_row["component"],
-                        "componente": current_row["componente"],
-                        "subcomponent": current_row["subcomponent"],
-                        "position": current_row["position"],
-                    }
-                )
-
-    # Create dataframes from the new rows and concatenate with the original
-    overlaps_df = pd.DataFrame(overlaps)
-    gaps_df = pd.DataFrame(gaps)
-    result_df = pd.concat([df, overlaps_df, gaps_df], ignore_index=True)
+
+def week_labels(dates):
+    # dates.dt.strftime("%Y-W%V") formateando una sola vez cada fecha distinta
+    codes, uniques = pd.factorize(dates)
+    labels = np.append(pd.DatetimeIndex(uniques).strftime("%Y-W%V").to_numpy(dtype=object), np.nan)
+    return pd.Series(labels[codes], index=dates.index, dtype=object)
+
+
+def add_segments(df, keys):
+    # Tramos derivados entre cada cambio y el siguiente del mismo slot (keys identifica el slot)
+    df = df.sort_values(keys + ["changeout_date"])
+
+    current = df.iloc[:-1].reset_index(drop=True)
+    following = df.iloc[1:].reset_index(drop=True)
+    same_slot = np.ones(current.shape[0], dtype=bool)
+    for key in keys:
+        same_slot &= current[key].to_numpy() == following[key].to_numpy()
+
+    # Overlaps: el siguiente cambio ocurre antes de que llegue el componente anterior
+    overlap = same_slot & (current["arrival_date"] > following["changeout_date"]).to_numpy()
+    overlap_end = current["arrival_date"].where(
+        ~(following["arrival_date"] < current["arrival_date"]), following["arrival_date"]
+    )
+    overlaps_df = pd.DataFrame(
+        {
+            "pool_slot": current["pool_slot"].to_numpy()[overlap],
+            "changeout_date": following["changeout_date"].to_numpy()[overlap],
+            "arrival_date": overlap_end.to_numpy()[overlap],
+            "equipo": following["equipo"].to_numpy()[overlap],
+            "component_serial": following["component_serial"].to_numpy()[overlap],
+            "pool_changeout_type": "A",  # A for Ahead of schedule
+            **{column: current[column].to_numpy()[overlap] for column in SEGMENT_COLUMNS},
+        }
+    )
+
+    # Gaps: el componente llega antes del siguiente cambio del slot
+    gap = same_slot & (current["arrival_date"] < following["changeout_date"]).to_numpy()
+    gaps_df = pd.DataFrame(
+        {
+            "pool_slot": current["pool_slot"].to_numpy()[gap],
+            "changeout_date": current["arrival_date"].to_numpy()[gap],
+            "arrival_date": following["changeout_date"].to_numpy()[gap],
+            "pool_changeout_type": "R",  # R for Ready
+            **{column: current[column].to_numpy()[gap] for column in SEGMENT_COLUMNS},
+        }
+    )
+
+    result_df = pd.concat([df] + [frame for frame in (overlaps_df, gaps_df) if not frame.empty], ignore_index=True)
 
     # Sort the final dataframe
-    result_df = result_df.sort_values(["pool_slot", "changeout_date"])
+    result_df = result_df.sort_values(keys + ["changeout_date"])
 
     # Forward fill component_code, componente, subcomponente, and position
-    result_df[["component", "subcomponent", "position"]] = result_df.groupby("pool_slot")[
+    result_df[["component", "subcomponent", "position"]] = result_df.groupby(keys)[
         ["component", "subcomponent", "position"]
     ].ffill()
     result_df[["changeout_date", "arrival_date"]] = result_df[["changeout_date", "arrival_date"]].apply(
@@ -74,6 +65,16 @@ def modify_dataframe(df):
     )
 
     # Generate changeout_week and arrival_week
-    result_df["changeout_week"] = result_df["changeout_date"].dt.strftime("%Y-W%V")
-    result_df["arrival_week"] = result_df["arrival_date"].dt.strftime("%Y-W%V")
+    result_df["changeout_week"] = week_labels(result_df["changeout_date"])
+    result_df["arrival_week"] = week_labels(result_df["arrival_date"])
     return result_df
+
+
+def modify_dataframe(df):
+    # Agrega los tramos adelantados ("A") y a piso ("R") de un componente
+    return add_segments(df, ["pool_slot"])
+
+
+def modify_all_components(df):
+    # Igual que modify_dataframe sobre cada componente, en una sola pasada para calcularlo una vez por proyección
+    return add_segments(df, ["component", "pool_slot"])
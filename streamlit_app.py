@@ -22,21 +22,41 @@ from streamlit_authenticator.utilities import (
     UpdateError,
 )
 from io import StringIO
+from azure.core import MatchConditions
+from azure.core.exceptions import HttpResponseError, ResourceNotModifiedError
 from azure.storage.blob import BlobServiceClient
 
 from datetime import timedelta
 
+CONFIG_BLOB = "CONFIG/config.yaml"
 
-@st.cache_data(ttl=timedelta(hours=1))
-def fetch_config():
 
+@st.cache_resource
+def config_blob_client():
     blob_service_client = BlobServiceClient.from_connection_string(os.environ["AZURE_CONN_STR"])
-    blob_client = blob_service_client.get_blob_client(
-        container="kdata-raw",
-        blob="CONFIG/config.yaml",
-    )
-    blob_data = blob_client.download_blob().readall().decode("utf-8")
-    config = yaml.load(blob_data, Loader=SafeLoader)
+    return blob_service_client.get_blob_client(container="kdata-raw", blob=CONFIG_BLOB)
+
+
+@st.cache_resource
+def config_copy():
+    # Última versión de config.yaml y su ETag, sólo en memoria: el archivo contiene las credenciales
+    return {"etag": None, "data": None}
+
+
+@st.cache_data(ttl=timedelta(hours=1))
+def fetch_config():
+    copy = config_copy()
+    conditions = {"etag": copy["etag"], "match_condition": MatchConditions.IfModified} if copy["etag"] else {}
+    try:
+        downloader = config_blob_client().download_blob(**conditions)
+        copy["data"], copy["etag"] = downloader.readall(), downloader.properties.etag
+    except ResourceNotModifiedError:
+        pass
+    except HttpResponseError as error:
+        # El SDK no siempre traduce el 304 a ResourceNotModifiedError
+        if error.status_code != 304:
+            raise
+    config = yaml.load(copy["data"].decode("utf-8"), Loader=SafeLoader)
 
     return config
 
@@ -0,0 +1,101 @@
+import warnings
+
+import pytest
+from pandas.testing import assert_frame_equal
+
+from kverse.assets.pool import arrivals_store
+from kverse.assets.pool.arrivals_store import ArrivalsSheetStore, sheet_hashes
+from kverse.assets.pool.comp_arrivals import load_arrivals_sheets
+from kverse.assets.pool.synthetic import write_arrivals_workbook
+
+N_WEEKS = 12
+
+
+@pytest.fixture(autouse=True)
+def ignore_openpyxl_warnings():
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", UserWarning)
+        yield
+
+
+@pytest.fixture
+def processed(monkeypatch):
+    # Hojas que el almacén manda a procesar en cada carga
+    calls = []
+
+    def load(blob_data, sheets=None, parallel=False, max_workers=None):
+        calls.append(list(sheets))
+        return load_arrivals_sheets(blob_data, sheets, parallel, max_workers)
+
+    monkeypatch.setattr(arrivals_store, "load_arrivals_sheets", load)
+    return calls
+
+
+def workbook(tmp_path, n_sheets):
+    return write_arrivals_workbook(tmp_path / f"arrivals_{n_sheets}.xlsx", n_sheets=n_sheets, n_weeks=N_WEEKS)
+
+
+def assert_same_frames(result, expected):
+    assert len(result) == len(expected)
+    for result_frame, expected_frame in zip(result, expected):
+        assert_frame_equal(result_frame, expected_frame)
+
+
+def test_round_trip(tmp_path):
+    path = workbook(tmp_path, 3)
+    frames = load_arrivals_sheets(path)
+    hashes = sheet_hashes(path)
+    store = ArrivalsSheetStore(tmp_path / "store.parquet")
+    store.write(hashes, frames)
+
+    stored = store.read()
+    assert list(stored) == list(hashes)
+    assert [sheet_hash for sheet_hash, _ in stored.values()] == list(hashes.values())
+    assert_same_frames([frame for _, frame in stored.values()], frames)
+
+
+def test_only_new_sheets_are_processed(tmp_path, processed):
+    store = ArrivalsSheetStore(tmp_path / "store.parquet")
+    first = store.load(workbook(tmp_path, 3))
+    assert processed == [["W1-W2", "W2-W3", "W3-W4"]]
+
+    # Mismas hojas: se leen del almacén
+    path = workbook(tmp_path, 4)
+    assert_same_frames(store.load(path)[:3], first)
+    assert processed[-1] == ["W4-W5"]
+    assert_same_frames(store.load(path), load_arrivals_sheets(path))
+    assert len(processed) == 2
+
+
+def test_changed_sheet_is_processed(tmp_path, processed, monkeypatch):
+    store = ArrivalsSheetStore(tmp_path / "store.parquet")
+    path = workbook(tmp_path, 3)
+    store.load(path)
+
+    hashes = sheet_hashes(path)
+    monkeypatch.setattr(arrivals_store, "sheet_hashes", lambda _: {**hashes, "W2-W3": "changed"})
+    store.load(path)
+    assert processed[-1] == ["W2-W3"]
+
+
+def test_version_change_processes_every_sheet(tmp_path, processed, monkeypatch):
+    store = ArrivalsSheetStore(tmp_path / "store.parquet")
+    path = workbook(tmp_path, 2)
+    store.load(path)
+
+    monkeypatch.setattr(arrivals_store, "STORE_VERSION", arrivals_store.STORE_VERSION + 1)
+    store.load(path)
+    assert processed[-1] == ["W1-W2", "W2-W3"]
+
+
+def test_corrupt_store_is_a_miss(tmp_path, processed):
+    store = ArrivalsSheetStore(tmp_path / "store.parquet")
+    path = workbook(tmp_path, 2)
+    store.load(path)
+    store.path.write_bytes(b"not parquet")
+
+    assert store.read() == {}
+    assert_same_frames(store.load(path), load_arrivals_sheets(path))
+    assert processed[-1] == ["W1-W2", "W2-W3"]
+    # El almacén queda reescrito
+    assert list(store.read()) == ["W1-W2", "W2-W3"]
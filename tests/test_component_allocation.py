@@ -0,0 +1,93 @@
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+
+from kverse.assets.pool.component_allocation import ComponentAllocation
+from kverse.assets.pool.synthetic import make_fleet
+
+# Flotas sintéticas: la última tiene más de 16 slots disponibles a la vez, donde quicksort deja de ser estable y el
+# motor por eventos debe reproducir los empates de find_available_pool_slot
+FLEETS = {
+    "seed0": dict(seed=0),
+    "seed1": dict(seed=1),
+    "seed2": dict(seed=2),
+    "seed3": dict(seed=3),
+    "ties": dict(n_equipos=80, years=3, pool_slots=24, seed=2),
+}
+
+
+def run_allocation(fleet, **kwargs) -> ComponentAllocation:
+    allocation = ComponentAllocation(*fleet.to_tuple(), **kwargs)
+    allocation.generate_pool_projection()
+    return allocation
+
+
+def assert_same_allocation(result: ComponentAllocation, expected: ComponentAllocation) -> None:
+    assert_frame_equal(result.allocated_df, expected.allocated_df)
+    assert_frame_equal(result.arrivals_df, expected.arrivals_df)
+    assert_frame_equal(result.missing_cc_df, expected.missing_cc_df)
+    assert list(result.allocations_log) == list(expected.allocations_log)
+    for component, log in expected.allocations_log.items():
+        assert result.allocations_log[component].failed_week == log.failed_week
+        assert result.allocations_log[component].render() == log.render()
+
+
+@pytest.fixture(scope="module", params=list(FLEETS))
+def fleet(request):
+    return make_fleet(**FLEETS[request.param])
+
+
+@pytest.fixture(scope="module")
+def frame_allocation(fleet):
+    return run_allocation(fleet, engine="frame")
+
+
+def test_events_engine_matches_frame_engine(fleet, frame_allocation):
+    assert_same_allocation(run_allocation(fleet, engine="events"), frame_allocation)
+
+
+def truncate_fleet(fleet, cutoff):
+    # Fuentes tal como se veían antes de cutoff: sin los cambios ni las llegadas posteriores
+    return type(fleet)(
+        fleet.cc_df.loc[fleet.cc_df["changeout_date"] < cutoff],
+        fleet.pool_proj_df,
+        fleet.arrivals_df.loc[fleet.arrivals_df["arrival_date"] < cutoff],
+        fleet.blocked_lanes.loc[fleet.blocked_lanes["changeout_date"] < cutoff],
+    )
+
+
+def shift_arrival(fleet, position, days):
+    arrivals_df = fleet.arrivals_df.copy()
+    arrivals_df.loc[position, "arrival_date"] += pd.Timedelta(days=days)
+    arrivals_df = arrivals_df.sort_values(["Componente", "arrival_date"]).reset_index(drop=True)
+    return type(fleet)(fleet.cc_df, fleet.pool_proj_df, arrivals_df, fleet.blocked_lanes)
+
+
+@pytest.mark.parametrize("change", ["unchanged", "new_weeks", "shifted_arrival"])
+def test_update_matches_full_recompute(fleet, frame_allocation, change):
+    real = fleet.arrivals_df.loc[fleet.arrivals_df["arrival_type"] == "REAL"]
+    if change == "unchanged":
+        previous = fleet
+    elif change == "new_weeks":
+        previous = truncate_fleet(fleet, real["arrival_date"].quantile(0.5))
+    else:
+        # Llegada real de la mitad del historial adelantada un día, sin cambiar su semana en la planilla
+        previous = shift_arrival(fleet, real.index[real.shape[0] // 2], 0)
+        fleet = shift_arrival(fleet, real.index[real.shape[0] // 2], -1)
+        frame_allocation = run_allocation(fleet, engine="frame")
+
+    allocation = run_allocation(previous, checkpoints=True, profile=True)
+    updated = allocation.update(*fleet.to_tuple())
+    assert_same_allocation(updated, frame_allocation)
+    # Retoma desde la semana afectada en vez de recalcular todas
+    full = run_allocation(fleet, profile=True)
+    assert updated.profiler.counters.get("processed_weeks", 0) < full.profiler.counters["processed_weeks"]
+
+
+def test_update_can_switch_profile():
+    fleet = make_fleet(seed=0)
+    allocation = run_allocation(fleet, checkpoints=True)
+    updated = allocation.update(*fleet.to_tuple(), profile=True)
+    assert updated.profiler.enabled and updated.profiler.counters
+    assert not updated.update(*fleet.to_tuple(), profile=False).profiler.enabled
+    assert updated.update(*fleet.to_tuple()).profiler.enabled
@@ -0,0 +1,20 @@
+import pytest
+from pandas.testing import assert_frame_equal
+
+from kverse.assets.pool.component_allocation import ComponentAllocation
+from kverse.assets.pool.synthetic import make_fleet
+
+# Etapas de preparación y proyección que polars_backend reemplaza
+FRAMES = ("cc_df", "pool_slots_df", "missing_cc_df", "allocated_df", "arrivals_df")
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_polars_backend_matches_pandas(seed):
+    fleet = make_fleet(seed=seed)
+    allocations = {}
+    for backend in ComponentAllocation.BACKENDS:
+        allocations[backend] = ComponentAllocation(*fleet.to_tuple(), backend=backend)
+        allocations[backend].generate_pool_projection()
+
+    for name in FRAMES:
+        assert_frame_equal(getattr(allocations["polars"], name), getattr(allocations["pandas"], name))
@@ -0,0 +1,37 @@
+import copy
+
+import pytest
+
+from kverse.assets.pool.component_allocation import ComponentAllocation
+from kverse.assets.pool.pool_sizing import PoolSizeOptimizer
+from kverse.assets.pool.synthetic import make_fleet
+
+
+@pytest.fixture(scope="module")
+def optimizer():
+    allocation = ComponentAllocation(*make_fleet(seed=0).to_tuple())
+    allocation.generate_pool_projection()
+    return PoolSizeOptimizer(allocation, replications=200)
+
+
+def smallest_capacity(optimizer, component, target):
+    # Búsqueda exhaustiva de referencia
+    scenario = optimizer.scenarios[component]
+    capacities = range(len(scenario.pool_slots) + len(scenario.changeout_days) + 1)
+    return next(capacity for capacity in capacities if optimizer.service_level(component, capacity) >= target)
+
+
+@pytest.mark.parametrize("target", [0.5, 0.9, 0.99, 1.0])
+def test_minimum_capacity_matches_linear_scan(optimizer, target):
+    for component in optimizer.scenarios:
+        assert optimizer.minimum_capacity(component, target) == smallest_capacity(optimizer, component, target)
+
+
+def test_minimum_capacity_without_monotonic_service_level(optimizer):
+    component = next(iter(optimizer.scenarios))
+    upper_bound = len(optimizer.scenarios[component].pool_slots) + len(optimizer.scenarios[component].changeout_days)
+    # Cumple en 3, deja de cumplir de 4 a 6 y vuelve a cumplir desde 7: una bisección devolvería 7
+    levels = [0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0] + [1.0] * (upper_bound - 6)
+    optimizer = copy.copy(optimizer)
+    optimizer.service_levels = {(component, capacity): level for capacity, level in enumerate(levels)}
+    assert optimizer.minimum_capacity(component, 0.9) == 3
@@ -0,0 +1,88 @@
+import os
+
+import pytest
+from pandas.testing import assert_frame_equal
+
+from kverse.assets.pool import projection_cache
+from kverse.assets.pool.component_allocation import ComponentAllocation
+from kverse.assets.pool.projection_cache import FRAMES, MANIFEST, CachedProjection, ProjectionCache
+from kverse.assets.pool.synthetic import make_fleet
+
+
+@pytest.fixture(scope="module")
+def projection():
+    fleet = make_fleet(seed=1)
+    allocation = ComponentAllocation(*fleet.to_tuple())
+    allocation.generate_pool_projection()
+    return CachedProjection.from_allocation(allocation, fleet.arrivals_df)
+
+
+@pytest.fixture
+def sources(tmp_path):
+    paths = [tmp_path / f"source_{number}.csv" for number in range(4)]
+    for number, path in enumerate(paths):
+        path.write_text(f"column\n{number}\n")
+    return paths
+
+
+def test_round_trip(tmp_path, sources, projection):
+    cache = ProjectionCache(tmp_path / "cache")
+    key = cache.key(sources)
+    assert cache.get(key) is None
+    cache.put(key, projection)
+
+    cached = cache.get(key)
+    for name in FRAMES:
+        assert_frame_equal(getattr(cached, name), getattr(projection, name))
+    assert list(cached.allocations_log) == list(projection.allocations_log)
+    for component, log in projection.allocations_log.items():
+        assert cached.allocations_log[component].failed_week == log.failed_week
+        assert cached.allocations_log[component].render() == log.render()
+
+
+def test_key_changes_with_sources_and_parameters(tmp_path, sources, monkeypatch):
+    cache = ProjectionCache(tmp_path / "cache")
+    key = cache.key(sources)
+    # Sólo cuenta el contenido: la misma planilla en otra ubicación da la misma clave
+    moved = tmp_path / "moved.csv"
+    os.replace(sources[0], moved)
+    assert cache.key([moved, *sources[1:]]) == key
+
+    moved.write_text("column\n99\n")
+    assert cache.key([moved, *sources[1:]]) != key
+    moved.write_text("column\n0\n")
+    assert cache.key([moved, *sources[1:]]) == key
+
+    # Otros días de overhaul cambian la proyección aunque las planillas sean las mismas
+    overrides = {**projection_cache.OVH_DAYS_OVERRIDES, ("modulo_potencia", "radiador"): (70, 114)}
+    monkeypatch.setattr(projection_cache, "OVH_DAYS_OVERRIDES", overrides)
+    assert cache.key([moved, *sources[1:]]) != key
+    monkeypatch.undo()
+
+    monkeypatch.setattr(projection_cache, "CACHE_VERSION", projection_cache.CACHE_VERSION + 1)
+    assert cache.key([moved, *sources[1:]]) != key
+
+
+def test_corrupt_entry_is_a_miss(tmp_path, sources, projection):
+    cache = ProjectionCache(tmp_path / "cache")
+    key = cache.key(sources)
+    cache.put(key, projection)
+    (cache.directory / key / "allocated_df.parquet").write_bytes(b"not parquet")
+
+    assert cache.get(key) is None
+    assert not (cache.directory / key).exists()
+
+
+def test_evicts_least_recently_used(tmp_path, projection):
+    cache = ProjectionCache(tmp_path / "cache")
+    for key in ("a", "b"):
+        cache.put(key, projection)
+    # Marca de último uso explícita, sin depender de la resolución del mtime
+    os.utime(cache.directory / "a" / MANIFEST, (1, 1))
+    os.utime(cache.directory / "b" / MANIFEST, (2, 2))
+    assert cache.get("a") is not None
+
+    # Con espacio para dos entradas y media, guardar una tercera elimina "b", la usada hace más tiempo
+    cache.max_bytes = 5 * cache.size(cache.directory / "a") // 2
+    cache.put("c", projection)
+    assert sorted(path.name for path in cache.entries()) == ["a", "c"]
@@ -0,0 +1,114 @@
+import os
+from datetime import date, datetime, time
+
+import numpy as np
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+
+from kverse.assets.pool import snapshots
+from kverse.assets.pool.snapshots import Source, SourceSnapshots
+
+# Columna como las de las planillas leídas con openpyxl, con valores de distintos tipos
+MIXED_VALUES = [
+    1,
+    "texto",
+    2.5,
+    True,
+    pd.Timestamp("2024-03-04"),
+    datetime(2024, 3, 5, 6, 7),
+    date(2024, 3, 6),
+    time(8, 30),
+    np.nan,
+]
+
+
+def read_source(path, repeat=1):
+    # Lector de prueba: el contenido del archivo multiplica las filas
+    n_rows = int(open(path).read()) * repeat
+    return pd.DataFrame(
+        {
+            "number": np.arange(n_rows, dtype="int64"),
+            "text": pd.Series(["a", np.nan] * n_rows, dtype=object)[:n_rows],
+            "date": pd.date_range("2024-01-01", periods=n_rows),
+            "numeric_text": pd.Series([1, 2] * n_rows, dtype=object)[:n_rows],
+            "mixed": pd.Series((MIXED_VALUES * n_rows)[:n_rows], dtype=object),
+        }
+    )
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "source.txt"
+    path.write_text(str(len(MIXED_VALUES)))
+    return path
+
+
+@pytest.fixture
+def reads():
+    # Veces que se procesa la planilla
+    calls = []
+
+    def reader(path, **kwargs):
+        calls.append(path)
+        return read_source(path, **kwargs)
+
+    return calls, reader
+
+
+@pytest.fixture
+def store(tmp_path, source, reads):
+    return SourceSnapshots(tmp_path / "snapshots", {"source": Source(str(source), reads[1])})
+
+
+def assert_identical(result, expected):
+    assert_frame_equal(result, expected)
+    for column in expected.columns[expected.dtypes == object]:
+        assert [type(value) for value in result[column]] == [type(value) for value in expected[column]]
+
+
+def test_round_trip_keeps_mixed_types(store, source):
+    expected = read_source(source)
+    assert_identical(store.build("source"), expected)
+    assert_identical(store.read("source"), expected)
+    assert store.metadata("source")["mixed_columns"] == ["mixed"]
+
+
+def test_unchanged_source_is_read_from_snapshot(store, reads):
+    first = store.load("source")
+    assert_identical(store.load("source"), first)
+    assert len(reads[0]) == 1
+
+
+def test_changed_source_is_processed_again(store, source, reads):
+    store.load("source")
+    source.write_text("3")
+    assert not store.is_current("source")
+    assert_identical(store.load("source"), read_source(source))
+    assert len(reads[0]) == 2
+
+
+def test_same_content_with_new_mtime_is_current(store, source, reads):
+    store.load("source")
+    stat = os.stat(source)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert store.is_current("source")
+    assert store.metadata("source")["mtime_ns"] == stat.st_mtime_ns + 10**9
+    assert len(reads[0]) == 1
+
+
+def test_version_change_is_a_miss(store, reads, monkeypatch):
+    store.load("source")
+    monkeypatch.setattr(snapshots, "SNAPSHOT_VERSION", snapshots.SNAPSHOT_VERSION + 1)
+    assert not store.is_current("source")
+    store.load("source")
+    assert len(reads[0]) == 2
+
+
+def test_corrupt_snapshot_is_a_miss(store, source, reads):
+    store.load("source")
+    store.snapshot_path("source").write_bytes(b"not parquet")
+    assert store.metadata("source") is None
+    assert_identical(store.load("source"), read_source(source))
+    assert len(reads[0]) == 2
+    assert store.is_current("source")
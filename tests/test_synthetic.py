@@ -0,0 +1,21 @@
+import pytest
+
+from kverse.assets.pool.component_allocation import ComponentAllocation
+from kverse.assets.pool.synthetic import make_fleet
+
+SEEDS = range(4)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_arrivals_sorted_by_date_within_component(seed):
+    # merge_asof de la asignación exige las llegadas ordenadas por fecha en cada componente, como las entregan los lectores
+    arrivals_df = make_fleet(seed=seed).arrivals_df
+    assert arrivals_df.groupby("Componente")["arrival_date"].apply(lambda dates: dates.is_monotonic_increasing).all()
+
+
+@pytest.mark.parametrize("engine", ComponentAllocation.ENGINES)
+@pytest.mark.parametrize("seed", SEEDS)
+def test_every_engine_runs(seed, engine):
+    allocation = ComponentAllocation(*make_fleet(seed=seed).to_tuple(), engine=engine)
+    allocation.generate_pool_projection()
+    assert not allocation.allocated_df.empty